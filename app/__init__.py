@@ -1,6 +1,8 @@
 from flask import Flask
+from .utils.log import configure_logging
 
 def create_app():
+    configure_logging()
     app = Flask(__name__)
     
     from .routes.api import api_bp
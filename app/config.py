@@ -7,6 +7,16 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # Directory for storing all METAR related files
 METAR_DATA_DIR = os.path.join(BASE_DIR, 'app', 'static', 'metar_data')
 UPPER_AIR_DATA_DIR = os.path.join(BASE_DIR,'app','static','upper_air_data')
+
+# Parsed-upload cache (see app/utils/parse_cache.py); kept across restarts, unlike the dirs above
+PARSE_CACHE_DIR = os.path.join(BASE_DIR, 'parse_cache')
+PARSE_CACHE_MEMORY_BYTES = 256 * 1024 * 1024
+PARSE_CACHE_DISK_BYTES = 2 * 1024 * 1024 * 1024
+
+# Aerodrome warning archive (see app/utils/warning_archive.py); kept across restarts
+WARNING_ARCHIVE_PATH = os.path.join(BASE_DIR, 'warning_archive.sqlite3')
+# Local METAR store, one file per station and month (see app/utils/metar_archive.py)
+METAR_ARCHIVE_DIR = os.path.join(BASE_DIR, 'metar_archive')
 # clean the directory
 if os.path.exists(METAR_DATA_DIR):
     shutil.rmtree(METAR_DATA_DIR, ignore_errors=True), 
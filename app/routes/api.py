@@ -10,6 +10,23 @@ from app.utils.AD_warn import parse_warning_file
 from app.utils.generate_warning_report import generate_warning_report, generate_aerodrome_warnings_table
 from app.utils.extract_metar_features import extract_metar_features
 from app.utils.validation import validate_files
+from app.utils.file_profile import profile_metar_file
+from app.utils.parse_cache import hash_file, save_upload
+from app.utils.timekeys import current_period, format_keys, key_timestamps, parse_stamp, stamp_datetime, time_group_keys
+from app.utils.phenomena import forecast_phenomena, match_phenomena, matched_phenomena
+from app.utils.upper_air_weather import evaluate_timeline, forecast_timeline, timeline_accuracy, timeline_rows
+from app.utils.live_verification import start_live_verification, get_live_verifier
+from app.utils.scores import continuous_scores, score_records
+from app.utils.metar_events import build_metar_feature_arrays
+from app.utils.warning_coverage import coverage_summary, verify_warning_coverage
+from app.utils.threshold_sweep import DEFAULT_THRESHOLDS, threshold_grid, sweep_thresholds, sweep_frame
+from app.utils.warning_sweep import DEFAULT_SETTINGS, sweep_grid, sweep_warning_settings, warning_sweep_frame
+from app.utils.warning_archive import archived_stations, ingest_files, query_warnings
+from app.utils.metar_archive import archive_metar_file
+from app.utils.batch_verification import month_range, run_batch
+from app.utils.progress import get_channel, stream_channel
+from app.utils.metrics import instrumented, timed, render_prometheus
+from app.utils.log import get_logger
 from app.config import METAR_DATA_DIR, UPPER_AIR_DATA_DIR
 import tempfile
 import pandas as pd
@@ -26,6 +43,7 @@ from PIL import Image
  
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
+logger = get_logger(__name__)
 
 # Create uploads and downloads subdirectories in METAR_DATA_DIR
 METAR_UPLOADS_DIR = os.path.join(METAR_DATA_DIR, 'uploads')
@@ -47,6 +65,11 @@ def encode_file_path(file_path):
     encoded = base64.urlsafe_b64encode(token.encode()).decode()
     return encoded
 
+def get_progress_channel():
+    """Return the progress channel for the job id sent by the client (form field or query string)."""
+    job_id = re.sub(r'[^a-zA-Z0-9-]', '', request.values.get('job_id', ''))
+    return get_channel(job_id)
+
 def decode_file_path(encoded_path):
     """Decode a secure token back to a file path"""
     try:
@@ -58,87 +81,34 @@ def decode_file_path(encoded_path):
     except Exception:
         return None
 
-def parse_validity_to_month_year(validity_str):
-    """Parse validity string like '202506010000' to month and year format"""
+def parse_validity_to_month_year(validity_str, period=None):
+    """
+    Parse a validity string to "Month Year".
+
+    Accepts YYYYMMDDHHMM, or DDHHMM, DDHHMMYY and DDHHMMYYYY groups whose missing
+    month (and year) come from `period` ((year, month), default the current month).
+    Unrecognised strings are returned unchanged.
+    """
     try:
-        # Remove 'Z' suffix if present
         validity_str = validity_str.rstrip('Z')
-        
-        # Check if it's a 12-digit format (YYYYMMDDHHMM)
+        year, month = period or current_period()
         if len(validity_str) == 12:
-            year = int(validity_str[:4])
-            month = int(validity_str[4:6])
-            day = int(validity_str[6:8])
-            hour = int(validity_str[8:10])
-            minute = int(validity_str[10:12])
-            
-            from datetime import datetime
-            date_obj = datetime(year, month, day, hour, minute)
-            
-        # Check if it's a 6-digit format (DDHHMM) - legacy format
-        elif len(validity_str) == 6:
-            day = int(validity_str[:2])
-            hour = int(validity_str[2:4])
-            minute = int(validity_str[4:6])
-            
-            # For 6-digit format, we need to determine the month and year
-            from datetime import datetime
-            year = 2024  # Based on the data context
-            month = 1  # January
-            
-            try:
-                date_obj = datetime(year, month, day, hour, minute)
-            except ValueError:
-                # If day is invalid for January, try February
-                month = 2
-                date_obj = datetime(year, month, day, hour, minute)
-            
-        # Check if it's an 8-digit format (DDHHMMYY)
-        elif len(validity_str) == 8:
-            day = int(validity_str[:2])
-            hour = int(validity_str[2:4])
-            minute = int(validity_str[4:6])
-            year = int(validity_str[6:8])
-            
-            # Convert 2-digit year to 4-digit year
-            if year < 50:  # Assume 20xx for years 00-49
-                year += 2000
-            else:  # Assume 19xx for years 50-99
-                year += 1900
-            
-            # Use current month as default, adjust if needed
-            from datetime import datetime
-            current_date = datetime.now()
-            date_obj = datetime(year, current_date.month, day, hour, minute)
-            
-        # Check if it's a 10-digit format (DDHHMMYYYY)
-        elif len(validity_str) == 10:
-            day = int(validity_str[:2])
-            hour = int(validity_str[2:4])
-            minute = int(validity_str[4:6])
-            year = int(validity_str[6:10])
-            
-            from datetime import datetime
-            current_date = datetime.now()
-            date_obj = datetime(year, current_date.month, day, hour, minute)
-            
+            key = parse_stamp(validity_str)
+        elif len(validity_str) in (6, 8, 10):
+            if len(validity_str) == 8:
+                year = int(validity_str[6:8])
+                year += 2000 if year < 50 else 1900
+            elif len(validity_str) == 10:
+                year = int(validity_str[6:10])
+            key = int(time_group_keys([validity_str[:6]], period=(year, month))[0])
         else:
-            # If format is not recognized, return the original string
             return validity_str
-        
-        # Format as "Month Year"
-        month_names = [
-            "January", "February", "March", "April", "May", "June",
-            "July", "August", "September", "October", "November", "December"
-        ]
-        
-        month_name = month_names[date_obj.month - 1]
-        year = date_obj.year
-        
-        return f"{month_name} {year}"
-        
+        if key is None or key < 0:
+            raise ValueError("invalid date")
+        return key_timestamps([key])[0].strftime("%B %Y")
+
     except Exception as e:
-        print(f"Error parsing validity string '{validity_str}': {e}")
+        logger.error("Error parsing validity string '%s': %s", validity_str, e)
         return validity_str
 
 def extract_date_from_metar_file(metar_file_path):
@@ -146,38 +116,11 @@ def extract_date_from_metar_file(metar_file_path):
     try:
         if not os.path.exists(metar_file_path):
             return None
-            
-        with open(metar_file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            
-        if not lines:
-            return None
-            
-        # Look for the first line with date information
-        for line in lines:
-            line = line.strip()
-            if line and len(line) >= 12:
-                # Check if the line starts with a date format (YYYYMMDDHHMM)
-                if line[:12].isdigit():
-                    date_str = line[:12]
-                    return parse_validity_to_month_year(date_str)
-                    
-        # If no date found in first 12 characters, try to find date in the line
-        for line in lines:
-            line = line.strip()
-            if line and 'METAR' in line:
-                # Look for date patterns in the METAR line
-                import re
-                # Look for patterns like YYYYMMDDHHMM
-                date_match = re.search(r'(\d{12})', line)
-                if date_match:
-                    date_str = date_match.group(1)
-                    return parse_validity_to_month_year(date_str)
-                    
-        return None
+        # Month of the first timed report, from the cached file profile
+        return profile_metar_file(metar_file_path).month_year
         
     except Exception as e:
-        print(f"Error extracting date from METAR file: {e}")
+        logger.error("Error extracting date from METAR file: %s", e)
         return None
 
  
@@ -212,8 +155,8 @@ def get_metar():
         
         # Validate date formats
         try:
-            datetime.strptime(start_date, "%Y%m%d%H%M")
-            datetime.strptime(end_date, "%Y%m%d%H%M")
+            stamp_datetime(start_date)
+            stamp_datetime(end_date)
         except ValueError:
             return jsonify({
                 "error": "Invalid date format. Please use the format YYYYMMDDHHMM."
@@ -243,7 +186,7 @@ def get_metar():
             }), 500
             
     except Exception as e:
-        print(f"Error in get_metar: {str(e)}")
+        logger.error("Error in get_metar: %s", e)
         return jsonify({
             "error": f"An error occurred while retrieving METAR data: {str(e)}"
         }), 500
@@ -265,6 +208,7 @@ def process_metar():
     Returns:
         JSON response with analysis results and paths to generated files
     """
+    progress = get_progress_channel()
     try:
         # Parse multipart/form-data
         form_data = request.form.to_dict()
@@ -274,6 +218,8 @@ def process_metar():
         end_date = form_data.get('end_date') 
         icao = form_data.get('icao')
         verification_type = request.form.get('verification_type', 'daily')  # default to daily
+        # Largest METAR/forecast time difference, in minutes, for pairing reports with forecast hours
+        time_tolerance = request.form.get('time_tolerance', 10, type=int)
 
         is_date_time_provided = start_date and end_date
         is_observation_file_provided = 'observation_file' in request.files
@@ -293,9 +239,9 @@ def process_metar():
             try:
                 # Use helper function to extract month and year from start date
                 _,_, _, metar_month_year = extract_month_year_from_date(start_date)
-                print(f"Extracted METAR month/year: {metar_month_year}")
+                logger.debug("Extracted METAR month/year: %s", metar_month_year)
                 # Also validate end date format
-                datetime.strptime(end_date, "%Y%m%d%H%M")
+                stamp_datetime(end_date)
                 if not metar_month_year:
                     return jsonify({
                         "error": "Could not extract month and year from start date."
@@ -312,7 +258,7 @@ def process_metar():
             }), 400
             
         forecast_file = request.files['forecast_file']
-        print(f"Forecast file: {forecast_file.filename}")
+        logger.debug("Forecast file: %s", forecast_file.filename)
 
         if forecast_file.filename == '':
             return jsonify({
@@ -329,7 +275,7 @@ def process_metar():
                     "error": "Empty observation file. Please upload a valid observation file."
                 }), 400
             
-            print(f"Observation file: {observation_file.filename}")
+            logger.debug("Observation file: %s", observation_file.filename)
             # If using observation file, extract month/year from its filename if possible
             if not metar_month_year:
                 _,_, _, metar_month_year = extract_day_month_year_from_filename(observation_file.filename)
@@ -344,38 +290,51 @@ def process_metar():
         timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
         forecast_filename = secure_filename(f"{forecast_month_year}.txt")
         forecast_path = os.path.join(METAR_UPLOADS_DIR, forecast_filename)
-        forecast_file.save(forecast_path)
-        
-        if is_date_time_provided:   
-            # Get METAR data using OgimetAPI
-            api = OgimetAPI()
-            metar_path = api.save_metar_to_file(
-                begin=start_date,
-                end=end_date,
-                icao=icao
-            )
-        else:
-            # get observation file
-            # save observation file
-            observation_filename = secure_filename(f"observation_{icao}_{timestamp}.txt")
-            observation_path = os.path.join(METAR_UPLOADS_DIR, observation_filename)
-            observation_file.save(observation_path)
-            metar_path = observation_path
+        forecast_digest = save_upload(forecast_file, forecast_path)
+        
+        with progress.stage("fetch"):
+            if is_date_time_provided:   
+                # Get METAR data using OgimetAPI
+                api = OgimetAPI()
+                metar_path = api.save_metar_to_file(
+                    begin=start_date,
+                    end=end_date,
+                    icao=icao
+                )
+                metar_digest = hash_file(metar_path) if metar_path and os.path.exists(metar_path) else None
+            else:
+                # get observation file
+                # save observation file
+                observation_filename = secure_filename(f"observation_{icao}_{timestamp}.txt")
+                observation_path = os.path.join(METAR_UPLOADS_DIR, observation_filename)
+                metar_digest = save_upload(observation_file, observation_path)
+                metar_path = observation_path
         
         # Decode METAR data to CSV with secure filename
         metar_csv_filename = secure_filename(f"decoded_metar_{icao}_{timestamp}.csv")
         metar_csv_path = os.path.join(METAR_DOWNLOADS_DIR, metar_csv_filename)
-        df_metar = decode_metar_to_csv(metar_path, metar_csv_path)
+        # METARs only carry the day, so decode them in the month of the request
+        decode_period = {}
+        if metar_month_year:
+            decode_period = {"month": int(metar_month_year[2:4]), "year": int(metar_month_year[4:])}
+        with progress.stage("decode"):
+            df_metar = decode_metar_to_csv(metar_path, metar_csv_path, digest=metar_digest, **decode_period)
+            progress.rows("decode", len(df_metar))
         
         # Extract forecast data
-        df_forecast = extract_data_from_file_with_day_and_wind(forecast_path)
+        with progress.stage("parse_forecast"):
+            df_forecast = extract_data_from_file_with_day_and_wind(forecast_path, digest=forecast_digest)
+            progress.rows("parse_forecast", len(df_forecast))
         
         # Compare weather data
-        comparison_df, merged_df = compare_weather_data(df_metar, df_forecast)
+        with progress.stage("compare"):
+            comparison_df, merged_df = compare_weather_data(df_metar, df_forecast, time_tolerance=time_tolerance)
+            progress.rows("compare", len(merged_df))
         
-        # Store last comparison results globally (so /accuracy_chart can access it)
-        global last_comparison_df
+        # Store last comparison results globally (so /accuracy_chart and /threshold_sweep can access them)
+        global last_comparison_df, last_merged_df
         last_comparison_df = comparison_df.copy()
+        last_merged_df = merged_df
 
 
         # chart_base64 = plot_accuracy_chart(comparison_df, metric="Overall")
@@ -389,23 +348,29 @@ def process_metar():
         comparison_csv_filename = secure_filename(f"comparison_{icao}_{timestamp}.csv")
         comparison_csv_path = os.path.join(METAR_DOWNLOADS_DIR, comparison_csv_filename)
 
-        # Create header information with period and station details
-        with open(comparison_csv_path, 'w', newline='', encoding='utf-8') as f:
-            f.write(f"REPORT,")
-            f.write(f"{icao},")
-            if start_date and end_date:
-                format_date = lambda x: datetime.strptime(x, "%Y%m%d%H%M").strftime("%d/%m/%Y %H:%M UTC") if x else ""
-                f.write(f"{format_date(start_date)} to {format_date(end_date)},")
-            else:
-                f.write(f"Observation,")
-            f.write("\n")  # Empty line separator
-
-        comparison_df.to_csv(comparison_csv_path, index=False, mode='a')
-
-        # Save merged data to CSV with secure filename
-        merged_csv_filename = secure_filename(f"merged_{icao}_{timestamp}.csv")
-        merged_csv_path = os.path.join(METAR_DOWNLOADS_DIR, merged_csv_filename)
-        merged_df.to_csv(merged_csv_path, index=False)
+        with progress.stage("report_write"):
+            # Create header information with period and station details
+            with open(comparison_csv_path, 'w', newline='', encoding='utf-8') as f:
+                f.write(f"REPORT,")
+                f.write(f"{icao},")
+                if start_date and end_date:
+                    format_date = lambda x: stamp_datetime(x).strftime("%d/%m/%Y %H:%M UTC") if x else ""
+                    f.write(f"{format_date(start_date)} to {format_date(end_date)},")
+                else:
+                    f.write(f"Observation,")
+                f.write("\n")  # Empty line separator
+
+            # Save merged data to CSV with secure filename
+            merged_csv_filename = secure_filename(f"merged_{icao}_{timestamp}.csv")
+            merged_csv_path = os.path.join(METAR_DOWNLOADS_DIR, merged_csv_filename)
+            # Bias, MAE, RMSE and vector wind error per day, month and station
+            scores_df = continuous_scores(merged_df, station=icao)
+            scores_csv_filename = secure_filename(f"scores_{icao}_{timestamp}.csv")
+            scores_csv_path = os.path.join(METAR_DOWNLOADS_DIR, scores_csv_filename)
+            with timed("csv_write"):
+                comparison_df.to_csv(comparison_csv_path, index=False, mode='a')
+                merged_df.to_csv(merged_csv_path, index=False)
+                scores_df.to_csv(scores_csv_path, index=False)
         
         # Calculate metrics
         total_comparisons = len(comparison_df)
@@ -418,6 +383,7 @@ def process_metar():
         encoded_metar_csv_path = encode_file_path(metar_csv_path)
         encoded_comparison_csv_path = encode_file_path(comparison_csv_path)
         encoded_merged_csv_path = encode_file_path(merged_csv_path)
+        encoded_scores_csv_path = encode_file_path(scores_csv_path)
 
         # Prepare response
         response_data = {
@@ -432,24 +398,29 @@ def process_metar():
                 "metar_file": encoded_metar_path,
                 "metar_csv": encoded_metar_csv_path,
                 "comparison_csv": encoded_comparison_csv_path,
-                "merged_csv": encoded_merged_csv_path
+                "merged_csv": encoded_merged_csv_path,
+                "scores_csv": encoded_scores_csv_path
             },
+            "scores": score_records(scores_df, level="station") + score_records(scores_df, level="month"),
             "metadata": {
-                "start_time": datetime.strptime(start_date, "%Y%m%d%H%M").strftime("%d/%m/%Y %H:%M UTC") if start_date else None,
-                "end_time": datetime.strptime(end_date, "%Y%m%d%H%M").strftime("%d/%m/%Y %H:%M UTC") if end_date else None,
+                "start_time": stamp_datetime(start_date).strftime("%d/%m/%Y %H:%M UTC") if start_date else None,
+                "end_time": stamp_datetime(end_date).strftime("%d/%m/%Y %H:%M UTC") if end_date else None,
                 "icao": icao,
             },
             # "comparison_data": comparison_df.to_dict(orient='records')
+            "timings": progress.timings,
         }
         
         return jsonify(response_data), 200
         
     except Exception as e:
         # Log the error (in a production environment, you'd use a proper logger)
-        print(f"Error in process_metar: {str(e)}")
+        logger.error("Error in process_metar: %s", e)
         return jsonify({
             "error": f"An error occurred while processing the METAR data: {str(e)}"
         }), 500
+    finally:
+        progress.done()
     
 
 @api_bp.route('/download/<file_type>', methods=['GET'])
@@ -458,7 +429,7 @@ def download_file(file_type):
     Download generated files.
     
     Parameters:
-        file_type: Type of file to download ('metar', 'metar_csv', 'comparison_csv')
+        file_type: Type of file to download ('metar', 'metar_csv', 'comparison_csv', 'merged_csv', 'scores_csv', 'adwrn_batch')
         file_path: Path to the file (from the process_metar response)
     """
     try:
@@ -475,7 +446,7 @@ def download_file(file_type):
                 "error": "Invalid file path token."
             }), 400
         
-        print(f"File path: {file_path}, normalized: {os.path.normpath(file_path)}")
+        logger.debug("File path: %s, normalized: %s", file_path, os.path.normpath(file_path))
             
         # Validate file path to prevent directory traversal
         normalized_path = os.path.normpath(file_path)
@@ -496,12 +467,15 @@ def download_file(file_type):
         if file_type == 'metar':
             mime_type = 'text/plain'
             filename = secure_filename(os.path.basename(file_path))
-        elif file_type in ['metar_csv', 'comparison_csv', 'merged_csv']:
+        elif file_type in ['metar_csv', 'comparison_csv', 'merged_csv', 'scores_csv']:
             mime_type = 'text/csv'
             filename = secure_filename(os.path.basename(file_path))
+        elif file_type == 'adwrn_batch':
+            mime_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            filename = secure_filename(os.path.basename(file_path))
         else:
             return jsonify({
-                "error": f"Invalid file type: {file_type}. Valid types are 'metar', 'metar_csv', 'comparison_csv', and 'merged_csv'."
+                "error": f"Invalid file type: {file_type}. Valid types are 'metar', 'metar_csv', 'comparison_csv', 'merged_csv', 'scores_csv' and 'adwrn_batch'."
             }), 400
         
         return send_file(
@@ -512,16 +486,43 @@ def download_file(file_type):
         )
         
     except Exception as e:
-        print(f"Error in download_file: {str(e)}")
+        logger.error("Error in download_file: %s", e)
         return jsonify({
             "error": f"An error occurred while downloading the file: {str(e)}"
         }), 500
         
-from flask import Response
+from flask import Response, stream_with_context
 import plotly.express as px
 
+
+@api_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Per-stage timers and counters in the Prometheus text exposition format."""
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+@api_bp.route('/progress/<job_id>', methods=['GET'])
+def progress_stream(job_id):
+    """
+    Server-Sent Events stream of stage progress for a job.
+
+    The client picks a job id, opens this stream and sends the same id as `job_id`
+    with its /process_metar, /process_upper_air or /adwrn_verify request. If that request
+    does not reach this server process, the stream ends with an `unknown_job` event.
+    """
+    job_id = re.sub(r'[^a-zA-Z0-9-]', '', job_id)
+    if not job_id:
+        return jsonify({"error": "Unknown job id."}), 404
+    channel = stream_channel(job_id)
+    return Response(
+        stream_with_context(channel.stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 # Global storage
 last_comparison_df = None
+last_merged_df = None
         
 @api_bp.route("/accuracy_chart", methods=["GET"])
 def accuracy_chart():
@@ -556,6 +557,127 @@ def accuracy_chart():
 
     return Response(fig.to_html(full_html=False), mimetype="text/html")
 
+@api_bp.route('/threshold_sweep', methods=['POST'])
+def threshold_sweep():
+    """
+    Score a grid of tolerance sets against the last /process_metar comparison.
+
+    Form fields (comma-separated values; an omitted field keeps the default tolerance):
+        wind_dir_threshold: degrees, e.g. "10,20,30"
+        wind_speed_threshold: knots
+        temp_threshold: °C
+        qnh_threshold: hPa
+        format: "json" (default) or "csv" for one row per threshold set, day and element
+
+    Returns:
+        JSON compliance cube (threshold set x day x element), or a CSV attachment
+    """
+    if last_merged_df is None:
+        return jsonify({"error": "No comparison data available. Run /process_metar first."}), 400
+    try:
+        grid = threshold_grid(**{
+            name: [float(value) for value in request.form[name].split(',') if value.strip()]
+            for name in DEFAULT_THRESHOLDS if request.form.get(name, '').strip()
+        })
+    except ValueError:
+        return jsonify({"error": "Thresholds must be comma-separated numbers."}), 400
+
+    sweep = sweep_thresholds(last_merged_df, grid)
+    if request.form.get('format') == 'csv':
+        return Response(
+            sweep_frame(sweep).to_csv(index=False),
+            mimetype='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=threshold_sweep.csv'}
+        )
+    return jsonify({
+        "status": "success",
+        "threshold_sets": sweep["threshold_sets"],
+        "days": sweep["days"],
+        "elements": sweep["elements"],
+        "totals": sweep["totals"].tolist(),
+        "compliance": sweep["compliance"].tolist(),
+    })
+
+@api_bp.route('/live_verification/start', methods=['POST'])
+def live_verification_start():
+    """
+    Start incremental verification of a forecast file for a station.
+
+    Form fields:
+        icao: ICAO code for the airport
+        forecast_file: TAKEOFF forecast text file
+
+    Returns:
+        JSON snapshot of the (empty) running verification state
+    """
+    try:
+        icao = re.sub(r'[^a-zA-Z0-9]', '', request.form.get('icao', ''))
+        if not icao:
+            return jsonify({"error": "Missing required parameter: icao."}), 400
+
+        forecast_file = request.files.get('forecast_file')
+        if not forecast_file or forecast_file.filename == '':
+            return jsonify({"error": "No forecast file provided. Please upload a forecast file."}), 400
+
+        _, _, _, forecast_month_year = extract_day_month_year_from_filename(forecast_file.filename)
+        forecast_filename = secure_filename(f"live_{icao}_{forecast_month_year or forecast_file.filename}.txt")
+        forecast_path = os.path.join(METAR_UPLOADS_DIR, forecast_filename)
+        forecast_digest = save_upload(forecast_file, forecast_path)
+
+        df_forecast = extract_data_from_file_with_day_and_wind(forecast_path, digest=forecast_digest)
+        if df_forecast.empty:
+            return jsonify({"error": "No forecast rows could be parsed from the forecast file."}), 400
+
+        verifier = start_live_verification(icao, df_forecast)
+        return jsonify(verifier.snapshot()), 200
+
+    except Exception as e:
+        logger.error("Error in live_verification_start: %s", e)
+        return jsonify({"error": f"An error occurred while starting live verification: {str(e)}"}), 500
+
+
+@api_bp.route('/live_verification/ingest', methods=['POST'])
+def live_verification_ingest():
+    """
+    Score METARs newer than the last one seen.
+
+    Form fields:
+        icao: ICAO code for the airport
+        observation_file / metar_text: optional METAR lines to ingest; when neither is
+            given, the new reports are polled from OGIMET.
+    """
+    try:
+        icao = re.sub(r'[^a-zA-Z0-9]', '', request.form.get('icao', ''))
+        verifier = get_live_verifier(icao)
+        if verifier is None:
+            return jsonify({"error": f"No live verification running for {icao}. Call /live_verification/start first."}), 404
+
+        observation_file = request.files.get('observation_file')
+        metar_text = request.form.get('metar_text')
+        if observation_file and observation_file.filename != '':
+            scored = verifier.ingest_text(observation_file.read().decode('utf-8', errors='ignore'))
+        elif metar_text:
+            scored = verifier.ingest_text(metar_text)
+        else:
+            scored = verifier.poll()
+
+        return jsonify({"scored": scored, **verifier.snapshot()}), 200
+
+    except Exception as e:
+        logger.error("Error in live_verification_ingest: %s", e)
+        return jsonify({"error": f"An error occurred while ingesting METAR data: {str(e)}"}), 500
+
+
+@api_bp.route('/live_verification/status', methods=['GET'])
+def live_verification_status():
+    """Return the running verification state for a station (query parameter: icao)."""
+    icao = re.sub(r'[^a-zA-Z0-9]', '', request.args.get('icao', ''))
+    verifier = get_live_verifier(icao)
+    if verifier is None:
+        return jsonify({"error": f"No live verification running for {icao}."}), 404
+    return jsonify(verifier.snapshot()), 200
+
+@instrumented("pdf_parse")
 def parse_forecast_pdf(pdf_path):
     reader = PdfReader(pdf_path)
     text = "\n".join(page.extract_text() for page in reader.pages)
@@ -570,7 +692,7 @@ def parse_forecast_pdf(pdf_path):
     if not icaoM:
         raise ValueError("ICAO code not found in PDF.")
     icao = icaoM.group(1).strip()
-    print(f"ICAO code extracted: {icao}")
+    logger.debug("ICAO code extracted: %s", icao)
 
     startDateTimeM = re.search(r"FROM(.*?)UTC", text,re.DOTALL)
     if not startDateTimeM:
@@ -618,13 +740,13 @@ def parse_forecast_pdf(pdf_path):
 @api_bp.route('/get_upper_air', methods=['GET'])
 def get_upper_air():
     datetime_str = request.args.get('datetime')
-    print(f"[INFO] Fetching upper air data for datetime: {datetime_str}")
+    logger.info("Fetching upper air data for datetime: %s", datetime_str)
     station_id = request.args.get('station_id')
-    print(f"[INFO] Station ID: {station_id}")
+    logger.info("Station ID: %s", station_id)
     try:
         file_path = fetch_upper_air_data(datetime_str, station_id)
-        print(f"file_path: {file_path}")
-        print(f"File exists: {os.path.exists(file_path)}")
+        logger.debug("file_path: %s", file_path)
+        logger.debug("File exists: %s", os.path.exists(file_path))
         if os.path.exists(file_path):
             return send_file(
                 file_path,
@@ -641,6 +763,7 @@ def get_upper_air():
 
 @api_bp.route('/process_upper_air', methods=['POST'])
 def process_upper_air():
+    progress = get_progress_channel()
     try:
         station_id = request.form['station_id']
         datetime_str = request.form.get('datetime')
@@ -657,32 +780,36 @@ def process_upper_air():
         # --- Handle Forecast File ---
         forecast_df = None
         if forecast_file:
-            forecast_filename = secure_filename(forecast_file.filename)
-            forecast_path = os.path.join(UPPER_AIR_DATA_DIR, 'uploads', forecast_filename)
-            forecast_file.save(forecast_path)
-            forecast_df,weather,startTime,endTime,icao,validity_code = parse_forecast_pdf(forecast_path)
-            if hasattr(forecast_df, 'columns'):
-                forecast_df.columns = forecast_df.columns.str.strip()
-                forecast_df = forecast_df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+            with progress.stage("parse_forecast"):
+                forecast_filename = secure_filename(forecast_file.filename)
+                forecast_path = os.path.join(UPPER_AIR_DATA_DIR, 'uploads', forecast_filename)
+                forecast_file.save(forecast_path)
+                forecast_df,weather,startTime,endTime,icao,validity_code = parse_forecast_pdf(forecast_path)
+                if hasattr(forecast_df, 'columns'):
+                    forecast_df.columns = forecast_df.columns.str.strip()
+                    forecast_df = forecast_df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+                progress.rows("parse_forecast", len(forecast_df))
         # --- Handle Observation File or Fetch ---
-        if observation_file:
-            obs_path = os.path.join(UPPER_AIR_DOWNLOADS_DIR, secure_filename(observation_file.filename))
-            observation_file.save(obs_path)
-            actual_df = pd.read_csv(obs_path, skipinitialspace=True)
-            actual_df.columns = actual_df.columns.str.strip()
-            actual_df = actual_df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
-        else:
-            file_path = fetch_upper_air_data(datetime_str, station_id)
-            actual_df = pd.read_csv(file_path, skipinitialspace=True)
-            actual_df.columns = actual_df.columns.str.strip()
-            actual_df = actual_df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+        with progress.stage("fetch"):
+            if observation_file:
+                obs_path = os.path.join(UPPER_AIR_DOWNLOADS_DIR, secure_filename(observation_file.filename))
+                observation_file.save(obs_path)
+                actual_df = pd.read_csv(obs_path, skipinitialspace=True)
+                actual_df.columns = actual_df.columns.str.strip()
+                actual_df = actual_df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+            else:
+                file_path = fetch_upper_air_data(datetime_str, station_id)
+                actual_df = pd.read_csv(file_path, skipinitialspace=True)
+                actual_df.columns = actual_df.columns.str.strip()
+                actual_df = actual_df.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+            progress.rows("fetch", len(actual_df))
 
-        print(actual_df.head())
+        logger.debug("Upper air data:\n%s", actual_df.head())
 
         # --- Debug: Print columns to verify ---
-        print("actual_df columns:", actual_df.columns.tolist())
+        logger.debug("actual_df columns: %s", actual_df.columns.tolist())
         if forecast_df is not None:
-            print("forecast_df columns:", forecast_df.columns.tolist())
+            logger.debug("forecast_df columns: %s", forecast_df.columns.tolist())
 
         # --- Convert columns to numeric as needed ---
         for col in ["geopotential height_m", "temperature_C", "wind speed_m/s"]:
@@ -727,7 +854,9 @@ def process_upper_air():
 
         # Replaces merge + min_pairs logic
 
-        min_pairs = interpolate_temperature_only(actual_df, forecast_df)
+        with progress.stage("compare"):
+            min_pairs = interpolate_temperature_only(actual_df, forecast_df)
+            progress.rows("compare", len(min_pairs))
 
 # Wind speed (converted)
         min_pairs["wind speed_kt_actual"] = min_pairs["actual_wind_speed_m/s"] * 1.94384
@@ -757,13 +886,14 @@ def process_upper_air():
         temp_accuracy = round(min_pairs["temp_correct"].mean() * 100, 2)
         wind_accuracy = round(min_pairs["wind_correct"].mean() * 100, 2)
 
-        weather_check_result = validate_forecast_weather_with_metar(forecast_path)
+        with progress.stage("weather_check"):
+            weather_check_result = validate_forecast_weather_with_metar(forecast_path)
         weather_accuracy_point = weather_check_result["status"]
         weather_accuracy_percentage= weather_check_result["match_percentage"]
 
-        start_dt = datetime.strptime(startTime, "%Y%m%d%H%M")
+        start_dt = stamp_datetime(startTime)
         formatted_start = start_dt.strftime("%d/%m/%Y %H:%M UTC")
-        end_dt = datetime.strptime(endTime, "%Y%m%d%H%M")
+        end_dt = stamp_datetime(endTime)
         formatted_end = end_dt.strftime("%d/%m/%Y %H:%M UTC")
 
         result_xlsx = os.path.join(UPPER_AIR_DOWNLOADS_DIR, f"upper_air_verification_{station_id}.xlsx")
@@ -822,7 +952,8 @@ def process_upper_air():
             }
         }
 
-        generate_upper_air_verification_xlsx(data_rows, metadata, result_xlsx, weather_info=weather_info)
+        with progress.stage("report_write"):
+            generate_upper_air_verification_xlsx(data_rows, metadata, result_xlsx, weather_info=weather_info)
 
         return jsonify({
             'file_path': result_xlsx,
@@ -832,6 +963,8 @@ def process_upper_air():
             'weather_accuracy': weather_accuracy_percentage,
             'weather_forecast': weather_check_result.get("forecast_text", ""),   # string
             'weather_matched': weather_check_result["matched_keywords"],
+            'weather_slices': weather_check_result["slices"],
+            'weather_timeline_accuracy': weather_check_result["timeline_accuracy"],
             'data': data_rows,
             # 'fl_accuracy_summary': fl_accuracy_summary,
             'metadata': {
@@ -839,12 +972,15 @@ def process_upper_air():
                 'icao': icao,
                 'start_time': formatted_start,
                 'end_time': formatted_end
-            }
+            },
+            'timings': progress.timings,
         })
 
     except Exception as e:
-        print(f"[ERROR] Exception in process_upper_air: {e}")
+        logger.error("Exception in process_upper_air: %s", e)
         return jsonify({'error': str(e)}), 500
+    finally:
+        progress.done()
     
 @api_bp.route('download/upper_air_csv')
 def download_upper_air_csv():
@@ -862,8 +998,8 @@ def validate_forecast_weather_with_metar(forecast_pdf_path):
     """
     try:
         forecast_df, forecast_weather, start_time, end_time, icao, _ = parse_forecast_pdf(forecast_pdf_path)
-        print(f"[INFO] Forecast weather: {forecast_weather}")
-        print(f"[INFO] ICAO: {icao}, Time: {start_time} to {end_time}")
+        logger.info("Forecast weather: %s", forecast_weather)
+        logger.info("ICAO: %s, Time: %s to %s", icao, start_time, end_time)
 
         # Fetch METAR using Ogimet
         api = OgimetAPI()
@@ -875,36 +1011,43 @@ def validate_forecast_weather_with_metar(forecast_pdf_path):
         with open(metar_file_path, 'r', encoding='utf-8') as f:
             metar_lines = f.readlines()
 
-        forecast_keywords = re.findall(r'\b[A-Z]{2,}\b', forecast_weather)
-        forecast_keywords = [w.strip() for w in forecast_keywords if w.isalpha()]
-        print(f"[DEBUG] Forecast weather keywords: {forecast_keywords}")
+        forecast_keywords = forecast_phenomena(forecast_weather)
+        logger.debug("Forecast weather phenomena: %s", forecast_keywords)
 
-        found_keywords = []
-        for line in metar_lines:
-            for keyword in forecast_keywords:
-                if keyword in line:
-                    found_keywords.append(keyword)
+        matches = match_phenomena(forecast_keywords, metar_lines)
+        found_keywords = matched_phenomena(matches)
 
         match_status = "CORRECT" if found_keywords else "INCORRECT"
         match_percentage = 100 if found_keywords else 0
 
+        # The same phenomena, checked slice by slice of the BECMG/TEMPO timeline
+        slices = evaluate_timeline(forecast_timeline(forecast_weather, start_time, end_time), metar_lines)
+
         return {
             "status": match_status,
             "metar_lines": metar_lines,
             "match_percentage": match_percentage,
-            "matched_keywords": list(set(found_keywords)),
+            "matched_keywords": found_keywords,
+            "matches": [
+                {"phenomenon": m.phenomenon, "time": time, "group": m.group}
+                for m, time in zip(matches, format_keys([m.key for m in matches]))
+            ],
             "forecast_text": forecast_weather,
+            "slices": timeline_rows(slices),
+            "timeline_accuracy": timeline_accuracy(slices),
             # "found_keywords": list(set(found_keywords))
         }
 
     except Exception as e:
-        print(f"[ERROR] Weather verification failed: {e}")
+        logger.error("Weather verification failed: %s", e)
         return {
             "status": "ERROR",
             "match_percentage": 0,
             "error": str(e),
             "metar_lines": [],
-            "matched_keywords": []
+            "matched_keywords": [],
+            "slices": [],
+            "timeline_accuracy": None
         }
 
 
@@ -925,7 +1068,7 @@ def upload_ad_warning():
     
     # Save the warning file
     warning_file = os.path.join(ad_warn_dir, 'AD_warning.txt')
-    file.save(warning_file)
+    warning_digest = save_upload(file, warning_file)
     
     # Also copy metar.txt to ad_warn_data directory if it exists
     metar_source = os.path.join(os.getcwd(), 'metar.txt')
@@ -933,7 +1076,7 @@ def upload_ad_warning():
         metar_dest = os.path.join(ad_warn_dir, 'metar.txt')
         import shutil
         shutil.copy2(metar_source, metar_dest)
-        print(f"[DEBUG] Copied METAR file to: {metar_dest}")
+        logger.debug("Copied METAR file to: %s", metar_dest)
     
     try:
         # Parse the warning file immediately to validate it
@@ -942,11 +1085,17 @@ def upload_ad_warning():
         station_code = extract_icao_from_warning(warning_file)
         if not station_code:
             station_code = "VABB"  # Default fallback
-            print(f"[DEBUG] Could not extract station code from warning file, using default: {station_code}")
+            logger.debug("Could not extract station code from warning file, using default: %s", station_code)
         else:
-            print(f"[DEBUG] Extracted station code from warning file: {station_code}")
+            logger.debug("Extracted station code from warning file: %s", station_code)
         
-        df = parse_warning_file(warning_file, station_code=station_code)
+        df = parse_warning_file(warning_file, station_code=station_code, digest=warning_digest)
+
+        # Keep the bulletin's warnings once the next upload replaces the file
+        try:
+            ingest_files([warning_file], workers=1)
+        except Exception as e:
+            logger.warning("Could not archive warning file: %s", e)
         
         # Read the file for preview
         with open(warning_file, 'r', encoding='utf-8') as f:
@@ -957,11 +1106,12 @@ def upload_ad_warning():
             'preview': preview
         })
     except Exception as e:
-        print(f"[ERROR] Failed to process warning file: {str(e)}")
+        logger.error("Failed to process warning file: %s", e)
         return jsonify({'error': f'Failed to process file: {str(e)}'}), 500
 
 @api_bp.route('/adwrn_verify', methods=['POST'])
 def adwrn_verify():
+    progress = get_progress_channel()
     try:
         # Define base directory and ensure it exists
         ad_warn_dir = os.path.join(os.getcwd(), 'ad_warn_data')
@@ -973,9 +1123,9 @@ def adwrn_verify():
         ad_warn_output = os.path.join(ad_warn_dir, 'AD_warn_output.csv')
         metar_features = os.path.join(ad_warn_dir, 'metar_extracted_features.txt')
         
-        print(f"[DEBUG] Checking paths:")
-        print(f"Warning file: {warning_file} (exists: {os.path.exists(warning_file)})")
-        print(f"METAR file: {metar_file} (exists: {os.path.exists(metar_file)})")
+        logger.debug("Checking paths:")
+        logger.debug("Warning file: %s (exists: %s)", warning_file, os.path.exists(warning_file))
+        logger.debug("METAR file: %s (exists: %s)", metar_file, os.path.exists(metar_file))
         
         # Check if required files exist
         if not os.path.exists(warning_file):
@@ -985,7 +1135,8 @@ def adwrn_verify():
             return jsonify({'success': False, 'error': 'METAR file not found. Please ensure it exists.'}), 404
         
         # Perform validation before processing
-        validation_result = validate_files(metar_file, warning_file)
+        with progress.stage("validate"):
+            validation_result = validate_files(metar_file, warning_file)
         
         if not validation_result['success']:
             return jsonify({
@@ -997,34 +1148,55 @@ def adwrn_verify():
             }), 400
         
         # Parse warning file
-        print("[DEBUG] Parsing warning file...")
-        df = parse_warning_file(warning_file, station_code=validation_result['metar_code'])
-        print(f"[DEBUG] AD warn output saved to: {ad_warn_output}")
+        logger.debug("Parsing warning file...")
+        with progress.stage("parse_warnings"):
+            df = parse_warning_file(
+                warning_file,
+                station_code=validation_result['metar_code'],
+                digest=validation_result['warning_profile'].digest,
+            )
+            progress.rows("parse_warnings", len(df))
+        logger.debug("AD warn output saved to: %s", ad_warn_output)
+
+        # Keep the METARs for batch verification
+        try:
+            archive_metar_file(metar_file, station=validation_result['metar_code'])
+        except Exception as e:
+            logger.warning("Could not archive METAR file: %s", e)
         
         # Extract METAR features
-        print("[DEBUG] Extracting METAR features...")
+        logger.debug("Extracting METAR features...")
         try:
-            extract_metar_features(ad_warn_output, metar_file, metar_features)
-            print(f"[DEBUG] METAR features saved to: {metar_features}")
+            with progress.stage("decode"):
+                extract_metar_features(ad_warn_output, metar_file, metar_features)
+            logger.debug("METAR features saved to: %s", metar_features)
         except Exception as e:
-            print(f"[ERROR] Failed to extract METAR features: {str(e)}")
+            logger.error("Failed to extract METAR features: %s", e)
             raise
         
         # Verify files exist after extraction
-        print(f"[DEBUG] Checking if files were created:")
-        print(f"AD warn output exists: {os.path.exists(ad_warn_output)}")
-        print(f"METAR features exists: {os.path.exists(metar_features)}")
+        logger.debug("Checking if files were created:")
+        logger.debug("AD warn output exists: %s", os.path.exists(ad_warn_output))
+        logger.debug("METAR features exists: %s", os.path.exists(metar_features))
         
         # Generate warning report
-        print("[DEBUG] Generating warning report...")
-        final_df, accuracy = generate_warning_report(ad_warn_output, metar_features)
-        
+        logger.debug("Generating warning report...")
+        with progress.stage("compare"):
+            final_df, accuracy = generate_warning_report(ad_warn_output, metar_features)
+            progress.rows("compare", len(final_df))
+        
+        # Episodes the warnings missed, and POD/FAR/CSI
+        with progress.stage("coverage"):
+            coverage = verify_warning_coverage(
+                df, build_metar_feature_arrays(validation_result['metar_profile'])
+            )
+
         # Debug accuracy value
-        print(f"[DEBUG] Accuracy type: {type(accuracy)}, value: {accuracy}")
+        logger.debug("Accuracy type: %s, value: %s", type(accuracy), accuracy)
         
         # Read the report content
         report_file = os.path.join(ad_warn_dir, 'final_warning_report.csv')
-        print(f"[DEBUG] Report file: {report_file} (exists: {os.path.exists(report_file)})")
+        logger.debug("Report file: %s (exists: %s)", report_file, os.path.exists(report_file))
         
         if not os.path.exists(report_file):
             return jsonify({'success': False, 'error': 'Failed to generate report file'}), 500
@@ -1078,13 +1250,13 @@ def adwrn_verify():
             if total_count > 0:
                 overall_accuracy = round((total_correct / total_count) * 100)
                 
-            print(f"[DEBUG] Detailed accuracy calculation:")
-            print(f"  Thunderstorm: {thunderstorm_correct}/{thunderstorm_count} = {thunderstorm_accuracy}%")
-            print(f"  Wind: {wind_correct}/{wind_count} = {wind_accuracy}%")
-            print(f"  Overall: {total_correct}/{total_count} = {overall_accuracy}%")
+            logger.debug("Detailed accuracy calculation:")
+            logger.debug("  Thunderstorm: %s/%s = %s%%", thunderstorm_correct, thunderstorm_count, thunderstorm_accuracy)
+            logger.debug("  Wind: %s/%s = %s%%", wind_correct, wind_count, wind_accuracy)
+            logger.debug("  Overall: %s/%s = %s%%", total_correct, total_count, overall_accuracy)
                 
         except Exception as e:
-            print(f"Error calculating detailed accuracy: {e}")
+            logger.error("Error calculating detailed accuracy: %s", e)
         
         # Ensure accuracy is properly formatted
         try:
@@ -1093,7 +1265,7 @@ def adwrn_verify():
             else:
                 accuracy_str = str(accuracy)
         except Exception as e:
-            print(f"[DEBUG] Error formatting accuracy: {e}")
+            logger.error("Error formatting accuracy: %s", e)
             accuracy_str = str(accuracy)
         
         # Extract station and date information from METAR file
@@ -1111,10 +1283,10 @@ def adwrn_verify():
             elif station:
                 station_info = f"Aerodrome warning for station {station}"
                 
-            print(f"[DEBUG] Extracted station info: {station_info}")
+            logger.debug("Extracted station info: %s", station_info)
             
         except Exception as e:
-            print(f"[DEBUG] Error extracting station info: {e}")
+            logger.error("Error extracting station info: %s", e)
         
         response_data = {
             'success': True, 
@@ -1130,23 +1302,28 @@ def adwrn_verify():
                 'warning_code': validation_result['warning_code']
             },
             'station_info': station_info,
-            'validity_info': validity_info
+            'validity_info': validity_info,
+            'contingency': coverage_summary(coverage)
         }
         
-        print(f"[DEBUG] Sending response with detailed accuracy: {response_data['detailed_accuracy']}")
+        logger.debug("Sending response with detailed accuracy: %s", response_data['detailed_accuracy'])
         
         # After generating the report and extracting station_info, prepend the heading to the CSV file
         if station_info:
-            with open(report_file, 'r', encoding='utf-8') as f:
-                original_content = f.read()
-            with open(report_file, 'w', encoding='utf-8') as f:
-                f.write(station_info + '\n')
-                f.write(original_content)
-        
+            with progress.stage("report_write"):
+                with open(report_file, 'r', encoding='utf-8') as f:
+                    original_content = f.read()
+                with open(report_file, 'w', encoding='utf-8') as f:
+                    f.write(station_info + '\n')
+                    f.write(original_content)
+        
+        response_data['timings'] = progress.timings
         return jsonify(response_data)
     except Exception as e:
-        print(f"[ERROR] Error in adwrn_verify: {str(e)}")
+        logger.error("Error in adwrn_verify: %s", e)
         return jsonify({'success': False, 'error': str(e)}), 500
+    finally:
+        progress.done()
 
 @api_bp.route('/download_metar', methods=['GET'])
 def download_metar():
@@ -1168,30 +1345,30 @@ def download_adwrn_report():
     try:
         # Look for the generated report file - check both possible locations
         report_file = os.path.join(METAR_DATA_DIR, 'ad_warn_data', 'final_warning_report.csv')
-        print(f"[DEBUG] Looking for report file in METAR_DATA_DIR: {report_file}")
-        print(f"[DEBUG] File exists: {os.path.exists(report_file)}")
+        logger.debug("Looking for report file in METAR_DATA_DIR: %s", report_file)
+        logger.debug("File exists: %s", os.path.exists(report_file))
         
         # If not found in METAR_DATA_DIR, check in the root ad_warn_data directory
         if not os.path.exists(report_file):
             # Check in the root directory
             root_ad_warn_dir = os.path.join(os.getcwd(), 'ad_warn_data')
             report_file = os.path.join(root_ad_warn_dir, 'final_warning_report.csv')
-            print(f"[DEBUG] Looking for report file in root: {report_file}")
-            print(f"[DEBUG] File exists: {os.path.exists(report_file)}")
+            logger.debug("Looking for report file in root: %s", report_file)
+            logger.debug("File exists: %s", os.path.exists(report_file))
             
             if not os.path.exists(report_file):
                 # Check for any CSV file in the root ad_warn_data directory
-                print(f"[DEBUG] Checking root ad_warn_dir: {root_ad_warn_dir}")
-                print(f"[DEBUG] Directory exists: {os.path.exists(root_ad_warn_dir)}")
+                logger.debug("Checking root ad_warn_dir: %s", root_ad_warn_dir)
+                logger.debug("Directory exists: %s", os.path.exists(root_ad_warn_dir))
                 
                 if os.path.exists(root_ad_warn_dir):
                     csv_files = [f for f in os.listdir(root_ad_warn_dir) if f.endswith('.csv')]
-                    print(f"[DEBUG] Found CSV files in root: {csv_files}")
+                    logger.debug("Found CSV files in root: %s", csv_files)
                     if csv_files:
                         # Use the most recent CSV file
                         csv_files.sort(key=lambda x: os.path.getmtime(os.path.join(root_ad_warn_dir, x)), reverse=True)
                         report_file = os.path.join(root_ad_warn_dir, csv_files[0])
-                        print(f"[DEBUG] Using most recent file from root: {report_file}")
+                        logger.debug("Using most recent file from root: %s", report_file)
                     else:
                         return jsonify({"error": "No aerodrome warning report found"}), 404
                 else:
@@ -1202,7 +1379,7 @@ def download_adwrn_report():
         if not os.path.exists(report_file):
             return jsonify({"error": "Aerodrome warning report not found"}), 404
         
-        print(f"[DEBUG] Sending file: {report_file}")
+        logger.debug("Sending file: %s", report_file)
         return send_file(
             report_file,
             mimetype='text/csv',
@@ -1210,7 +1387,7 @@ def download_adwrn_report():
             download_name='aerodrome_warning_report.csv'
         )
     except Exception as e:
-        print(f"Error downloading aerodrome warning report: {str(e)}")
+        logger.error("Error downloading aerodrome warning report: %s", e)
         return jsonify({"error": f"An error occurred while downloading the report: {str(e)}"}), 500
 
  
@@ -1241,7 +1418,7 @@ def download_adwrn_table():
         if not os.path.exists(table_file_path):
             return jsonify({"error": "Failed to generate aerodrome warnings table"}), 500
         
-        print(f"[DEBUG] Sending aerodrome warnings table: {table_file_path}")
+        logger.debug("Sending aerodrome warnings table: %s", table_file_path)
         return send_file(
             table_file_path,
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
@@ -1249,5 +1426,201 @@ def download_adwrn_table():
             download_name='Aerodrome_Warnings_Table.xlsx'
         )
     except Exception as e:
-        print(f"Error downloading aerodrome warnings table: {str(e)}")
-        return jsonify({"error": f"An error occurred while downloading the table: {str(e)}"}), 500
\ No newline at end of file
+        logger.error("Error downloading aerodrome warnings table: %s", e)
+        return jsonify({"error": f"An error occurred while downloading the table: {str(e)}"}), 500
+
+
+@api_bp.route('/adwrn_sweep', methods=['POST'])
+def adwrn_sweep():
+    """
+    Score a grid of verification settings against the last /adwrn_verify run.
+
+    Form fields (comma-separated values; an omitted field keeps the default):
+        direction_tolerance: degrees, e.g. "20,30,45"
+        gust_threshold: smallest METAR gust in KT that counts
+        window_padding: minutes added before and after each validity window
+        format: "json" (default) or "csv" for one row per setting and element
+
+    Returns:
+        JSON accuracy table (setting x element), or a CSV attachment
+    """
+    ad_warn_dir = os.path.join(os.getcwd(), 'ad_warn_data')
+    ad_warn_output = os.path.join(ad_warn_dir, 'AD_warn_output.csv')
+    metar_file = os.path.join(ad_warn_dir, 'metar.txt')
+    if not os.path.exists(ad_warn_output) or not os.path.exists(metar_file):
+        return jsonify({"error": "No aerodrome warning data available. Run /adwrn_verify first."}), 400
+    try:
+        grid = sweep_grid(**{
+            name: [float(value) for value in request.form[name].split(',') if value.strip()]
+            for name in DEFAULT_SETTINGS if request.form.get(name, '').strip()
+        })
+    except ValueError:
+        return jsonify({"error": "Settings must be comma-separated numbers."}), 400
+
+    try:
+        ad_warn_df = pd.read_csv(ad_warn_output, dtype={'Issue date/time': str})
+        sweep = sweep_warning_settings(ad_warn_df, profile_metar_file(metar_file), grid)
+    except Exception as e:
+        logger.error("Error in adwrn_sweep: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+    if request.form.get('format') == 'csv':
+        return Response(
+            warning_sweep_frame(sweep).to_csv(index=False),
+            mimetype='text/csv',
+            headers={'Content-Disposition': 'attachment; filename=adwrn_sweep.csv'}
+        )
+    return jsonify({
+        "status": "success",
+        "settings": sweep["settings"],
+        "elements": sweep["elements"],
+        "totals": sweep["totals"].tolist(),
+        "hits": sweep["hits"].tolist(),
+        "accuracy": sweep["accuracy"].tolist(),
+    })
+
+
+@api_bp.route('/adwrn_archive/ingest', methods=['POST'])
+def adwrn_archive_ingest():
+    """
+    Add aerodrome warning bulletins to the warning archive.
+
+    Form fields:
+        warning_files: one or more bulletin text files; they are parsed in parallel, and
+            files already in the archive are skipped
+
+    Returns:
+        JSON counts of ingested and skipped files, warnings and cancellations
+    """
+    files = [f for f in request.files.getlist('warning_files') if f.filename]
+    if not files:
+        return jsonify({"error": "No warning files provided."}), 400
+    try:
+        with tempfile.TemporaryDirectory() as upload_dir:
+            paths = []
+            for index, file in enumerate(files):
+                path = os.path.join(upload_dir, f"{index}_{secure_filename(file.filename)}")
+                save_upload(file, path)
+                paths.append(path)
+            result = ingest_files(paths)
+        # Report failures by the uploaded names
+        names = {path: file.filename for path, file in zip(paths, files)}
+        result["failed"] = {names[path]: error for path, error in result["failed"].items()}
+        return jsonify({"status": "success", **result})
+    except Exception as e:
+        logger.error("Error in adwrn_archive_ingest: %s", e)
+        return jsonify({"error": f"An error occurred while archiving the warnings: {str(e)}"}), 500
+
+
+@api_bp.route('/adwrn_archive/warnings', methods=['GET'])
+def adwrn_archive_warnings():
+    """
+    Archived warnings of a station for a period.
+
+    Query parameters:
+        icao: ICAO code of the station; without it, the archived stations are listed
+        start_date, end_date: YYYYMMDDHHMM; warnings valid at any time in between
+        format: "json" (default) or "csv" for an AD_warn_output.csv-style file
+
+    Returns:
+        JSON warning rows (or the station list), or a CSV attachment
+    """
+    icao = re.sub(r'[^a-zA-Z0-9]', '', request.args.get('icao', '')).upper()
+    if not icao:
+        return jsonify({"status": "success", "stations": archived_stations()})
+    start = parse_stamp(request.args.get('start_date', ''))
+    end = parse_stamp(request.args.get('end_date', ''))
+    if start is None or end is None:
+        return jsonify({"error": "start_date and end_date must be in format YYYYMMDDHHMM."}), 400
+
+    warnings_df = query_warnings(icao, start, end)
+    if request.args.get('format') == 'csv':
+        return Response(
+            warnings_df.to_csv(index=True),
+            mimetype='text/csv',
+            headers={'Content-Disposition': f'attachment; filename=AD_warn_output_{icao}.csv'}
+        )
+    return jsonify({
+        "status": "success",
+        "station": icao,
+        "warnings": warnings_df.astype(object).where(warnings_df.notna(), None).to_dict(orient='records'),
+    })
+
+
+@api_bp.route('/metar_archive/ingest', methods=['POST'])
+def metar_archive_ingest():
+    """
+    Add METAR files to the monthly METAR store used by batch verification.
+
+    Form fields:
+        observation_files: one or more METAR text files (OGIMET format)
+        icao: ICAO code of the station (optional; defaults to the station of each file)
+
+    Returns:
+        JSON reports added per file, station and month
+    """
+    files = [f for f in request.files.getlist('observation_files') if f.filename]
+    if not files:
+        return jsonify({"error": "No METAR files provided."}), 400
+    icao = re.sub(r'[^a-zA-Z0-9]', '', request.form.get('icao', '')).upper() or None
+    results, failed = {}, {}
+    with tempfile.TemporaryDirectory() as upload_dir:
+        for index, file in enumerate(files):
+            path = os.path.join(upload_dir, f"{index}_{secure_filename(file.filename)}")
+            save_upload(file, path)
+            try:
+                results[file.filename] = archive_metar_file(path, station=icao)
+            except Exception as e:
+                logger.error("Error archiving %s: %s", file.filename, e)
+                failed[file.filename] = str(e).replace(path, file.filename)
+    return jsonify({"status": "success", "files": results, "failed": failed})
+
+
+@api_bp.route('/adwrn_batch', methods=['POST'])
+def adwrn_batch():
+    """
+    Verify archived aerodrome warnings for several stations and months.
+
+    Warnings come from the warning archive (/adwrn_archive/ingest) and METARs from the
+    METAR store (/metar_archive/ingest).
+
+    Form fields:
+        stations: comma-separated ICAO codes
+        start_month: YYYYMM
+        end_month: YYYYMM (optional; defaults to start_month)
+
+    Returns:
+        JSON summary rows (one per station-month plus a total per station) and the
+        file_path of the workbook, for /download/adwrn_batch
+    """
+    stations = list(dict.fromkeys(
+        re.sub(r'[^A-Z0-9]', '', station.upper()) for station in request.form.get('stations', '').split(',')
+    ))
+    stations = [station for station in stations if station]
+    if not stations:
+        return jsonify({"error": "No stations provided."}), 400
+    start_month = request.form.get('start_month', '').strip()
+    end_month = request.form.get('end_month', '').strip() or start_month
+    try:
+        months = month_range(start_month, end_month)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    progress = get_progress_channel()
+    try:
+        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        output_path = os.path.join(METAR_DOWNLOADS_DIR, secure_filename(f"adwrn_batch_{timestamp}.xlsx"))
+        with progress.stage("batch"):
+            rows = run_batch(stations, months, output_path)
+            progress.rows("batch", len(rows))
+        return jsonify({
+            "status": "success",
+            "summary": rows,
+            "file_path": encode_file_path(output_path),
+            "timings": progress.timings,
+        })
+    except Exception as e:
+        logger.error("Error in adwrn_batch: %s", e)
+        return jsonify({"error": f"An error occurred during batch verification: {str(e)}"}), 500
+    finally:
+        progress.done()
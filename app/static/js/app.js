@@ -49,6 +49,57 @@ function showCustomAlert(message) {
     }
 }
 
+// Subscribe to the server-sent progress events of a verification job.
+// The label shows the current stage; close() stops listening and restores its text.
+function trackProgress(jobId, labelElement) {
+    const stageLabels = {
+        fetch: 'Fetching data',
+        decode: 'Decoding METARs',
+        parse_forecast: 'Parsing forecast',
+        parse_warnings: 'Parsing warnings',
+        validate: 'Validating files',
+        compare: 'Comparing with observations',
+        weather_check: 'Checking significant weather',
+        report_write: 'Writing report'
+    };
+    const source = new EventSource(`/api/progress/${jobId}`);
+    const originalText = labelElement ? labelElement.textContent : '';
+    let rows = '';
+
+    source.addEventListener('stage_start', function (e) {
+        const data = JSON.parse(e.data);
+        rows = '';
+        if (labelElement) labelElement.textContent = `${stageLabels[data.stage] || data.stage}...`;
+    });
+    source.addEventListener('rows', function (e) {
+        const data = JSON.parse(e.data);
+        rows = ` (${data.count} rows)`;
+        if (labelElement) labelElement.textContent = `${stageLabels[data.stage] || data.stage}${rows}`;
+    });
+    source.addEventListener('stage_end', function (e) {
+        const data = JSON.parse(e.data);
+        console.log(`[progress] ${data.stage}: ${data.duration_ms} ms${rows}`);
+    });
+    source.addEventListener('done', function (e) {
+        console.log('[progress] stage timings (ms):', JSON.parse(e.data).timings);
+        source.close();
+    });
+    source.onerror = function () {
+        source.close();
+    };
+    return {
+        close() {
+            source.close();
+            if (labelElement) labelElement.textContent = originalText;
+        }
+    };
+}
+
+function newJobId() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+}
+
 function populateTableFromCSV(csvText, tableElement) {
     // Parse CSV into rows
     const rows = csvText.trim().split("\n").map(row => row.split(","));
@@ -598,6 +649,10 @@ document.addEventListener('DOMContentLoaded', function () {
             formData.append('forecast_file', forecastFile);
             formData.append('observation_file', observationFile);
 
+            const jobId = newJobId();
+            formData.append('job_id', jobId);
+            const progressStream = trackProgress(jobId, reportLoadingSection.querySelector('span'));
+
             // Make API request to process METAR data
             showLoadingSection(); // Show loading before fetch
             fetch('/api/process_metar', {
@@ -710,7 +765,8 @@ document.addEventListener('DOMContentLoaded', function () {
                     hideLoadingSection(); // Hide loading on error
                     console.error('Error processing METAR data:', error);
                     showCustomAlert('Error processing METAR data. Please try again.');
-                });
+                })
+                .finally(() => progressStream.close());
         } else {
 
             // Show validation error message
@@ -985,6 +1041,10 @@ upperAirVerifyBtn.addEventListener('click', function () {
     //     formData.append('reference_temp', tempValue); // <-- send temp to backend
     // }
 
+    const jobId = newJobId();
+    formData.append('job_id', jobId);
+    const progressStream = trackProgress(jobId, upperAirVerifyBtn);
+
     // Show loading, hide report
     upperAirReportSection.style.display = 'none';
 
@@ -1091,7 +1151,8 @@ upperAirVerifyBtn.addEventListener('click', function () {
         })
         .catch(error => {
             alert('Error processing upper air data: ' + error.message);
-        });
+        })
+        .finally(() => progressStream.close());
 });
 
 // Helper function to populate the verification table
@@ -1474,7 +1535,9 @@ if (adwrnVerifyBtn && adwrnReportLoadingSection) {
         if (modal) modal.style.display = 'none';
         
         adwrnReportLoadingSection.style.display = 'flex';
-        fetch('/api/adwrn_verify', { method: 'POST' })
+        const jobId = newJobId();
+        const progressStream = trackProgress(jobId, adwrnReportLoadingSection.querySelector('span'));
+        fetch(`/api/adwrn_verify?job_id=${jobId}`, { method: 'POST' })
             .then(response => {
                 console.log('Response status:', response.status); // Debug log
                 return response.json();
@@ -1577,7 +1640,8 @@ if (adwrnVerifyBtn && adwrnReportLoadingSection) {
                 console.log('Fetch error:', err); // Debug log
                 adwrnReportLoadingSection.style.display = 'none';
                 showCustomAlert('Error: ' + err.message);
-            });
+            })
+            .finally(() => progressStream.close());
     });
 }
 
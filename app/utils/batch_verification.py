@@ -0,0 +1,216 @@
+"""
+Aerodrome warning verification for many stations and months at once.
+
+/api/adwrn_verify scores one uploaded bulletin against one METAR file. `run_batch` takes
+a set of stations and months, reads each station-month's warnings from the warning
+archive (app.utils.warning_archive) and its METARs from the METAR store
+(app.utils.metar_archive), and scores the station-months in parallel worker processes.
+The result is one workbook: a sheet per station in the Aerodrome_Warnings_Table.xlsx
+layout, covering all of its months, and a Summary sheet with a row per station-month
+and a total per station.
+"""
+
+import os
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Font
+
+from app.utils.file_profile import profile_metar_file
+from app.utils.generate_warning_report import (
+    aerodrome_warnings_rows,
+    warning_metar_pairs,
+    warning_report_frame,
+    write_aerodrome_warnings_sheet,
+)
+from app.utils.log import get_logger
+from app.utils.metar_archive import metar_month_path
+from app.utils.metar_events import build_metar_feature_arrays
+from app.utils.metrics import instrumented
+from app.utils.timekeys import month_starts
+from app.utils.warning_archive import query_warnings, worker_pool
+from app.utils.warning_coverage import ELEMENTS, describe_missed, validity_window_keys, verify_warning_coverage
+
+logger = get_logger(__name__)
+
+SUMMARY_COLUMNS = [
+    "Station", "Month", "Status", "Warnings", "METARs",
+    "Gust warnings", "Gust correct", "Gust % correct",
+    "Thunderstorm warnings", "Thunderstorm correct", "Thunderstorm % correct", "Overall % correct",
+    "Gust POD", "Gust FAR", "Gust CSI", "Missed gust events",
+    "Thunderstorm POD", "Thunderstorm FAR", "Thunderstorm CSI", "Missed thunderstorm events",
+]
+
+REPORT_ELEMENTS = {"Gust": "Gust warning", "Thunderstorm": "Thunderstorm warning"}
+# What aerodrome_warnings_rows reads of a final report, for a station without warnings
+EMPTY_REPORT_COLUMNS = ["Elements (Thunderstorm/Surface wind & Gust)", "Warning issue Time", "true-1 / false-0"]
+
+
+def month_range(start_month, end_month):
+    """
+    (year, month) tuples from one "YYYYMM" month to another, inclusive.
+
+    Raises:
+        ValueError: If a month is malformed or the range is reversed.
+    """
+    indices = []
+    for value in (start_month, end_month):
+        if not (len(value) == 6 and value.isdigit() and 1 <= int(value[4:6]) <= 12):
+            raise ValueError(f"Month must be in format YYYYMM: {value!r}")
+        indices.append(int(value[:4]) * 12 + int(value[4:6]) - 1)
+    first, last = indices
+    if last < first:
+        raise ValueError(f"{end_month} is before {start_month}")
+    return [(index // 12, index % 12 + 1) for index in range(first, last + 1)]
+
+
+def verify_station_month(station, year, month):
+    """
+    Score one station-month from the local stores.
+
+    Warnings whose validity starts in the month are scored against the month's METARs,
+    as generate_warning_report and verify_warning_coverage would for that bulletin.
+
+    Returns:
+        dict: "station", "month" ("YYYY-MM"), "status" ("ok", "no METARs", "no
+        warnings" or the error), "warnings" and "metars" (counts), "report" (the final
+        warning report DataFrame, or None) and "coverage" (verify_warning_coverage
+        output, or None).
+    """
+    result = {
+        "station": station, "month": f"{year:04d}-{month:02d}", "status": "ok",
+        "warnings": 0, "metars": 0, "report": None, "coverage": None,
+    }
+    try:
+        start = int(month_starts(year, month))
+        end = int(month_starts(year + month // 12, month % 12 + 1))
+        warnings_df = query_warnings(station, start, end)
+        starts, _ = validity_window_keys(warnings_df)
+        warnings_df = warnings_df[(starts >= start) & (starts < end)].reset_index(drop=True)
+        result["warnings"] = len(warnings_df)
+
+        metar_path = metar_month_path(station, year, month)
+        if not os.path.exists(metar_path):
+            result["status"] = "no METARs"
+            return result
+        profile = profile_metar_file(metar_path)
+        result["metars"] = profile.record_count
+        # Events no warning covered count even in a month without warnings
+        result["coverage"] = verify_warning_coverage(warnings_df, build_metar_feature_arrays(profile))
+        if warnings_df.empty:
+            result["status"] = "no warnings"
+            return result
+        result["report"] = warning_report_frame(warnings_df, warning_metar_pairs(warnings_df, metar_path))
+    except Exception as e:
+        logger.error("Batch verification of %s %s failed: %s", station, result["month"], e)
+        result["status"] = f"error: {e}"
+    return result
+
+
+def _verify_task(task):
+    return verify_station_month(*task)
+
+
+def _percent(part, whole):
+    return round(100 * part / whole, 1) if whole else None
+
+
+def _ratio(part, whole):
+    return round(part / whole, 3) if whole else None
+
+
+def summary_row(station, month, status, results):
+    """One Summary sheet row for verify_station_month results (a station-month, or all of a station's)."""
+    reports = [r["report"] for r in results if r["report"] is not None]
+    report = pd.concat(reports, ignore_index=True) if reports else None
+    row = {
+        "Station": station, "Month": month, "Status": status,
+        "Warnings": sum(r["warnings"] for r in results), "METARs": sum(r["metars"] for r in results),
+    }
+    totals = {}
+    for name, element in REPORT_ELEMENTS.items():
+        rows = report[report["Elements (Thunderstorm/Surface wind & Gust)"] == element] if report is not None else []
+        total = len(rows)
+        correct = int(rows["true-1 / false-0"].sum()) if total else 0
+        totals[name] = (correct, total)
+        row[f"{name} warnings"] = total
+        row[f"{name} correct"] = correct
+        row[f"{name} % correct"] = _percent(correct, total)
+    row["Overall % correct"] = _percent(sum(c for c, _ in totals.values()), sum(t for _, t in totals.values()))
+
+    coverages = [r["coverage"] for r in results if r["coverage"] is not None]
+    for name, element in zip(("Gust", "Thunderstorm"), ELEMENTS):
+        hits = sum(c[element]["hits"] for c in coverages)
+        misses = sum(c[element]["misses"] for c in coverages)
+        false_alarms = sum(c[element]["false_alarms"] for c in coverages)
+        windows = sum(c[element]["warnings"] for c in coverages)
+        row[f"{name} POD"] = _ratio(hits, hits + misses)
+        row[f"{name} FAR"] = _ratio(false_alarms, windows)
+        row[f"{name} CSI"] = _ratio(hits, hits + misses + false_alarms)
+        row[f"Missed {name.lower()} events"] = misses
+    return row
+
+
+def _write_summary_sheet(ws, rows):
+    for column, header in enumerate(SUMMARY_COLUMNS, 1):
+        cell = ws.cell(row=1, column=column, value=header)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(wrap_text=True, vertical="top", horizontal="center")
+    for row_index, row in enumerate(rows, 2):
+        for column, header in enumerate(SUMMARY_COLUMNS, 1):
+            cell = ws.cell(row=row_index, column=column, value=row[header])
+            if row["Month"] == "All":
+                cell.font = Font(bold=True)
+    ws.freeze_panes = "C2"
+
+
+def _period_text(months):
+    names = [pd.Timestamp(year=year, month=month, day=1).strftime("%B %Y") for year, month in months]
+    return names[0] if len(names) == 1 else f"{names[0]} to {names[-1]}"
+
+
+@instrumented("warning_batch")
+def run_batch(stations, months, output_path, workers=None):
+    """
+    Verify the aerodrome warnings of several stations over several months.
+
+    Args:
+        stations (list): ICAO codes; each gets a sheet named after it.
+        months (list): (year, month) tuples (see month_range).
+        output_path (str): Where to save the workbook.
+        workers (int): Worker processes (default: one per CPU); 1 runs in this process.
+
+    Returns:
+        list: The Summary sheet rows as dicts (SUMMARY_COLUMNS keys).
+    """
+    tasks = [(station, year, month) for station in stations for year, month in months]
+    if len(tasks) > 1 and workers != 1:
+        with worker_pool(workers) as pool:
+            results = list(pool.map(_verify_task, tasks))
+    else:
+        results = [_verify_task(task) for task in tasks]
+
+    wb = Workbook()
+    summary_ws = wb.active
+    summary_ws.title = "Summary"
+    period = _period_text(months)
+    rows = []
+    for station in stations:
+        station_results = [r for r in results if r["station"] == station]
+        rows.extend(summary_row(station, r["month"], r["status"], [r]) for r in station_results)
+        rows.append(summary_row(station, "All", "", station_results))
+
+        reports = [r["report"] for r in station_results if r["report"] is not None]
+        final_df = pd.concat(reports, ignore_index=True) if reports else pd.DataFrame(columns=EMPTY_REPORT_COLUMNS)
+        missed = {
+            element: sum((r["coverage"][element]["missed"] for r in station_results if r["coverage"]), [])
+            for element in ELEMENTS
+        }
+        write_aerodrome_warnings_sheet(
+            wb.create_sheet(station),
+            f"Aerodrome warning for station {station} for {period}",
+            aerodrome_warnings_rows(final_df, describe_missed(missed["thunderstorm"]), describe_missed(missed["gust"])),
+        )
+    _write_summary_sheet(summary_ws, rows)
+    wb.save(output_path)
+    return rows
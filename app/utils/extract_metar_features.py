@@ -1,23 +1,132 @@
+import numpy as np
 import pandas as pd
 import re
 import os
+from app.utils.metrics import instrumented
+from app.utils.file_profile import profile_metar_file
+from app.utils.timekeys import TIME_GROUP_RE, format_keys, parse_stamp
+
+CLOUD_GROUP_RE = re.compile(r'(FEW\d{3}(?:CB|TCU)?|SCT\d{3}(?:CB|TCU)?|BKN\d{3}(?:CB|TCU)?|OVC\d{3}(?:CB|TCU)?)')
 
 def get_metar_time_group(metar):
-    # Extract the 6-digit time group (DDHHMM) from METAR (e.g., 231105 from 231105Z)
-    match = re.search(r'\b(\d{6})Z\b', metar)
+    # The DDHHMM time group of a METAR as an int (e.g., 231105 from 231105Z), so it
+    # compares directly with validity groups
+    match = TIME_GROUP_RE.search(metar)
     if match:
-        return match.group(1)
-    # If not found, try to extract from full timestamp (e.g., 202309231105)
-    match_full = re.match(r'(\d{8})(\d{4})', metar)
-    if match_full:
-        # Use DDHHMM from the timestamp
-        date_part = match_full.group(1)  # YYYYMMDD
-        time_part = match_full.group(2)  # HHMM
-        dd = date_part[-2:]
-        hhmm = time_part
-        return f"{dd}/{hhmm}"
+        return int("".join(match.groups()))
+    # If not found, use DDHHMM of a full timestamp (e.g., 202309231105)
+    key = parse_stamp(metar[:12])
+    if key is not None:
+        return int(format_keys([key], "%d%H%M")[0])
     return None
 
+def _first_above(values, starts, thresholds):
+    """
+    For each query, the first index j >= start with values[j] > threshold (len(values) if none).
+
+    Binary lifting over a sparse table of block maxima: every query skips the largest
+    blocks whose maximum is not above its threshold, so all queries take log2(n) steps.
+    """
+    n = len(values)
+    position = np.asarray(starts, dtype=np.int64).copy()
+    if not n:
+        return position
+    levels = [values]
+    while 2 * (1 << (len(levels) - 1)) <= n:
+        half = 1 << (len(levels) - 1)
+        previous = levels[-1]
+        levels.append(np.maximum(previous[:-half], previous[half:]))
+    for k in range(len(levels) - 1, -1, -1):
+        level = levels[k]
+        fits = position < len(level)  # the block [position, position + 2**k) is inside
+        block_max = level[np.minimum(position, len(level) - 1)]
+        position = np.where(fits & (block_max <= thresholds), position + (1 << k), position)
+    return position
+
+
+def validity_groups(values):
+    """Last six digits of validity strings as ints, -1 where there are none."""
+    digits = pd.Series(values, dtype=object).astype(str).str.replace("Z", "", regex=False).str[-6:]
+    return pd.to_numeric(digits.where(digits.str.fullmatch(r"\d{6}")), errors="coerce").fillna(-1).to_numpy(np.int64)
+
+
+def warning_metar_rows(valid_from, valid_to, metar_times):
+    """
+    The METARs of each warning's validity window, in the order they are reported.
+
+    A window starts at the first report (in file order) at or after its start and runs
+    to the first report after its end, inclusive. A window that wraps past the end of
+    the month (end < start) runs to the last report and continues from the first
+    report with every report up to its end, stopping at the report exactly at its end.
+
+    Args:
+        valid_from, valid_to (array-like): DDHHMM groups as ints (-1 for none).
+        metar_times (np.ndarray): DDHHMM of each METAR in file order, -1 for none.
+
+    Returns:
+        tuple: (warning, metar) int arrays of equal length, grouped by warning in
+        ascending order.
+    """
+    valid_from = np.asarray(valid_from, dtype=np.int64)
+    valid_to = np.asarray(valid_to, dtype=np.int64)
+    times = np.asarray(metar_times, dtype=np.int64)
+    n, count = len(times), len(valid_from)
+    if not n or not count:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    usable = (valid_from >= 0) & (valid_to >= 0)
+    # First report at or after the start: the running maximum first reaches it there
+    start = np.searchsorted(np.maximum.accumulate(times), valid_from, side="left")
+    start = np.where(usable, start, n)
+    wrapped = valid_to < valid_from
+    stop = np.minimum(_first_above(times, np.minimum(start, n - 1), valid_to), n - 1)
+    stop = np.where(wrapped, n - 1, stop)
+
+    # Wrapped windows continue from the top when the last line has a time
+    distinct, first_seen = np.unique(times, return_index=True)
+    at_end = np.searchsorted(distinct, valid_to)
+    exact = (at_end < len(distinct)) & (distinct[np.minimum(at_end, len(distinct) - 1)] == valid_to)
+    restart_stop = np.where(exact, first_seen[np.minimum(at_end, len(distinct) - 1)], n - 1)
+    restarts = wrapped & (start < n) & (times[-1] >= 0)
+
+    # Segments [a, b] in output order: each warning's window, then its wrapped part
+    seg_warning = np.repeat(np.arange(count), 2)
+    seg_start = np.column_stack((start, np.zeros(count, dtype=np.int64))).ravel()
+    seg_stop = np.column_stack((np.where(start < n, stop, start - 1), np.where(restarts, restart_stop, -1))).ravel()
+    seg_limit = np.column_stack((np.full(count, np.iinfo(np.int64).max), valid_to)).ravel()
+    lengths = np.maximum(seg_stop - seg_start + 1, 0)
+
+    segment = np.repeat(np.arange(len(lengths)), lengths)
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    metar = seg_start[segment] + offsets
+    keep = (times[metar] >= 0) & (times[metar] <= seg_limit[segment])
+    return seg_warning[segment][keep], metar[keep]
+
+
+def warning_metar_arrays(profile):
+    """
+    Per-METAR values the warning verification looks at.
+
+    Returns:
+        dict: "times" (DDHHMM int64, -1 without a time), "wind_dir" and "gust" (float64,
+        NaN when missing; gusts of VRB winds are left out) and "clouds" (list of the
+        cloud groups of each line).
+    """
+    observations = profile.observations
+    times = np.where(observations.day > 0, observations.time_groups, -1).astype(np.int64)
+    wind_dir = np.where(observations.is_missing("wind_dir"), np.nan, observations.wind_dir).astype(np.float64)
+    gust = np.where(observations.is_missing("gust") | observations.vrb, np.nan, observations.gust).astype(np.float64)
+    clouds = [CLOUD_GROUP_RE.findall(line) for line in profile.lines]
+    return {"times": times, "wind_dir": wind_dir, "gust": gust, "clouds": clouds}
+
+
+def fcst_rows(ad_warn_df):
+    """Indices of the warnings with FCST in FCST/OBS, and the FCST/OBS text of every row."""
+    fcst_obs = ad_warn_df["FCST/OBS"].astype(str).str.strip().str.upper()
+    return np.flatnonzero((fcst_obs == "FCST").to_numpy()), fcst_obs.tolist()
+
+
+@instrumented("metar_features")
 def extract_metar_features(ad_warn_output_path, metar_file_path, output_path):
     """
     Extract METAR features from the METAR file based on warning validity periods.
@@ -30,66 +139,41 @@ def extract_metar_features(ad_warn_output_path, metar_file_path, output_path):
     # Read warnings
     ad_warn_df = pd.read_csv(ad_warn_output_path)
 
-    # Read METAR lines
-    with open(metar_file_path, 'r') as f:
-        metar_lines = [line.strip() for line in f if line.strip()]
+    # METAR lines, parsed once per file content
+    profile = profile_metar_file(metar_file_path)
+    metar_lines = profile.lines
+    metars = warning_metar_arrays(profile)
+    fcst, fcst_obs = fcst_rows(ad_warn_df)
+    validity_from = ad_warn_df["Validity from"].astype(str).str.replace("Z", "", regex=False).str[-6:].tolist()
+    validity_to = ad_warn_df["Validity To"].astype(str).str.replace("Z", "", regex=False).str[-6:].tolist()
+    warning, metar = warning_metar_rows(
+        validity_groups(ad_warn_df["Validity from"].to_numpy()[fcst]),
+        validity_groups(ad_warn_df["Validity To"].to_numpy()[fcst]),
+        metars["times"],
+    )
+    bounds = np.searchsorted(warning, np.arange(len(fcst) + 1))
+
+    feature_lines = {}
 
+    def describe(i):
+        """The two output lines for METAR i."""
+        if i not in feature_lines:
+            wind_dir = None if np.isnan(metars["wind_dir"][i]) else int(metars["wind_dir"][i])
+            wind_gust = None if np.isnan(metars["gust"][i]) else int(metars["gust"][i])
+            feature_lines[i] = (
+                f'  METAR: {metar_lines[i]}\n'
+                f'    Wind Dir: {wind_dir}, Gust: {wind_gust}, Clouds: {metars["clouds"][i]}\n'
+            )
+        return feature_lines[i]
+
+    rank = {row: k for k, row in enumerate(fcst.tolist())}
     with open(output_path, 'w') as out:
-        for idx, row in enumerate(ad_warn_df.iterrows()):
-            fcst_obs = str(row[1].get('FCST/OBS', '')).strip().upper()
-            if fcst_obs != 'FCST':
-                out.write(f'\nRow {idx+1}: FCST/OBS is {fcst_obs}, skipping extraction.\n')
+        for idx in range(len(ad_warn_df)):
+            if idx not in rank:
+                out.write(f'\nRow {idx+1}: FCST/OBS is {fcst_obs[idx]}, skipping extraction.\n')
                 continue
-            validity_from = str(row[1].get('Validity from', '')).replace('Z', '')[-6:]  # always last 6 digits
-            validity_to = str(row[1].get('Validity To', '')).replace('Z', '')[-6:]      # always last 6 digits
-            out.write(f'\nRow {idx+1}: Validity {validity_from} to {validity_to}\n')
-            extracting = False
-            wrapped = False
-            if int(validity_to) < int(validity_from):
-                wrapped = True
-            for i, metar in enumerate(metar_lines):
-                metar_time = get_metar_time_group(metar)
-                if not metar_time:
-                    continue
-                # WRAP-AROUND: extract from validity_from to end, then from start to validity_to
-                if wrapped:
-                    if not extracting and int(metar_time) >= int(validity_from):
-                        extracting = True
-                    if extracting:
-                        wind_match = re.search(r' (\d{3})(\d{2})(G(\d{2,3}))?KT', metar)
-                        wind_dir = int(wind_match.group(1)) if wind_match else None
-                        wind_gust = int(wind_match.group(4)) if wind_match and wind_match.group(4) else None
-                        clouds = re.findall(r'(FEW\d{3}(?:CB|TCU)?|SCT\d{3}(?:CB|TCU)?|BKN\d{3}(?:CB|TCU)?|OVC\d{3}(?:CB|TCU)?)', metar)
-                        out.write(f'  METAR: {metar}\n')
-                        out.write(f'    Wind Dir: {wind_dir}, Gust: {wind_gust}, Clouds: {clouds}\n')
-                    # If we reach the end, continue from the start
-                    if extracting and i == len(metar_lines) - 1:
-                        for j, metar2 in enumerate(metar_lines):
-                            metar_time2 = get_metar_time_group(metar2)
-                            if not metar_time2:
-                                continue
-                            if int(metar_time2) <= int(validity_to):
-                                wind_match = re.search(r' (\d{3})(\d{2})(G(\d{2,3}))?KT', metar2)
-                                wind_dir = int(wind_match.group(1)) if wind_match else None
-                                wind_gust = int(wind_match.group(4)) if wind_match and wind_match.group(4) else None
-                                clouds = re.findall(r'(FEW\d{3}(?:CB|TCU)?|SCT\d{3}(?:CB|TCU)?|BKN\d{3}(?:CB|TCU)?|OVC\d{3}(?:CB|TCU)?)', metar2)
-                                out.write(f'  METAR: {metar2}\n')
-                                out.write(f'    Wind Dir: {wind_dir}, Gust: {wind_gust}, Clouds: {clouds}\n')
-                            if int(metar_time2) == int(validity_to):
-                                break
-                        break
-                # NORMAL: extract from >= validity_from to <= validity_to
-                else:
-                    if not extracting and int(metar_time) >= int(validity_from):
-                        extracting = True
-                    if extracting:
-                        wind_match = re.search(r' (\d{3})(\d{2})(G(\d{2,3}))?KT', metar)
-                        wind_dir = int(wind_match.group(1)) if wind_match else None
-                        wind_gust = int(wind_match.group(4)) if wind_match and wind_match.group(4) else None
-                        clouds = re.findall(r'(FEW\d{3}(?:CB|TCU)?|SCT\d{3}(?:CB|TCU)?|BKN\d{3}(?:CB|TCU)?|OVC\d{3}(?:CB|TCU)?)', metar)
-                        out.write(f'  METAR: {metar}\n')
-                        out.write(f'    Wind Dir: {wind_dir}, Gust: {wind_gust}, Clouds: {clouds}\n')
-                    if extracting and int(metar_time) > int(validity_to):
-                        break
-    
-    return output_path 
\ No newline at end of file
+            out.write(f'\nRow {idx+1}: Validity {validity_from[idx]} to {validity_to[idx]}\n')
+            k = rank[idx]
+            out.write("".join(describe(i) for i in metar[bounds[k]:bounds[k + 1]].tolist()))
+
+    return output_path
@@ -3,7 +3,9 @@ from datetime import datetime
 import re
 import sys
 import os
+from app.utils.metrics import instrumented
 
+@instrumented("ogimet_fetch")
 def fetch_all_metar(icao, start_dt, end_dt, output_file="metar.txt"):
     # Ensure output file is saved in ad_warn_data directory
     ad_warn_dir = os.path.join(os.getcwd(), 'ad_warn_data')
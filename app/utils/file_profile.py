@@ -0,0 +1,272 @@
+"""
+Parse-once profiles of the METAR and aerodrome warning input files.
+
+Validation, warning parsing, METAR feature extraction and the report heading all need
+the same few facts about `metar.txt` and `AD_warning.txt`: the station, the record
+times and the cleaned lines. `profile_metar_file` and `profile_warning_file` read a file
+once, pick those out with vectorised passes, and cache the result by content hash, so
+every later stage of a request (and any later request on the same upload) reuses it
+instead of rescanning the file.
+
+Record times are epoch-minute keys (see app.utils.timekeys) aligned with `lines`, -1 for
+lines without a usable time.
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from app.utils.observations import ObservationBatch
+from app.utils.timekeys import (
+    MINUTES_PER_DAY,
+    TIME_GROUP_RE,
+    frame_minute_keys,
+    key_periods,
+    key_timestamps,
+    parse_stamp,
+    stamp_keys,
+    time_group_keys,
+)
+
+# Profiles kept in memory, most recently used last
+CACHE_SIZE = 8
+
+# Station patterns of a METAR line, tried in this order
+METAR_STATION_RES = (
+    re.compile(r"^([A-Z]{4})\s+"),
+    re.compile(r"\b([A-Z]{4})\s+\d{6}Z"),
+    re.compile(r"\b([A-Z]{4})\s+\d{8,12}"),
+)
+WARNING_STATION_RE = re.compile(r"\b([A-Z]{4})\b")
+ISSUE_DATE_RE = re.compile(r"(\d{8})")
+WARNING_HEADER_RE = re.compile(r"^[A-Z]{4}\s+(\d{6})Z?\s+AD WRNG\b")
+
+# The issue date is looked for in this many leading lines of a warning file
+ISSUE_DATE_LINES = 5
+
+_cache = OrderedDict()
+_stat_digests = {}
+_lock = threading.Lock()
+
+
+class FileProfile:
+    """
+    What the pipeline needs to know about one input file.
+
+    Attributes:
+        kind (str): "metar" or "warning".
+        digest (str): SHA-1 of the file content.
+        lines (tuple): Stripped, non-empty lines in file order.
+        station (str): ICAO code, or None.
+        issue_date (str): YYYYMMDD issue date of a warning file, or None.
+        keys (np.ndarray): Read-only int64 epoch-minute key per line, -1 where the line
+            has no time (for warnings, only the AD WRNG header lines carry one).
+    """
+
+    __slots__ = ("kind", "digest", "lines", "station", "issue_date", "keys", "_observations")
+
+    def __init__(self, kind, digest, lines, station=None, issue_date=None, keys=None):
+        self.kind = kind
+        self.digest = digest
+        self.lines = tuple(lines)
+        self.station = station
+        self.issue_date = issue_date
+        keys = np.full(len(self.lines), -1, dtype=np.int64) if keys is None else np.asarray(keys, dtype=np.int64)
+        keys.setflags(write=False)
+        self.keys = keys
+        self._observations = None
+
+    @property
+    def timestamps(self):
+        """Valid record times as epoch-minute keys, in file order."""
+        return self.keys[self.keys >= 0]
+
+    @property
+    def record_count(self):
+        """Number of timed records (METAR reports or warnings)."""
+        return int(np.count_nonzero(self.keys >= 0))
+
+    @property
+    def span(self):
+        """(first, last) record time as Timestamps, or (None, None)."""
+        timestamps = self.timestamps
+        if not len(timestamps):
+            return None, None
+        first, last = key_timestamps([timestamps.min(), timestamps.max()])
+        return first, last
+
+    @property
+    def month_year(self):
+        """Month of the first record, e.g. "July 2025", or None."""
+        timestamps = self.timestamps
+        return key_timestamps(timestamps[:1])[0].strftime("%B %Y") if len(timestamps) else None
+
+    @property
+    def observations(self):
+        """ObservationBatch of the lines, decoded on first use and kept with the profile."""
+        if self._observations is None:
+            self._observations = ObservationBatch.from_lines(self.lines)
+        return self._observations
+
+    def within(self, start, days):
+        """Whether any record falls in [start, start + days] (start as an epoch-minute key)."""
+        timestamps = self.timestamps
+        return bool(np.any((timestamps >= start) & (timestamps <= start + days * MINUTES_PER_DAY)))
+
+    def __repr__(self):
+        first, last = self.span
+        return (
+            f"FileProfile({self.kind}, station={self.station}, records={self.record_count}, "
+            f"span={first} .. {last})"
+        )
+
+
+def _read_lines(data):
+    """Decode file bytes and split into lines as text-mode iteration would."""
+    text = data.decode("utf-8", errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+
+
+def _cleaned(raw_lines):
+    return [line.strip() for line in raw_lines if line.strip()]
+
+
+def _metar_station(lines):
+    for line in lines:
+        for pattern in METAR_STATION_RES:
+            match = pattern.search(line)
+            if match:
+                return match.group(1)
+    return None
+
+
+def _metar_keys(lines):
+    """
+    Record time per METAR line.
+
+    The OGIMET YYYYMMDDHHMM prefix gives the time; lines with only a DDHHMMZ group take
+    the year and month of the last prefixed line before them.
+    """
+    stamps = stamp_keys(lines)
+    stamped = stamps >= 0
+    if stamped.all():
+        return stamps
+    years, months = key_periods(np.where(stamped, stamps, 0))
+    year = pd.Series(np.where(stamped, years, np.nan)).ffill()
+    group = pd.Series(lines, dtype=object).str.extract(TIME_GROUP_RE)
+    frame = pd.DataFrame({
+        "YEAR": year,
+        "MONTH": pd.Series(np.where(stamped, months, np.nan)).ffill(),
+        "DAY": group[0],
+        "TIME": group[1] + group[2],
+    })
+    bare = np.where(year.notna().to_numpy(), frame_minute_keys(frame), -1)
+    return np.where(stamped, stamps, bare)
+
+
+def _warning_keys(lines, issue_date):
+    """Issue time per AD WRNG header line, in the month of the file's issue date."""
+    if not lines or issue_date is None:
+        return None
+    groups = pd.Series(lines, dtype=object).str.extract(WARNING_HEADER_RE)[0]
+    headers = groups.notna().to_numpy()
+    keys = np.full(len(lines), -1, dtype=np.int64)
+    keys[headers] = time_group_keys(
+        groups[headers].to_numpy(dtype=str), period=(int(issue_date[:4]), int(issue_date[4:6]))
+    )
+    return keys
+
+
+def _build_metar(digest, raw_lines):
+    lines = _cleaned(raw_lines)
+    return FileProfile("metar", digest, lines, station=_metar_station(lines), keys=_metar_keys(lines))
+
+
+def _build_warning(digest, raw_lines):
+    lines = _cleaned(raw_lines)
+    station = next((m.group(1) for m in map(WARNING_STATION_RE.search, lines) if m), None)
+    issue_date = next(
+        (m.group(1) for m in map(ISSUE_DATE_RE.search, raw_lines[:ISSUE_DATE_LINES]) if m), None
+    )
+    return FileProfile(
+        "warning", digest, lines, station=station, issue_date=issue_date,
+        keys=_warning_keys(lines, issue_date),
+    )
+
+
+def _profile(file_path, kind, build):
+    """Return the cached profile of `file_path`, reading the file only when it changed."""
+    stat = os.stat(file_path)
+    stat_key = (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        digest = _stat_digests.get(stat_key)
+        if digest is not None and (digest, kind) in _cache:
+            _cache.move_to_end((digest, kind))
+            return _cache[(digest, kind)]
+
+    with open(file_path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    with _lock:
+        _stat_digests[stat_key] = digest
+        profile = _cache.get((digest, kind))
+        if profile is not None:
+            _cache.move_to_end((digest, kind))
+            return profile
+
+    profile = build(digest, _read_lines(data))
+    with _lock:
+        _cache[(digest, kind)] = profile
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+        if len(_stat_digests) > 4 * CACHE_SIZE:
+            _stat_digests.clear()
+            _stat_digests[stat_key] = digest
+    return profile
+
+
+def profile_metar_file(file_path):
+    """
+    Profile a METAR file (one report per line, optionally with an OGIMET prefix).
+
+    Returns:
+        FileProfile: kind "metar"; `keys` holds the time of each report line.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    return _profile(file_path, "metar", _build_metar)
+
+
+def profile_warning_file(file_path):
+    """
+    Profile an aerodrome warning file.
+
+    Returns:
+        FileProfile: kind "warning" with the station, the YYYYMMDD issue date found in
+        the first lines, and the issue time of each AD WRNG header in `keys`.
+
+    Raises:
+        OSError: If the file cannot be read.
+    """
+    return _profile(file_path, "warning", _build_warning)
+
+
+def issue_date_key(issue_date):
+    """Epoch-minute key of 00:00Z on a YYYYMMDD date string; raises ValueError if invalid."""
+    key = parse_stamp(issue_date, with_time=False)
+    if key is None:
+        raise ValueError(f"Invalid issue date: {issue_date!r}")
+    return key
+
+
+def clear_cache():
+    """Drop all cached profiles."""
+    with _lock:
+        _cache.clear()
+        _stat_digests.clear()
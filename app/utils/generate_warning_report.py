@@ -1,156 +1,163 @@
+import numpy as np
 import pandas as pd
 import re
 import os
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.utils import get_column_letter
+from app.utils.log import get_logger
+from app.utils.metrics import instrumented, timed
+from app.utils.file_profile import profile_metar_file
+from app.utils.metar_events import build_metar_feature_arrays
+from app.utils.extract_metar_features import fcst_rows, validity_groups, warning_metar_arrays, warning_metar_rows
+from app.utils.warning_coverage import describe_missed, verify_warning_coverage
+
+logger = get_logger(__name__)
+
+# Largest difference (degrees, either way round the compass) between a warning's and a METAR's wind direction
+DIRECTION_TOLERANCE = 30
+
+TSRA_REGEX = re.compile(r'(TSRA|TS|FBL TSRA|MOD TSRA|HVY TSRA|MOD TS|FBL TS|HVY TS)', re.IGNORECASE)
+GUST_VALUE_RE = re.compile(r'\d{2,3}KT')
+FEATURE_ROW_RE = r'^Row (\d+):'
+FEATURE_VALUES_RE = r'Wind Dir: (\d+|None), Gust: (\d+|None), Clouds: \[(.*?)\]'
+CB_GROUP_RE = r"'([^']*CB[^']*)'"
+
+
+def _first_cb(clouds):
+    return next((group for group in clouds if 'CB' in group), '')
+
+
+def warning_metar_pairs(ad_warn_df, metar_file_path):
+    """(warning row, gust, wind dir, CB group) arrays for every METAR in every FCST window."""
+    profile = profile_metar_file(metar_file_path)
+    metars = warning_metar_arrays(profile)
+    fcst, _ = fcst_rows(ad_warn_df)
+    warning, metar = warning_metar_rows(
+        validity_groups(ad_warn_df['Validity from'].to_numpy()[fcst]),
+        validity_groups(ad_warn_df['Validity To'].to_numpy()[fcst]),
+        metars['times'],
+    )
+    cb_groups = np.array([_first_cb(clouds) for clouds in metars['clouds']] or [''], dtype=object)
+    return fcst[warning], metars['gust'][metar], metars['wind_dir'][metar], cb_groups[metar]
 
-def generate_warning_report(ad_warn_output_path, metar_features_path):
-    # Read warnings
-    ad_warn_df = pd.read_csv(ad_warn_output_path, dtype={'Issue date/time': str})
 
-    # Read extracted METAR features
+def _pairs_from_features_file(metar_features_path):
+    """The same arrays read back from a metar_extracted_features.txt file."""
     with open(metar_features_path, 'r') as f:
-        metar_blocks = f.read().split('\nRow ')[1:]  # Split by each row block
-        metar_blocks = ['Row ' + block for block in metar_blocks]
+        lines = pd.Series(f.read().split('\n'), dtype=object)
+    row = pd.to_numeric(lines.str.extract(FEATURE_ROW_RE)[0], errors='coerce').ffill()
+    values = lines.str.extract(FEATURE_VALUES_RE)
+    found = values[0].notna() & row.notna()
+    values, row = values[found], row[found]
+    cb = values[2].str.extract(CB_GROUP_RE)[0].fillna('')
+    return (
+        row.to_numpy(np.int64) - 1,
+        pd.to_numeric(values[1], errors='coerce').to_numpy(np.float64),
+        pd.to_numeric(values[0], errors='coerce').to_numpy(np.float64),
+        cb.to_numpy(object),
+    )
 
-    # Compile regex for TS/TSRA variants
-    TSRA_REGEX = re.compile(r'(TSRA|TS|FBL TSRA|MOD TSRA|HVY TSRA|MOD TS|FBL TS|HVY TS)', re.IGNORECASE)
 
-    results = []
+def _last_per_row(row, flags, count):
+    """Index of the last flagged pair of each warning row (-1 if none); pairs are grouped by row."""
+    last = np.full(count, -1, dtype=np.int64)
+    if not len(row):
+        return last
+    starts = np.flatnonzero(np.r_[True, row[1:] != row[:-1]])
+    last[row[starts]] = np.maximum.reduceat(np.where(flags, np.arange(len(row)), -1), starts)
+    return last
 
-    for idx, row in ad_warn_df.iterrows():
-        sl_no = idx + 1
-        sig_wx = str(row.get('Significant Wx', ''))
-        gust_val = str(row.get('Gust', ''))
-        wind_dir_fcst = row.get('Wind dir (deg)', None)
-        issue_time = str(row.get('Issue date/time', '')).zfill(6)
-        station = str(row.get('Station', ''))
-        validity_from = str(row.get('Validity from', ''))
-        validity_to = str(row.get('Validity To', ''))
-        true_false = 0
-        remark = ''
 
-        # Check for TS/TSRA and gust in warning
-        has_tsra = bool(TSRA_REGEX.search(sig_wx))
-        has_gust = bool(re.match(r'\d{2,3}KT', gust_val))
+def score_warning_windows(ad_warn_df, pairs, tolerance=DIRECTION_TOLERANCE):
+    """
+    Gust and CB findings of each warning over its METARs.
+
+    A gust warning is borne out by a METAR gust whose direction is within `tolerance`
+    degrees of the warning's (measured round the compass, so 350 and 010 are 20
+    apart); a thunderstorm warning by a CB cloud group.
 
-        # Find corresponding METAR block
-        metar_block = next((b for b in metar_blocks if f'Row {sl_no}:' in b), None)
-        metar_lines = metar_block.split('\n') if metar_block else []
-
-        # If the block says FCST/OBS is OBS, skipping extraction
-        if metar_block and 'FCST/OBS is OBS, skipping extraction.' in metar_block:
-            true_false = 1
-            remark = 'OBS'
-            
-            # Create separate entries for OBS rows too
-            if has_gust and has_tsra:
-                # Create TWO separate entries: one for gust, one for thunderstorm
-                results.append([sl_no, 'Gust warning', issue_time, true_false, remark, station, validity_from, validity_to])
-                results.append([sl_no, 'Thunderstorm warning', issue_time, true_false, remark, station, validity_from, validity_to])
-            elif has_gust:
-                results.append([sl_no, 'Gust warning', issue_time, true_false, remark, station, validity_from, validity_to])
-            elif has_tsra:
-                results.append([sl_no, 'Thunderstorm warning', issue_time, true_false, remark, station, validity_from, validity_to])
+    Args:
+        ad_warn_df (pd.DataFrame): The AD_warn_output.csv table.
+        pairs (tuple): (warning row, gust, wind dir, CB group) per METAR in a window,
+            grouped by warning row.
+        tolerance (int): Direction tolerance in degrees.
+
+    Returns:
+        dict: Per-row arrays "gust_hit", "gust", "dir" (the last matching METAR's), and
+        "cb_group" (the first CB group of the last METAR with one, '' if none).
+    """
+    row, gust, wind_dir, cb_group = pairs
+    count = len(ad_warn_df)
+    fcst_dir = pd.to_numeric(ad_warn_df['Wind dir (deg)'], errors='coerce').to_numpy(np.float64)
+    with np.errstate(invalid='ignore'):
+        difference = np.abs(wind_dir - fcst_dir[row]) % 360
+        difference = np.minimum(difference, 360 - difference)
+        gust_match = ~np.isnan(gust) & (difference <= tolerance)
+    last_gust = _last_per_row(row, gust_match, count)
+    last_cb = _last_per_row(row, cb_group != '', count)
+    return {
+        'gust_hit': last_gust >= 0,
+        'gust': np.where(last_gust >= 0, gust[last_gust], np.nan) if len(row) else np.full(count, np.nan),
+        'dir': np.where(last_gust >= 0, wind_dir[last_gust], np.nan) if len(row) else np.full(count, np.nan),
+        'cb_group': np.where(last_cb >= 0, cb_group[last_cb], '') if len(row) else np.full(count, '', dtype=object),
+    }
+
+
+def warning_report_frame(ad_warn_df, pairs):
+    """
+    The final report rows: one per gust and per thunderstorm warning, true-1 / false-0.
+
+    Args:
+        ad_warn_df (pd.DataFrame): The AD_warn_output.csv table.
+        pairs (tuple): See score_warning_windows.
+
+    Returns:
+        pd.DataFrame: The final_warning_report.csv table.
+    """
+    found = score_warning_windows(ad_warn_df, pairs)
+    _, fcst_obs = fcst_rows(ad_warn_df)
+
+    results = []
+    rows = zip(
+        ad_warn_df['Significant Wx'].astype(str).tolist(),
+        ad_warn_df['Gust'].astype(str).tolist(),
+        ad_warn_df['Issue date/time'].astype(str).str.zfill(6).tolist(),
+        ad_warn_df['Station'].astype(str).tolist(),
+        ad_warn_df['Validity from'].astype(str).tolist(),
+        ad_warn_df['Validity To'].astype(str).tolist(),
+        fcst_obs,
+        found['gust_hit'].tolist(),
+        found['gust'].tolist(),
+        found['dir'].tolist(),
+        found['cb_group'].tolist(),
+    )
+    for idx, (sig_wx, gust_val, issue_time, station, validity_from, validity_to, obs,
+              gust_hit, gust, direction, cb_cloud_group) in enumerate(rows):
+        sl_no = idx + 1
+        has_tsra = bool(TSRA_REGEX.search(sig_wx))
+        has_gust = bool(GUST_VALUE_RE.match(gust_val))
+        window = [station, validity_from, validity_to]
+
+        # Observed warnings are true by definition
+        if obs == 'OBS':
+            if has_gust:
+                results.append([sl_no, 'Gust warning', issue_time, 1, 'OBS'] + window)
+            if has_tsra:
+                results.append([sl_no, 'Thunderstorm warning', issue_time, 1, 'OBS'] + window)
             continue
 
-        found_gust = False
-        found_dir = False
-        found_cb = False
-        gust_reported = ''
-        dir_reported = ''
-        cb_reported = ''
-        tsra_reported = ''
-        cb_cloud_group = ''
-
-        for line in metar_lines:
-            # Gust
-            gust_match = re.search(r'Gust: (\d+)', line)
-            if gust_match:
-                metar_gust = int(gust_match.group(1))
-                # Wind Dir
-                dir_match = re.search(r'Wind Dir: (\d+)', line)
-                if dir_match and wind_dir_fcst:
-                    metar_dir = int(dir_match.group(1))
-                    try:
-                        fcst_dir = int(wind_dir_fcst)
-                        if abs(metar_dir - fcst_dir) <= 30:
-                            found_gust = True
-                            found_dir = True
-                            gust_reported = f'{metar_gust}KT'
-                            dir_reported = f'{metar_dir}'
-                    except Exception:
-                        pass
-            # CB cloud detection from Clouds list
-            clouds_match = re.search(r"Clouds: \[(.*?)\]", line)
-            if clouds_match:
-                clouds_list = [c.strip().strip("'") for c in clouds_match.group(1).split(',')]
-                cb_groups = [c for c in clouds_list if 'CB' in c]
-                if cb_groups:
-                    found_cb = True
-                    cb_reported = 'CB'
-                    cb_cloud_group = cb_groups[0]  # Take the first CB group found
-            # TSRA
-            if re.search(r'TSRA', line):
-                tsra_reported = 'TSRA'
-
-        # Create separate entries for gust and thunderstorm warnings
-        # This prevents double-counting in percentage calculations
-        
-        if has_gust and has_tsra:
-            # Create TWO separate entries: one for gust, one for thunderstorm
-            
-            # 1. Gust warning entry
-            gust_true_false = 0
-            gust_remark = ''
-            if found_gust and found_dir:
-                gust_true_false = 1
-                gust_remark = f'Gust {gust_reported} Dir {dir_reported} matched'
-                if cb_cloud_group:
-                    gust_remark += f' {cb_cloud_group} found'
-            else:
-                gust_remark = 'No gust/direction mismatch'
-            
-            results.append([sl_no, 'Gust warning', issue_time, gust_true_false, gust_remark, station, validity_from, validity_to])
-            
-            # 2. Thunderstorm warning entry
-            tsra_true_false = 0
-            tsra_remark = ''
-            if found_cb:
-                tsra_true_false = 1
-                tsra_remark = ''
-                if cb_cloud_group:
-                    tsra_remark += f' {cb_cloud_group} found'
-            else:
-                tsra_remark = 'Missing CB or direction mismatch'
-            
-            results.append([sl_no, 'Thunderstorm warning', issue_time, tsra_true_false, tsra_remark, station, validity_from, validity_to])
-            
-        elif has_gust and not has_tsra:
-            # Pure gust warning
-            if found_gust and found_dir:
-                true_false = 1
-                remark = f'Gust {gust_reported} Dir {dir_reported} matched'
+        # Separate entries for gust and thunderstorm, so neither is counted twice
+        if has_gust:
+            if gust_hit:
+                remark = f'Gust {int(gust)}KT Dir {int(direction)} matched'
                 if cb_cloud_group:
                     remark += f' {cb_cloud_group} found'
             else:
                 remark = 'No gust/direction mismatch'
-            
-            results.append([sl_no, 'Gust warning', issue_time, true_false, remark, station, validity_from, validity_to])
-            
-        elif has_tsra:
-            # Pure thunderstorm warning
-            if found_cb:
-                true_false = 1
-                remark = ''
-                if cb_cloud_group:
-                    remark += f' {cb_cloud_group} found'
-            else:
-                remark = 'Missing CB or direction mismatch'
-            
-            results.append([sl_no, 'Thunderstorm warning', issue_time, true_false, remark, station, validity_from, validity_to])
+            results.append([sl_no, 'Gust warning', issue_time, int(gust_hit), remark] + window)
+        if has_tsra:
+            remark = f' {cb_cloud_group} found' if cb_cloud_group else 'Missing CB or direction mismatch'
+            results.append([sl_no, 'Thunderstorm warning', issue_time, int(bool(cb_cloud_group)), remark] + window)
 
     # Output report
     final_df = pd.DataFrame(results, columns=[
@@ -170,11 +177,38 @@ def generate_warning_report(ad_warn_output_path, metar_features_path):
         lambda x: 'Thunderstorm' if 'thunderstorm' in x.lower() else 
                   'Wind' if 'wind' in x.lower() or 'gust' in x.lower() else 'Other'
     )
+    return final_df
+
+
+@instrumented("warning_scoring")
+def generate_warning_report(ad_warn_output_path, metar_features_path, metar_file_path=None):
+    """
+    Score each gust and thunderstorm warning against the METARs of its window.
+
+    The METARs are taken from `metar_file_path` (default: metar.txt next to the
+    warning output) with the same windows as extract_metar_features; without a METAR
+    file they are read back from the `metar_features_path` blocks.
+
+    Returns:
+        tuple: (final report DataFrame, overall accuracy in %). The report is also
+        saved as final_warning_report.csv next to the warning output.
+    """
+    # Read warnings
+    ad_warn_df = pd.read_csv(ad_warn_output_path, dtype={'Issue date/time': str})
+
+    if metar_file_path is None:
+        metar_file_path = os.path.join(os.path.dirname(ad_warn_output_path), 'metar.txt')
+    if os.path.exists(metar_file_path):
+        pairs = warning_metar_pairs(ad_warn_df, metar_file_path)
+    else:
+        pairs = _pairs_from_features_file(metar_features_path)
+    final_df = warning_report_frame(ad_warn_df, pairs)
     
     # Save to a file in the same directory as the input file
     output_path = os.path.join(os.path.dirname(ad_warn_output_path), 'final_warning_report.csv')
-    final_df.to_csv(output_path, index=False)
-    print('Report saved as final_warning_report.csv')
+    with timed("csv_write"):
+        final_df.to_csv(output_path, index=False)
+    logger.info('Report saved as %s', output_path)
 
     # Calculate percentage correct
     total = len(final_df)
@@ -190,17 +224,17 @@ def generate_warning_report(ad_warn_output_path, metar_features_path):
 
         if total > 0:
             percent = (correct / total) * 100
-            print(f'Aerodrome Warning : {percent:.0f} % accurate')
+            logger.info('Aerodrome Warning : %.0f %% accurate', percent)
         if total_gust > 0:
             percent_gust = (gust / total_gust) * 100
-            print(f'Gust warning : {percent_gust:.0f} % accurate')
+            logger.info('Gust warning : %.0f %% accurate', percent_gust)
         if total_tsra > 0:
             percent_tsra = (tsra / total_tsra) * 100
-            print(f'Thunderstorm warning : {percent_tsra:.0f} % accurate')
+            logger.info('Thunderstorm warning : %.0f %% accurate', percent_tsra)
         else:
-            print('No warnings to evaluate.')
+            logger.debug('No warnings to evaluate.')
     except Exception as e:
-        print('Could not calculate accuracy:', e)
+        logger.warning('Could not calculate accuracy: %s', e)
 
     # Return the overall accuracy for the API
     accuracy = (correct / total) * 100 if total > 0 else 0
@@ -232,9 +266,6 @@ def generate_excel_warning_report(ad_warn_output_path, metar_features_path):
         metar_blocks = f.read().split('\nRow ')[1:]  # Split by each row block
         metar_blocks = ['Row ' + block for block in metar_blocks]
 
-    # Compile regex for TS/TSRA variants
-    TSRA_REGEX = re.compile(r'(TSRA|TS|FBL TSRA|MOD TSRA|HVY TSRA|MOD TS|FBL TS|HVY TS)', re.IGNORECASE)
-
     # Predefined warning types
     warning_types = [
         "Tropical cyclone",
@@ -393,58 +424,22 @@ def generate_excel_warning_report(ad_warn_output_path, metar_features_path):
     # Save the Excel file
     output_path = os.path.join(os.path.dirname(ad_warn_output_path), 'aerodrome_warning_report.xlsx')
     wb.save(output_path)
-    print(f'Excel report saved as {output_path}')
+    logger.info('Excel report saved as %s', output_path)
     
     return output_path 
 
-def generate_aerodrome_warnings_table(ad_warn_output_path, metar_features_path):
-    """
-    Generate Excel file that matches exactly the frontend table format
+def aerodrome_warnings_rows(final_df, missed_thunderstorm="-", missed_gust="-"):
     """
-    from openpyxl import Workbook
-    from openpyxl.styles import Alignment, Font, Border, Side
-    from openpyxl.utils import get_column_letter
-    
-    # Read the final warning report to get accurate data
-    final_report_path = os.path.join(os.path.dirname(ad_warn_output_path), 'final_warning_report.csv')
-    
-    if not os.path.exists(final_report_path):
-        # If final report doesn't exist, generate it first
-        generate_warning_report(ad_warn_output_path, metar_features_path)
-    
-    # Read the final warning report
-    with open(final_report_path, 'r', encoding='utf-8') as f:
-        heading = f.readline().strip()
-    final_df = pd.read_csv(final_report_path, skiprows=1)
+    Rows of the aerodrome warnings table for a final warning report.
 
-    # Create workbook and sheet
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Aerodrome Warnings"
+    Args:
+        final_df (pd.DataFrame): The final_warning_report.csv table.
+        missed_thunderstorm, missed_gust (str): Text of the unwarned events (see
+            describe_missed).
 
-    # Add merged, bold heading at the top
-    num_columns = 5  # Number of columns in the table
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=num_columns)
-    heading_cell = ws.cell(row=1, column=1, value=heading)
-    heading_cell.font = Font(bold=True, size=14)
-    heading_cell.alignment = Alignment(horizontal="center", vertical="center")
-
-    # Define headers exactly as in frontend
-    headers = [
-        "क्र. सं. / Sr.No.",
-        "तत्त्व / Elements", 
-        "विमान क्षेत्र चेतावनियों की सं. / Warning no 1 Warning no 2................ Warning no. (Issue date/Issue Time UTC)",
-        "रेंज के अंतगर्द आने वाले (पारस) मामलों की प्रतिशतता अथवा सही होने की प्रतिशतता / % of cases within range or occurrence (% correct)",
-        "वास्तविक मौसम समयावधि के साथ जिसके लिये चेतावनी जारी नहीं की गयी थी / Actual weather with duration for which no warning was issued"
-    ]
-
-    # Add headers to sheet (now row 2)
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=2, column=col, value=header)
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(wrap_text=True, vertical="top", horizontal="center")
-
-    # Data rows start from row 3
+    Returns:
+        list: One list of five cells per table row.
+    """
     # Extract thunderstorm and gust data from the final report
     thunderstorm_times = []
     gust_times = []
@@ -493,7 +488,7 @@ def generate_aerodrome_warnings_table(ad_warn_output_path, metar_features_path):
     # Add data rows exactly as in frontend
     data = [
         ["1.", "उष्णकटिबंधीय चक्रवात / Tropical cyclone", "-", "-", "-"],
-        ["2.", "गर्जन सुनामी / Thunderstorms", thunderstorm_times_str, thunderstorm_percentage, "-"],
+        ["2.", "गर्जन सुनामी / Thunderstorms", thunderstorm_times_str, thunderstorm_percentage, missed_thunderstorm],
         ["3.", "ओला / Hail", "-", "-", "-"],
         ["4.", "बर्फ / Snow", "-", "-", "-"],
         ["5.", "हिमवर्षा / Freezing precipitation", "-", "-", "-"],
@@ -501,7 +496,7 @@ def generate_aerodrome_warnings_table(ad_warn_output_path, metar_features_path):
         ["7.", "धूल भरी आँधी / Dust storm", "-", "-", "-"],
         ["8.", "रेतीली आँधी / Sandstorm", "-", "-", "-"],
         ["9.", "उठती रेत या धूल / Rising sand or dust", "-", "-", "-"],
-        ["10.", "प्रबल सतही पवन तथा झोंके / Strong surface wind and gusts\nगति / Speed", gust_times_str, gust_percentage, "-"],
+        ["10.", "प्रबल सतही पवन तथा झोंके / Strong surface wind and gusts\nगति / Speed", gust_times_str, gust_percentage, missed_gust],
         ["", "दिशा परिवर्तन / Direction change", "-", "-", "-"],
         ["11.", "बवंडर / Squall\nदिशा / Direction\nगति / Speed", "-", "-", "-"],
         ["12.", "पाला / Frost", "-", "-", "-"],
@@ -509,6 +504,33 @@ def generate_aerodrome_warnings_table(ad_warn_output_path, metar_features_path):
         ["14.", "सुनामी / Tsunami", "-", "-", "-"],
     ]
 
+    return data
+
+
+def write_aerodrome_warnings_sheet(ws, heading, data):
+    """Lay out the aerodrome warnings table (heading, headers and `data` rows) on a worksheet."""
+    # Add merged, bold heading at the top
+    num_columns = 5  # Number of columns in the table
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=num_columns)
+    heading_cell = ws.cell(row=1, column=1, value=heading)
+    heading_cell.font = Font(bold=True, size=14)
+    heading_cell.alignment = Alignment(horizontal="center", vertical="center")
+
+    # Define headers exactly as in frontend
+    headers = [
+        "क्र. सं. / Sr.No.",
+        "तत्त्व / Elements", 
+        "विमान क्षेत्र चेतावनियों की सं. / Warning no 1 Warning no 2................ Warning no. (Issue date/Issue Time UTC)",
+        "रेंज के अंतगर्द आने वाले (पारस) मामलों की प्रतिशतता अथवा सही होने की प्रतिशतता / % of cases within range or occurrence (% correct)",
+        "वास्तविक मौसम समयावधि के साथ जिसके लिये चेतावनी जारी नहीं की गयी थी / Actual weather with duration for which no warning was issued"
+    ]
+
+    # Add headers to sheet (now row 2)
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=2, column=col, value=header)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(wrap_text=True, vertical="top", horizontal="center")
+
     # Add data rows
     for row_idx, row_data in enumerate(data, 3):
         for col_idx, value in enumerate(row_data, 1):
@@ -522,9 +544,48 @@ def generate_aerodrome_warnings_table(ad_warn_output_path, metar_features_path):
     ws.column_dimensions['D'].width = 20
     ws.column_dimensions['E'].width = 40
 
+
+@instrumented("xlsx_write")
+def generate_aerodrome_warnings_table(ad_warn_output_path, metar_features_path, metar_file_path=None):
+    """
+    Generate Excel file that matches exactly the frontend table format
+
+    The last column lists the METAR gust and thunderstorm episodes no warning was
+    valid for, read from `metar_file_path` (default: metar.txt next to the warning
+    output); it stays "-" when there is no METAR file.
+    """
+    # Read the final warning report to get accurate data
+    final_report_path = os.path.join(os.path.dirname(ad_warn_output_path), 'final_warning_report.csv')
+    
+    if not os.path.exists(final_report_path):
+        # If final report doesn't exist, generate it first
+        generate_warning_report(ad_warn_output_path, metar_features_path)
+    
+    # Read the final warning report
+    with open(final_report_path, 'r', encoding='utf-8') as f:
+        heading = f.readline().strip()
+    final_df = pd.read_csv(final_report_path, skiprows=1)
+
+    # Observed episodes for which no warning was issued
+    missed_thunderstorm, missed_gust = "-", "-"
+    if metar_file_path is None:
+        metar_file_path = os.path.join(os.path.dirname(ad_warn_output_path), 'metar.txt')
+    if os.path.exists(metar_file_path):
+        warnings_df = pd.read_csv(ad_warn_output_path, dtype=str)
+        features = build_metar_feature_arrays(profile_metar_file(metar_file_path))
+        coverage = verify_warning_coverage(warnings_df, features)
+        missed_thunderstorm = describe_missed(coverage["thunderstorm"]["missed"])
+        missed_gust = describe_missed(coverage["gust"]["missed"])
+
+    # Create workbook and sheet
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Aerodrome Warnings"
+    write_aerodrome_warnings_sheet(ws, heading, aerodrome_warnings_rows(final_df, missed_thunderstorm, missed_gust))
+
     # Save Excel file
     output_path = os.path.join(os.path.dirname(ad_warn_output_path), 'Aerodrome_Warnings_Table.xlsx')
     wb.save(output_path)
-    print(f'Aerodrome warnings table saved as {output_path}')
+    logger.info('Aerodrome warnings table saved as %s', output_path)
     
     return output_path 
\ No newline at end of file
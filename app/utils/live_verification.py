@@ -0,0 +1,332 @@
+"""
+Incremental (live) verification of a TAKEOFF forecast against METARs as they arrive.
+
+The batch pipeline in `metar.py` fetches, decodes and compares a whole date range in
+one go. A LiveVerifier keeps the parsed forecast table in memory, ingests only reports
+newer than the last one it has seen and updates the per-element hit counters in O(1)
+per report, so the running score for the day can be polled cheaply.
+
+Reports are paired with forecast times as in the batch comparison (match_observations):
+each forecast time takes the nearest METAR within `time_tolerance` minutes. A later
+report can be nearer to a forecast time than the one scored so far; the slot is then
+re-scored, so once all reports are in the live score equals the batch score.
+"""
+
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+
+import metar.Metar as mt
+import numpy as np
+import pandas as pd
+
+from app.utils.metar import circular_difference
+from app.utils.observations import observation_from_report
+from app.utils.ogimet import OgimetAPI
+from app.utils.timekeys import (
+    STAMP_FORMAT,
+    TIME_GROUP_RE,
+    asof_match,
+    current_period,
+    first_occurrences,
+    frame_minute_keys,
+    key_fields,
+    key_timestamps,
+    parse_stamp,
+    stamp_keys,
+    time_group_keys,
+)
+
+ELEMENTS = ["Wind Direction", "Wind Speed", "Temperature", "QNH", "Overall"]
+
+# "202507010030 METAR VABB 010030Z ..." (OGIMET text export) or a bare "METAR VABB 010030Z ..."
+TIMESTAMPED_LINE_RE = re.compile(r"^(\d{12})\s+(.*)$")
+
+
+def _is_missing(value):
+    if isinstance(value, str):
+        return value in ("N/A", "VRB")
+    return value is None or pd.isna(value)
+
+
+class LiveVerifier:
+    """
+    Running verification state for one station.
+
+    Args:
+        forecast_df (pd.DataFrame): Output of `extract_data_from_file_with_day_and_wind`.
+        icao (str): ICAO code of the station being verified.
+        wind_dir_threshold (int): Threshold for wind direction accuracy in degrees.
+        wind_speed_threshold (int): Threshold for wind speed accuracy in knots.
+        temp_threshold (int): Threshold for temperature accuracy in °C.
+        qnh_threshold (int): Threshold for QNH accuracy in hPa.
+        time_tolerance (int): Largest METAR/forecast time difference in minutes.
+    """
+
+    def __init__(
+        self,
+        forecast_df,
+        icao,
+        wind_dir_threshold=30,
+        wind_speed_threshold=5,
+        temp_threshold=1,
+        qnh_threshold=1,
+        time_tolerance=10,
+    ):
+        self.icao = icao
+        self.time_tolerance = time_tolerance
+        self.thresholds = {
+            "wind_dir": wind_dir_threshold,
+            "wind_speed": wind_speed_threshold,
+            "temp": temp_threshold,
+            "qnh": qnh_threshold,
+        }
+
+        qnh_col = "QNH" if "QNH" in forecast_df.columns else "QFE"
+        # Forecast files named without a date carry no MONTH/YEAR; assume the current month
+        current_year, current_month = current_period()
+        self.month = self._first_int(forecast_df, "MONTH", current_month)
+        self.year = self._first_int(forecast_df, "YEAR", current_year)
+
+        # Sorted forecast time keys and their (dir, speed, temp, qnh); first occurrence
+        # wins, as in the batch merge
+        keys, rows = first_occurrences(frame_minute_keys(forecast_df, (self.year, self.month)))
+        self.forecast_keys = keys
+        self.forecast = [
+            (wind_dir, wind_speed, temp, qnh)
+            for wind_dir, wind_speed, temp, qnh in zip(
+                forecast_df["WIND_DIR"].to_numpy()[rows], forecast_df["WIND_SPEED"].to_numpy()[rows],
+                forecast_df["TEMP"].to_numpy()[rows], forecast_df[qnh_col].to_numpy()[rows],
+            )
+        ]
+        self._forecast_days = key_fields(keys)[2].tolist() if len(keys) else []
+
+        self.last_seen = None
+        self.received = 0
+        self.matched = 0
+        self.decode_errors = 0
+        self.hits = {element: 0 for element in ELEMENTS}
+        self.daily = {}
+        # Decoded reports by time key, in arrival (= time) order
+        self._observation_keys = []
+        self._observations = {}
+        # Forecast position -> (report key, flags) currently counted for it
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _first_int(frame, column, default):
+        if column not in frame.columns or not len(frame) or not pd.notna(frame[column].iloc[0]):
+            return default
+        return int(frame[column].iloc[0])
+
+    def _score(self, obs, forecast_row):
+        """Return per-element accuracy flags for one Observation, mirroring compare_weather_data."""
+        forecast_dir, forecast_speed, forecast_temp, forecast_qnh = forecast_row
+
+        actual_dir = obs.wind_dir
+        if _is_missing(actual_dir) or _is_missing(forecast_dir):
+            dir_ok = True
+        else:
+            diff = circular_difference(int(forecast_dir), int(actual_dir))
+            dir_ok = diff is not None and diff <= self.thresholds["wind_dir"]
+
+        actual_speed = obs.wind_speed
+        speed_ok = (
+            not _is_missing(actual_speed) and not _is_missing(forecast_speed)
+            and abs(int(forecast_speed) - int(actual_speed)) <= self.thresholds["wind_speed"]
+        )
+
+        actual_temp = obs.temp
+        temp_ok = (
+            not _is_missing(actual_temp) and not _is_missing(forecast_temp)
+            and abs(float(forecast_temp) - float(actual_temp)) <= self.thresholds["temp"]
+        )
+
+        actual_qnh = obs.qnh
+        qnh_ok = (
+            not _is_missing(actual_qnh) and not _is_missing(forecast_qnh)
+            and abs(float(forecast_qnh) - float(actual_qnh)) <= self.thresholds["qnh"]
+        )
+
+        overall = dir_ok and speed_ok and temp_ok and qnh_ok
+        return [dir_ok, speed_ok, temp_ok, qnh_ok, overall]
+
+    def _count(self, position, flags, sign):
+        """Add (sign=1) or remove (sign=-1) one scored forecast time from the counters."""
+        day_counts = self.daily.setdefault(self._forecast_days[position], [0] * (len(ELEMENTS) + 1))
+        day_counts[0] += sign
+        for i, (element, ok) in enumerate(zip(ELEMENTS, flags), start=1):
+            if ok:
+                self.hits[element] += sign
+                day_counts[i] += sign
+        self.matched += sign
+
+    def _rematch(self, new_keys):
+        """
+        Re-pair the forecast times near `new_keys` with their nearest reports.
+
+        Returns:
+            int: Number of the new reports now counted for a forecast time.
+        """
+        tolerance = self.time_tolerance
+        first = np.searchsorted(self.forecast_keys, new_keys[0] - tolerance, side="left")
+        last = np.searchsorted(self.forecast_keys, new_keys[-1] + tolerance, side="right")
+        if first >= last:
+            return 0
+        slot_keys = self.forecast_keys[first:last]
+        observed = np.asarray(self._observation_keys, dtype=np.int64)
+        low = np.searchsorted(observed, slot_keys[0] - tolerance, side="left")
+        high = np.searchsorted(observed, slot_keys[-1] + tolerance, side="right")
+        slots, reports = asof_match(slot_keys, observed[low:high], tolerance)
+
+        used = set()
+        for slot, report in zip((slots + first).tolist(), observed[low:high][reports].tolist()):
+            current = self._slots.get(slot)
+            if current is not None and current[0] == report:
+                continue
+            if current is not None:
+                self._count(slot, current[1], -1)
+            flags = self._score(self._observations[report], self.forecast[slot])
+            self._slots[slot] = (report, flags)
+            self._count(slot, flags, 1)
+            used.add(report)
+        return len(used & set(new_keys.tolist()))
+
+    def ingest(self, reports):
+        """
+        Score reports newer than the last one seen.
+
+        Args:
+            reports (iterable): (observation datetime, raw METAR text) pairs.
+
+        Returns:
+            int: Number of reports that were scored against a forecast hour.
+        """
+        with self._lock:
+            new_keys = []
+            for obs_time, metar_code in sorted(reports, key=lambda item: item[0]):
+                if self.last_seen is not None and obs_time <= self.last_seen:
+                    continue
+                self.last_seen = obs_time
+                self.received += 1
+
+                metar_code = metar_code.strip().rstrip("=").replace("NOSIG", "")
+                if not metar_code.startswith("METAR"):
+                    metar_code = "METAR " + metar_code
+                try:
+                    obs = observation_from_report(mt.Metar(metar_code, month=obs_time.month, year=obs_time.year))
+                except Exception:
+                    self.decode_errors += 1
+                    continue
+
+                key = parse_stamp(obs_time.strftime(STAMP_FORMAT))
+                self._observation_keys.append(key)
+                self._observations[key] = obs
+                new_keys.append(key)
+            if not new_keys or not len(self.forecast_keys):
+                return 0
+            return self._rematch(np.asarray(new_keys, dtype=np.int64))
+
+    def ingest_text(self, text):
+        """
+        Score METARs from an uploaded text block.
+
+        Lines may carry the OGIMET 12-digit YYYYMMDDHHMM prefix; bare METAR lines are dated
+        from their DDHHMMZ group using the forecast month and year.
+        """
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        stamped = [TIMESTAMPED_LINE_RE.match(line) for line in lines]
+        groups = [TIME_GROUP_RE.search(line) for line in lines]
+        keys = stamp_keys([match.group(1) if match else "" for match in stamped])
+        if self.month and self.year:
+            bare = time_group_keys(
+                ["".join(group.groups()) if group else "" for group in groups],
+                period=(self.year, self.month), roll=False,
+            )
+            keys = np.where([match is None for match in stamped], bare, keys)
+        times = key_timestamps(np.maximum(keys, 0)).to_pydatetime()
+
+        reports = []
+        for line, match, key, obs_time in zip(lines, stamped, keys.tolist(), times):
+            if key >= 0:
+                reports.append((obs_time, match.group(2) if match else line))
+        return self.ingest(reports)
+
+    def poll(self, now=None, api=None):
+        """
+        Fetch only the METARs issued since the last one seen from OGIMET and score them.
+
+        Args:
+            now (datetime): Upper bound of the request (default: current UTC time). Aware
+                times are converted to UTC; naive ones are taken as UTC, like the report times.
+            api (OgimetAPI): Client to use (default: a new OgimetAPI).
+        """
+        now = now or datetime.now(timezone.utc)
+        if now.tzinfo is not None:
+            now = now.astimezone(timezone.utc).replace(tzinfo=None)
+        if self.last_seen is not None:
+            begin = self.last_seen + timedelta(minutes=1)
+        elif self.month and self.year:
+            begin = datetime(self.year, self.month, 1)
+        else:
+            begin = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        if begin > now:
+            return 0
+
+        rows = (api or OgimetAPI()).get_metar(begin=begin, end=now, icao=self.icao)
+        reports = []
+        for row in rows:
+            try:
+                obs_time = datetime(
+                    int(row["YEAR"]), int(row["MONTH"]), int(row["DAY"]),
+                    int(row["HOUR"]), int(row["MIN"]),
+                )
+            except (KeyError, ValueError):
+                continue
+            reports.append((obs_time, row.get("PARTE", "")))
+        return self.ingest(reports)
+
+    def snapshot(self):
+        """Return the running verification state as a JSON-serialisable dict."""
+        def pct(hits, total):
+            return round(100 * hits / total, 1) if total else None
+
+        with self._lock:
+            daily = [
+                {
+                    "DAY": f"{day:02d}",
+                    "count": counts[0],
+                    **{element: pct(counts[i], counts[0]) for i, element in enumerate(ELEMENTS, start=1)},
+                }
+                for day, counts in sorted(self.daily.items())
+            ]
+            return {
+                "icao": self.icao,
+                "last_seen": self.last_seen.strftime("%Y%m%d%H%M") if self.last_seen else None,
+                "received": self.received,
+                "matched": self.matched,
+                "decode_errors": self.decode_errors,
+                "hits": dict(self.hits),
+                "accuracy": {element: pct(self.hits[element], self.matched) for element in ELEMENTS},
+                "daily": daily,
+            }
+
+
+# Active verifiers, one per station
+_verifiers = {}
+_verifiers_lock = threading.Lock()
+
+
+def start_live_verification(icao, forecast_df, **thresholds):
+    """Create (or replace) the live verifier for a station."""
+    verifier = LiveVerifier(forecast_df, icao, **thresholds)
+    with _verifiers_lock:
+        _verifiers[icao] = verifier
+    return verifier
+
+
+def get_live_verifier(icao):
+    """Return the live verifier for a station, or None if none was started."""
+    with _verifiers_lock:
+        return _verifiers.get(icao)
@@ -0,0 +1,104 @@
+"""
+Leveled, rate-limited logging for the verification pipeline.
+
+Modules get a logger with `get_logger(__name__)`. Per-row debug messages use lazy %-style
+arguments, so they cost only a level check at INFO. Repeated messages from the same call
+site are rate limited. Per-row data problems are tallied with a `Tally` and reported as one
+summary line per kind (e.g. "312 rows missing QNH") when the loop finishes.
+
+The level comes from the LOG_LEVEL environment variable (default INFO).
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let at most `burst` records per call site through every `period` seconds.
+
+    Records are keyed on logger name, level and the unformatted message template, so
+    "Missing data for %s" counts as one message whatever its arguments. The number of
+    suppressed records is appended to the next record let through.
+    """
+
+    def __init__(self, burst=10, period=60.0):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window_start, passed, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - window_start >= self.period:
+                window_start, passed = now, 0
+            if passed >= self.burst:
+                self._windows[key] = (window_start, passed, suppressed + 1)
+                return False
+            self._windows[key] = (window_start, passed + 1, 0)
+        if suppressed:
+            record.msg = f"{record.msg} [{suppressed} similar messages suppressed]"
+        return True
+
+
+_configured = False
+
+
+def configure_logging(level=None):
+    """Attach a rate-limited stream handler to the `app` logger (idempotent)."""
+    global _configured
+    logger = logging.getLogger("app")
+    logger.setLevel((level or os.environ.get("LOG_LEVEL", "INFO")).upper())
+    if _configured:
+        return logger
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handler.addFilter(RateLimitFilter())
+    logger.addHandler(handler)
+    logger.propagate = False
+    _configured = True
+    return logger
+
+
+def get_logger(name):
+    """Return a logger under the `app` hierarchy, configuring it on first use."""
+    configure_logging()
+    return logging.getLogger(name if name.startswith("app") else f"app.{name}")
+
+
+class Tally:
+    """
+    Aggregate per-row problems into one log line per kind.
+
+    Example:
+        missing = Tally(logger, "rows missing")
+        for row in rows:
+            if row.qnh is None:
+                missing.add("QNH")
+        missing.flush()   # -> "312 rows missing QNH"
+    """
+
+    def __init__(self, logger, description, level=logging.WARNING):
+        self.logger = logger
+        self.description = description
+        self.level = level
+        self.counts = Counter()
+
+    def add(self, kind, count=1):
+        if count:
+            self.counts[kind] += count
+
+    def flush(self):
+        for kind, count in self.counts.most_common():
+            # one template per kind, so different kinds are rate limited independently
+            self.logger.log(self.level, f"%d {self.description} {kind}", count)
+        self.counts.clear()
@@ -1,7 +1,25 @@
 import metar.Metar as mt
+import itertools
+import numpy as np
 import pandas as pd
 import re
 from datetime import datetime
+from app.utils.metrics import instrumented, timed, count_rows
+from app.utils.log import get_logger, Tally
+from app.utils.observations import ObservationBatch, observation_from_report
+from app.utils.parse_cache import cached_parse
+from app.utils.wind import extract_wind_groups, parse_wind_group
+from app.utils.timekeys import (
+    STAMP_FORMAT,
+    asof_match,
+    first_occurrences,
+    frame_minute_keys,
+    frame_period,
+    key_timestamps,
+    stamp_datetime,
+)
+
+logger = get_logger(__name__)
 
 def clean_metar_inplace(file_path):
     """
@@ -17,117 +35,109 @@ def clean_metar_inplace(file_path):
         for line in lines:
             outfile.write(line.rstrip("=\n") + "\n")
 
-    print("METAR data cleaned in place.")
+    logger.debug("METAR data cleaned in place: %s", file_path)
 
 
-def decode_metar_to_csv(input_file, output_file):
-    try:
-        with open(input_file, "r") as file:
-            metar_text = file.read().strip()
+def decode_metar_observations(input_file, month=9, year=None):
+    """
+    Decode a file of METAR reports (one report per line, each starting with "METAR")
+    into an ObservationBatch.
 
-        metar_reports = re.split(r"\nMETAR ", metar_text)
-        data_list = []
+    Args:
+        input_file (str): Path to the METAR text file.
+        month (int): Month of the reports; METARs only carry the day.
+        year (int): Year of the reports (default: current year).
 
-        for metar_code in metar_reports:
-            metar_code = metar_code.strip()
-            if not metar_code:
-                continue
+    Returns:
+        ObservationBatch: One observation per report that could be decoded.
+    """
+    with open(input_file, "r") as file:
+        metar_text = file.read().strip()
 
-            if not metar_code.startswith("METAR"):
-                metar_code = "METAR " + metar_code
+    metar_reports = re.split(r"\nMETAR ", metar_text)
+    records = []
 
-            nosig_present = "NOSIG" in metar_code
-            metar_code = metar_code.replace("NOSIG", "")
+    for metar_code in metar_reports:
+        metar_code = metar_code.strip()
+        if not metar_code:
+            continue
 
-            try:
-                report = mt.Metar(metar_code, month=9)
-                # Adjust the observation date safely
-                # corrected_time = adjust_metar_date(report.time.day)
-                # print("corrected_time = ", corrected_time)
-
-                data = {
-                    # "Station": getattr(report, "station", "Mumbai/Chhatrapati Shivaji Intl"),
-                    # "Location": getattr(report, "name", "India 19.07N 072.51E"),
-                    "DAY": report.time.strftime("%d"),
-                    "TIME": f"{report.time.hour:02}{report.time.minute:02}Z",
-                    # "Wind Speed (m/s)": report.wind_speed.value("MPS") if report.wind_speed else "N/A",
-                    "WIND_DIR": report.wind_dir.value() if report.wind_dir else "N/A",
-                    "WIND_SPEED": (
-                        report.wind_speed.value("KT") if report.wind_speed else "N/A"
-                    ),
-                    # "Visibility (m)": report.vis.value() if report.vis else "N/A",
-                    # "Present Weather": report.present_weather() if report.present_weather() else "None",
-                    # "Clouds": report.sky_conditions() if report.sky_conditions() else "No Significant Cloud",
-                    "TEMP": report.temp.value("C") if report.temp else "N/A",
-                    # "Dew-Point Temperature (°C)": report.dewpt.value("C") if report.dewpt else "N/A",
-                    "QNH": report.press.value("hPa") if report.press else "N/A",
-                    # "Significant Change": "No significant change" if nosig_present else metar_code.split()[-1],
-                }
-
-                data_list.append(data)
-
-            except Exception as e:
-                pass
-                # print(f"Error decoding METAR: {e}\nProblematic METAR: {metar_code}")
-
-        df = pd.DataFrame(data_list)
-        df.to_csv(output_file, index=False)
-        # print(df)
-        print(f"Decoded METAR data saved to {output_file}")
-        return df
-    except Exception as e:
-        print(f"Error processing METAR file: {e}")
+        if not metar_code.startswith("METAR"):
+            metar_code = "METAR " + metar_code
 
+        metar_code = metar_code.replace("NOSIG", "")
 
-def extract_wind_data(wind_str):
-    """
-    Extracts wind direction and speed from a wind string, handling various formats.
-    """
-    # Format with slash and KT (e.g., "310/05KT")
-    match = re.match(r"(\d{3})/(\d{2})KT", wind_str)
-    if match:
-        return int(match.group(1)), int(match.group(2))
+        try:
+            report = mt.Metar(metar_code, month=month, year=year)
+        except Exception:
+            continue
+        records.append(observation_from_report(report))
 
-    # Format with digits and KT (e.g., "35005KT")
-    match = re.match(r"(\d{3})(\d{2})KT", wind_str)
-    if match:
-        return int(match.group(1)), int(match.group(2))
+    return ObservationBatch.from_records(records)
 
-    # Format with gust and KT (e.g., "28007G17KT")
-    match = re.match(r"(\d{3})\d{2}G(\d{2})KT", wind_str)
-    if match:
-        return int(match.group(1)), int(match.group(2))
 
-    # Variable wind with KT (e.g., "VRB02KT")
-    match_vrb_kt = re.match(r"(VRB)(\d{2})KT", wind_str)
-    if match_vrb_kt:
-        return "N/A", int(match_vrb_kt.group(2))
+def metar_frame(observations):
+    """
+    Build the decoded METAR DataFrame from an ObservationBatch.
 
-    # Variable wind without KT, but with speed (e.g., "VRB05")
-    match_vrb_no_kt = re.match(r"(VRB)(\d{2})", wind_str)
-    if match_vrb_no_kt:
-        return "N/A", int(match_vrb_no_kt.group(2))
+    Columns: DAY (Int8), TIME ("HHMMZ"), WIND_DIR (Int16, <NA> for VRB or missing),
+    WIND_VRB (bool), WIND_SPEED (Int16, KT), TEMP (Float32, °C) and QNH (Float32, hPa).
+    """
+    return pd.DataFrame({
+        "DAY": observations.column("day", "Int8"),
+        "TIME": [f"{hour:02}{minute:02}Z" for hour, minute in zip(observations.hour.tolist(), observations.minute.tolist())],
+        "WIND_DIR": observations.column("wind_dir"),
+        "WIND_VRB": observations.vrb,
+        "WIND_SPEED": observations.column("wind_speed"),
+        "TEMP": observations.column("temp"),
+        "QNH": observations.column("qnh"),
+    })
+
+
+@instrumented("metar_decode")
+def decode_metar_to_csv(input_file, output_file, month=9, year=None, digest=None):
+    """
+    Decode a METAR file and save the result as CSV.
 
-    # Variable wind with slash and KT (e.g., "VRB/02KT") - might exist in some formats
-    match_vrb_slash_kt = re.match(r"(VRB)/(\d{2})KT", wind_str)
-    if match_vrb_slash_kt:
-        return "N/A", int(match_vrb_slash_kt.group(2))
+    Args:
+        input_file (str): Path to the METAR text file.
+        output_file (str): Path of the CSV to write.
+        month (int): Month of the reports.
+        year (int): Year of the reports (default: current year).
+        digest (str): SHA-1 of the file content (see app.utils.parse_cache). When given,
+            reports decoded before from the same content and period are reused.
 
-    # Variable wind with slash and no KT (e.g., "VRB/02") - might exist
-    match_vrb_slash_no_kt = re.match(r"(VRB)/(\d{2})", wind_str)
-    if match_vrb_slash_no_kt:
-        return "N/A", int(match_vrb_slash_no_kt.group(2))
+    Returns:
+        pd.DataFrame: The decoded reports, or None if the file could not be processed.
+    """
+    try:
+        df = cached_parse(
+            "metar", digest,
+            lambda: metar_frame(decode_metar_observations(input_file, month=month, year=year)),
+            month=month, year=year or datetime.now().year,
+        )
+        count_rows("metar_decode", len(df))
+        with timed("csv_write"):
+            df.to_csv(output_file, index=False)
+        logger.info("Decoded METAR data saved to %s", output_file)
+        return df
+    except Exception as e:
+        logger.error("Error processing METAR file: %s", e)
 
-    # Handle just "VRB" with no speed information
-    if "VRB" == wind_str:
-        return "N/A", None
 
-    # New format with slash and no KT (e.g., "320/07") - Keep this for numeric directions
-    match_numeric_slash = re.match(r"(\d{3})/(\d{2})", wind_str)
-    if match_numeric_slash:
-        return int(match_numeric_slash.group(1)), int(match_numeric_slash.group(2))
+def extract_wind_data(wind_str):
+    """
+    Extracts wind direction and speed from a wind string, handling various formats
+    ("35005KT", "310/05KT", "320/07", "28007G17KT", "VRB02KT", "VRB/02", "VRB").
 
-    return None, None  # Return None, None if no match
+    Returns:
+        tuple: (direction, speed); direction is "N/A" for variable winds, and both are
+        None if the string is not a wind group. Gusts are dropped (see parse_wind_group).
+    """
+    wind = parse_wind_group(wind_str)
+    if wind is None:
+        return None, None
+    return ("N/A" if wind.vrb else wind.direction), wind.speed
 
 
 # def extract_data_from_file_with_day_and_wind(file_path):
@@ -177,73 +187,156 @@ def extract_wind_data(wind_str):
 
 import os
 
-def extract_data_from_file_with_day_and_wind(file_path):
+# Day markers ("1" .. "31"), station headers ("VABB") and data rows ("0000Z 09010KT 25 1009 1012")
+FORECAST_LINE_RE = re.compile(
+    r"^(?:(?P<day>\d{1,2})$"
+    r"|(?P<station>(?!TIME|WIND|TEMP)[A-Z]{4})$"
+    r"|(?P<time>\d{4}Z)\s+(?P<wind>\S+)\s+(?P<temp>\d+)\s+(?P<qfe>\d+)\s+(?P<qnh>\d+))"
+)
+
+
+def _forecast_file_period(file_path):
     """
-    Extracts data from a file, including day (from filename or file content), time,
-    and separated wind direction/speed.
+    Read the date in a forecast file name.
 
-    Supports both daily and monthly forecast files.
+    Returns:
+        tuple: (day, month, year, use_day_markers). Monthly files (no day, or day "01")
+        take the day from the marker lines inside the file.
     """
-    data = []
+    day, month, year, _ = extract_day_month_year_from_filename(os.path.basename(file_path))
+    use_day_from_filename = bool(day and month and year and day != "01")
+    return day, month, year, not use_day_from_filename
+
 
-    print(f"Processing file: {file_path}")
+def _parse_forecast_lines(lines, month, year, use_day_markers, current_day=None, current_station=None):
+    """
+    Parse a block of forecast file lines in one vectorised pass.
+
+    Args:
+        lines (list): Raw lines.
+        month, year (str): Period from the file name (stored as given).
+        use_day_markers (bool): Take the day from marker lines (monthly files).
+        current_day (int): Day in force at the start of the block (None: day 1).
+        current_station (str): Station in force at the start of the block.
+
+    Returns:
+        tuple: (DataFrame of the data rows, day and station in force at the end).
+    """
+    fields = pd.Series(lines, dtype="string").str.strip().str.extract(FORECAST_LINE_RE)
+
+    # Forward-fill the markers over the rows that follow them
+    if use_day_markers:
+        days = pd.to_numeric(fields["day"], errors="coerce")
+    else:
+        days = pd.Series(np.nan, index=fields.index)
+    if current_day is not None:
+        days = pd.concat([pd.Series([current_day], dtype="float64"), days], ignore_index=True)
+    days = days.ffill().iloc[-len(fields):].set_axis(fields.index) if len(fields) else days
+    stations = fields["station"]
+    if current_station is not None:
+        stations = pd.concat([pd.Series([current_station], dtype="string"), stations], ignore_index=True)
+    stations = stations.ffill().iloc[-len(fields):].set_axis(fields.index) if len(fields) else stations
+
+    last_day = days.iloc[-1] if len(days) and pd.notna(days.iloc[-1]) else current_day
+    last_station = stations.iloc[-1] if len(stations) and pd.notna(stations.iloc[-1]) else current_station
+
+    rows = fields["time"].notna()
+    data = fields[rows]
+    wind = extract_wind_groups(data["wind"])
+    frame = pd.DataFrame({
+        # A day of 0 or no marker yet means day 1
+        "DAY": days[rows].fillna(0).replace(0, 1).astype("Int8"),
+        "MONTH": month,
+        "YEAR": year,
+        "TIME": data["time"].astype(object),
+        "WIND_DIR": wind["WIND_DIR"],
+        "WIND_VRB": wind["WIND_VRB"],
+        "WIND_SPEED": wind["WIND_SPEED"],
+        "TEMP": pd.to_numeric(data["temp"]).astype("Int16"),
+        "QFE": pd.to_numeric(data["qfe"]).astype("Int16"),
+        "QNH": pd.to_numeric(data["qnh"]).astype("Int16"),
+    }).reset_index(drop=True)
+    if stations.notna().any():
+        frame.insert(0, "STATION", stations[rows].astype(object).to_numpy())
+    return frame, (int(last_day) if last_day is not None and pd.notna(last_day) else None), last_station
+
+
+@instrumented("forecast_parse")
+def extract_data_from_file_with_day_and_wind(file_path, digest=None):
+    """
+    Extracts data from a file, including day (from filename or file content), time,
+    and separated wind direction/speed.
 
-    filename = os.path.basename(file_path)
-    print(f"Processing file: {filename}")
-    day_from_name, month_from_name, year_from_name, _ = extract_day_month_year_from_filename(filename)
-    print(f"Extracted from filename: Day={day_from_name}, Month={month_from_name}, Year={year_from_name}")
+    Supports both daily and monthly forecast files. The file is read once and every
+    line classified with one vectorised regex extraction; day markers (and ICAO
+    station header lines, in multi-station bundles) are forward-filled onto the rows.
 
-    # Decide strategy:
-    # - daily files: use the day from filename
-    # - monthly files: detect days inside file
-    use_day_from_filename = bool(day_from_name and month_from_name and year_from_name and day_from_name != "01")
-    current_day = int(day_from_name) if use_day_from_filename else None
+    Args:
+        file_path (str): Path to the forecast file; its name gives the period.
+        digest (str): SHA-1 of the file content (see app.utils.parse_cache). When given,
+            a frame parsed before from the same content and period is reused.
 
+    Returns:
+        pd.DataFrame: DAY (Int8), MONTH, YEAR, TIME ("HHMMZ"), WIND_DIR (Int16, <NA> for
+        VRB), WIND_VRB (bool), WIND_SPEED (Int16), TEMP, QFE and QNH (Int16), plus
+        STATION when the file has station headers. Empty if the file cannot be read.
+    """
     try:
-        with open(file_path, "r") as file:
-            lines = file.readlines()
+        day, month, year, use_day_markers = _forecast_file_period(file_path)
+        logger.debug("Parsing forecast %s (day=%s, month=%s, year=%s)", file_path, day, month, year)
 
-            # Skip first line only if day is not from filename (monthly format often has headers)
-            if not use_day_from_filename and lines:
+        def parse():
+            with open(file_path, "r") as file:
+                lines = file.read().splitlines()
+
+            # Monthly files start with a header line
+            if use_day_markers:
                 lines = lines[1:]
+            frame, _, _ = _parse_forecast_lines(
+                lines, month, year, use_day_markers, current_day=None if use_day_markers else int(day)
+            )
+            return frame if len(frame) else pd.DataFrame()
 
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-
-                # For monthly files, update current_day whenever we see a day marker (1, 2, … 31)
-                if not use_day_from_filename and re.match(r"^\d{1,2}$", line):
-                    current_day = int(line)
-                    continue
-
-                # Extract data rows like: 0000Z 09010KT 25 1009 1012
-                match = re.match(r"(\d{4}Z)\s+(\S+)\s+(\d+)\s+(\d+)\s+(\d+)", line)
-                if match:
-                    time, wind_str, temp, qfe, qnh = match.groups()
-                    wind_dir, wind_speed = extract_wind_data(wind_str)
-                    data.append({
-                        "DAY": current_day if current_day else 1,
-                        "MONTH": month_from_name,
-                        "YEAR": year_from_name,
-                        "TIME": time,
-                        "WIND_DIR": wind_dir,
-                        "WIND_SPEED": wind_speed,
-                        "TEMP": int(temp),
-                        "QFE": int(qfe),
-                        "QNH": int(qnh),
-                    })
-
-        return pd.DataFrame(data)
+        return cached_parse(
+            "forecast", digest, parse, day=day, month=month, year=year, day_markers=use_day_markers
+        )
 
     except FileNotFoundError:
-        print(f"Error: File not found at {file_path}")
+        logger.error("Forecast file not found at %s", file_path)
         return pd.DataFrame()
     except Exception as e:
-        print(f"An error occurred: {e}")
+        logger.error("Error parsing forecast file %s: %s", file_path, e)
         return pd.DataFrame()
 
 
+def iter_forecast_chunks(file_path, chunk_lines=100_000):
+    """
+    Parse a forecast file in blocks of `chunk_lines` lines, for multi-month or
+    multi-station bundles too large to hold at once.
+
+    The day and station in force carry over from one block to the next, so the
+    concatenated chunks equal extract_data_from_file_with_day_and_wind(file_path).
+
+    Yields:
+        pd.DataFrame: Forecast rows, in the same columns as the whole-file parser.
+    """
+    day, month, year, use_day_markers = _forecast_file_period(file_path)
+    current_day = None if use_day_markers else int(day)
+    current_station = None
+    with open(file_path, "r") as file:
+        if use_day_markers:
+            next(file, None)
+        while True:
+            lines = [line.rstrip("\n") for line in itertools.islice(file, chunk_lines)]
+            if not lines:
+                break
+            frame, current_day, current_station = _parse_forecast_lines(
+                lines, month, year, use_day_markers, current_day, current_station
+            )
+            if len(frame):
+                yield frame
+
+
 def compare_wind_by_time(df1, df2):
     """
     Compares wind data from two DataFrames based on matching *first* 'TIME' values.
@@ -258,11 +351,11 @@ def compare_wind_by_time(df1, df2):
     """
 
     if not isinstance(df1, pd.DataFrame) or not isinstance(df2, pd.DataFrame):
-        print("Error: Input arguments must be Pandas DataFrames.")
+        logger.error("Input arguments must be Pandas DataFrames")
         return pd.DataFrame()
 
     if "TIME" not in df1.columns or "TIME" not in df2.columns:
-        print("Error: Both DataFrames must contain a 'TIME' column.")
+        logger.error("Both DataFrames must contain a 'TIME' column")
         return pd.DataFrame()
 
     # Remove duplicate times, keeping the first occurrence
@@ -278,10 +371,11 @@ def compare_wind_by_time(df1, df2):
     )
 
     if merged_df.empty:
-        print("No matching times found between the DataFrames.")
+        logger.info("No matching times found between the DataFrames")
         return pd.DataFrame()
 
     accuracy = []
+    data_issues = Tally(logger, "rows with")
     # save the merged_df to a csv file
     merged_df.to_csv("merged_df.csv", index=False)
     for _, row in merged_df.iterrows():
@@ -305,20 +399,21 @@ def compare_wind_by_time(df1, df2):
                 dir_diff = abs(int(forecast_dir) - int(actual_dir))
                 dir_accurate = dir_diff <= 30 or dir_diff >= 330
             except (ValueError, TypeError):
-                print("Invalid wind direction: ", forecast_dir, actual_dir)
+                data_issues.add("invalid wind direction")
 
         if actual_speed is not None and forecast_speed is not None:
             try:
                 speed_accurate = abs(int(forecast_speed) - int(actual_speed)) <= 1
             except (ValueError, TypeError):
-                print("Invalid wind speed: ", forecast_speed, actual_speed)
+                data_issues.add("invalid wind speed")
         else:
-            print(f"Warning: Missing wind speed for TIME {row['TIME']}.")
+            data_issues.add("missing wind speed")
 
         accuracy.append(
             "Accurate" if dir_accurate and speed_accurate else "Not Accurate"
         )
 
+    data_issues.flush()
     merged_df["Accuracy"] = accuracy
     return merged_df
 
@@ -382,7 +477,7 @@ def extract_day_month_year_from_filename(filename):
     """
     import os, re
     name = os.path.basename(filename or "")
-    print(f"filename = {name}")
+    logger.debug("filename = %s", name)
 
     # 1) DDMMYYYY anywhere
     m = re.search(r'(?<!\d)(\d{2})(\d{2})(\d{4})(?=\.txt$|$)', name)
@@ -420,16 +515,146 @@ def extract_month_year_from_date(date_str, format_str="%Y%m%d%H%M"):
               Returns (None, None, None) if parsing fails
     """
     try:
-        date_obj = datetime.strptime(date_str, format_str)
-        print(f"date_obj = {date_obj}")
+        if format_str == STAMP_FORMAT:
+            date_obj = stamp_datetime(date_str)
+        else:
+            date_obj = datetime.strptime(date_str, format_str)
         day = f"{date_obj.day:02d}"
-        print(f"day = {day}")
         month = f"{date_obj.month:02d}"
         year = f"{date_obj.year}"
         return day,month,year,f"{day}{month}{year}"
     except ValueError:
         return None, None, None,None
 
+def _numeric_column(series):
+    """
+    Convert a comparison column to float64 with NaN for missing values.
+
+    Accepts the typed (nullable) columns as well as older object columns holding
+    numbers, "N/A" or "VRB".
+
+    Returns:
+        tuple: (values, invalid) where invalid marks non-numeric entries other than "N/A"/"VRB".
+    """
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        values = series.astype("Float64").to_numpy(dtype=np.float64, na_value=np.nan)
+        # undo float32 storage noise (1013.2 -> 1013.2000122)
+        return np.round(values, 1) if series.dtype == "Float32" else values, np.zeros(len(series), dtype=bool)
+    placeholder = series.isna() | series.isin(["N/A", "VRB"])
+    values = pd.to_numeric(series.where(~placeholder), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return values, (np.isnan(values) & ~placeholder.to_numpy())
+
+
+# Verified elements and the merged-frame columns they are read from
+ELEMENTS = {
+    "Wind Direction": "WIND_DIR",
+    "Wind Speed": "WIND_SPEED",
+    "Temperature": "TEMP",
+    "QNH": "QNH",
+}
+
+
+def element_values(merged_df, name):
+    """
+    Actual and forecast values of one element as float64 arrays (NaN where absent).
+
+    Returns:
+        tuple: (actual, forecast, missing, invalid); `missing` marks rows where either
+        side has no value, `invalid` rows where a value could not be parsed.
+    """
+    column = ELEMENTS[name]
+    actual, actual_invalid = _numeric_column(merged_df[f"{column}_actual"])
+    forecast, forecast_invalid = _numeric_column(merged_df[f"{column}_forecast"])
+    # A missing value on either side takes precedence over an unparseable one
+    missing = (np.isnan(actual) & ~actual_invalid) | (np.isnan(forecast) & ~forecast_invalid)
+    invalid = (actual_invalid | forecast_invalid) & ~missing
+    return actual, forecast, missing, invalid
+
+
+def comparison_errors(merged_df):
+    """
+    Absolute forecast errors for each element of a merged METAR/forecast frame.
+
+    Wind direction is the circular difference in whole degrees and wind speed the
+    difference in whole knots; temperature and QNH are compared as given.
+
+    Args:
+        merged_df (pd.DataFrame): Output of match_observations.
+
+    Returns:
+        dict: Element name -> (error, missing, invalid) arrays. `error` is NaN where a
+        value is missing (either side) or could not be parsed.
+    """
+    errors = {}
+    for name, column in ELEMENTS.items():
+        actual, forecast, missing, invalid = element_values(merged_df, name)
+        if column in ("WIND_DIR", "WIND_SPEED"):
+            error = np.abs(np.trunc(forecast) - np.trunc(actual))
+        else:
+            error = np.abs(forecast - actual)
+        if column == "WIND_DIR":
+            error = np.minimum(error, 360 - error)
+        errors[name] = (error, missing, invalid)
+    return errors
+
+
+def element_hits(name, error, missing, invalid, threshold):
+    """
+    Accuracy flags for one element of comparison_errors.
+
+    `threshold` may be an array of shape (k, 1) to score k thresholds at once, giving
+    (k, rows) flags. A VRB or missing wind direction counts as accurate; any other
+    missing or invalid value does not.
+    """
+    hits = error <= threshold
+    if name == "Wind Direction":
+        hits = hits | missing
+    return hits
+
+
+def match_observations(df1, df2, time_tolerance=10):
+    """
+    Pair each forecast time with the nearest METAR within `time_tolerance` minutes.
+
+    Rows are matched on integer epoch-minute keys (see app.utils.timekeys), so files
+    covering several months line up, and a METAR a few minutes off the forecast hour
+    is still used. Only the first row for each time is kept on either side. Neither
+    input is modified.
+
+    Args:
+        df1 (pd.DataFrame): Actual (METAR) data with 'DAY' and 'TIME'.
+        df2 (pd.DataFrame): Forecast data with 'DAY' and 'TIME' (and optionally 'MONTH', 'YEAR').
+        time_tolerance (int): Largest METAR/forecast time difference in minutes.
+
+    Returns:
+        pd.DataFrame: The METAR columns, DATETIME (forecast time), TIME_OFFSET (METAR
+        minus forecast time, minutes) and the forecast columns. Columns present in both
+        frames get "_actual"/"_forecast" suffixes.
+    """
+    period = frame_period(df2) or frame_period(df1)
+    actual_keys, actual_rows = first_occurrences(frame_minute_keys(df1, period))
+    forecast_keys, forecast_rows = first_occurrences(frame_minute_keys(df2, period))
+    forecast_matched, actual_matched = asof_match(forecast_keys, actual_keys, time_tolerance)
+    if len(forecast_matched) < len(forecast_keys):
+        logger.info(
+            "%d of %d forecast times have no METAR within %d minutes",
+            len(forecast_keys) - len(forecast_matched), len(forecast_keys), time_tolerance,
+        )
+
+    shared = set(df1.columns) & set(df2.columns)
+    actual = df1.take(actual_rows[actual_matched]).reset_index(drop=True)
+    forecast = df2.take(forecast_rows[forecast_matched]).reset_index(drop=True)
+    actual.columns = [f"{c}_actual" if c in shared else c for c in actual.columns]
+    forecast.columns = [f"{c}_forecast" if c in shared else c for c in forecast.columns]
+    slot_keys = forecast_keys[forecast_matched]
+    timing = pd.DataFrame({
+        "DATETIME": key_timestamps(slot_keys),
+        "TIME_OFFSET": actual_keys[actual_matched] - slot_keys,
+    })
+    return pd.concat([actual, timing, forecast], axis=1)
+
+
+@instrumented("comparison")
 def compare_weather_data(
     df1,
     df2,
@@ -437,9 +662,11 @@ def compare_weather_data(
     wind_speed_threshold=5,
     temp_threshold=1,
     qnh_threshold=1,
+    time_tolerance=10,
 ):
     """
-    Compares weather data from two DataFrames based on matching 'DAY' and 'TIME'.
+    Compares weather data from two DataFrames, pairing each forecast time with the
+    nearest METAR (see match_observations).
 
     Args:
         df1 (pd.DataFrame): Actual (METAR) data with 'TIME', 'WIND_DIR', 'WIND_SPEED', 'TEMP', 'QNH', and 'DAY'.
@@ -448,13 +675,14 @@ def compare_weather_data(
         wind_speed_threshold (int): Threshold for wind speed accuracy in knots.
         temp_threshold (int): Threshold for temperature accuracy in °C.
         qnh_threshold (int): Threshold for QNH accuracy in hPa.
+        time_tolerance (int): Largest METAR/forecast time difference in minutes.
 
     Returns:
         pd.DataFrame: Daily accuracy summary with counts in parentheses.
     """
 
     if not isinstance(df1, pd.DataFrame) or not isinstance(df2, pd.DataFrame):
-        print("Error: Input arguments must be Pandas DataFrames.")
+        logger.error("Input arguments must be Pandas DataFrames")
         return pd.DataFrame()
 
     required_columns = ["TIME", "WIND_DIR", "WIND_SPEED", "TEMP", "QNH", "DAY"]
@@ -462,213 +690,127 @@ def compare_weather_data(
     # Check if all required columns are in df1
     if not all(col in df1.columns for col in required_columns):
         missing_cols = [col for col in required_columns if col not in df1.columns]
-        print(f"Error: METAR DataFrame is missing columns: {missing_cols}")
+        logger.error("METAR DataFrame is missing columns: %s", missing_cols)
         return pd.DataFrame()
 
     # Check if all required columns except QNH are in df2
     forecast_required = ["TIME", "WIND_DIR", "WIND_SPEED", "TEMP", "DAY"]
     if not all(col in df2.columns for col in forecast_required):
         missing_cols = [col for col in forecast_required if col not in df2.columns]
-        print(f"Error: Forecast DataFrame is missing columns: {missing_cols}")
+        logger.error("Forecast DataFrame is missing columns: %s", missing_cols)
         return pd.DataFrame()
 
     # If QNH is not in df2 but QFE is, use QFE as QNH
     if "QNH" not in df2.columns and "QFE" in df2.columns:
-        df2["QNH"] = df2["QFE"]
+        df2 = df2.assign(QNH=df2["QFE"])
     elif "QNH" not in df2.columns:
-        print(
-            "Error: Forecast DataFrame is missing QNH column and no QFE column to substitute."
-        )
+        logger.error("Forecast DataFrame is missing QNH column and no QFE column to substitute.")
         return pd.DataFrame()
 
-    # Combine DAY and TIME for unique identification
-    df1["DATETIME"] = (
-        df1["DAY"].astype(str).str.zfill(2) + " " + df1["TIME"].astype(str)
-    )
-    df2["DATETIME"] = (
-        df2["DAY"].astype(str).str.zfill(2) + " " + df2["TIME"].astype(str)
-    )
-
-    # Remove duplicate date-times, keeping the first occurrence
-    df1_unique = df1.drop_duplicates(subset="DATETIME", keep="first")
-    df2_unique = df2.drop_duplicates(subset="DATETIME", keep="first")
-
-    merged_df = pd.merge(
-        df1_unique,
-        df2_unique,
-        on="DATETIME",
-        suffixes=("_actual", "_forecast"),
-        how="inner",
-    )
-
+    merged_df = match_observations(df1, df2, time_tolerance)
     if merged_df.empty:
-        print("No matching day and times found between the DataFrames.")
+        logger.warning("No matching day and times found between the DataFrames.")
         return pd.DataFrame()
+    count_rows("comparison", len(merged_df))
+
+    errors = comparison_errors(merged_df)
+    thresholds = {
+        "Wind Direction": wind_dir_threshold,
+        "Wind Speed": wind_speed_threshold,
+        "Temperature": temp_threshold,
+        "QNH": qnh_threshold,
+    }
+    flags = {name: element_hits(name, *errors[name], thresholds[name]) for name in ELEMENTS}
+    dir_diff, dir_missing, dir_invalid = errors["Wind Direction"]
+    speed_diff, speed_missing, speed_invalid = errors["Wind Speed"]
+    temp_diff, temp_missing, temp_invalid = errors["Temperature"]
+    qnh_diff, qnh_missing, qnh_invalid = errors["QNH"]
+    dir_accuracy_flags = flags["Wind Direction"]
+    speed_accuracy_flags = flags["Wind Speed"]
+    temp_accuracy_flags = flags["Temperature"]
+    qnh_accuracy_flags = flags["QNH"]
+
+    # Per-row data problems are counted and logged once at the end
+    data_issues = Tally(logger, "rows with")
+    data_issues.add("invalid wind direction", int(dir_invalid.sum()))
+    data_issues.add("invalid wind speed", int(speed_invalid.sum()))
+    data_issues.add("missing wind speed", int(speed_missing.sum()))
+    data_issues.add("invalid temperature", int(temp_invalid.sum()))
+    data_issues.add("missing temperature", int(temp_missing.sum()))
+    data_issues.add("invalid QNH", int(qnh_invalid.sum()))
+    data_issues.add("missing QNH", int(qnh_missing.sum()))
+    data_issues.flush()
+
+    def reasons(accurate, missing, invalid, label, off_by):
+        return np.where(
+            invalid, f"{label} - Invalid data",
+            np.where(missing, f"{label} - Missing data", np.where(accurate, "", off_by)),
+        )
 
-    # Track parameter-wise individual accuracies
-    dir_accuracy_flags = []
-    speed_accuracy_flags = []
-    temp_accuracy_flags = []
-    qnh_accuracy_flags = []
-    overall_accuracy = []
-    inaccuracy_reasons = []
-
-    for _, row in merged_df.iterrows():
-        actual_dir = row["WIND_DIR_actual"]
-        forecast_dir = row["WIND_DIR_forecast"]
-        actual_speed = row["WIND_SPEED_actual"]
-        forecast_speed = row["WIND_SPEED_forecast"]
-        actual_temp = row["TEMP_actual"]
-        forecast_temp = row["TEMP_forecast"]
-        actual_qnh = row["QNH_actual"]
-        forecast_qnh = row["QNH_forecast"]
-
-        dir_accurate = False
-        speed_accurate = False
-        temp_accurate = False
-        qnh_accurate = False
-        reasons = []
-
-        # Handle direction accuracy
-        if (
-            actual_dir == "VRB"
-            or forecast_dir == "VRB"
-            or actual_dir == "N/A"
-            or forecast_dir == "N/A"
-            or pd.isna(actual_dir)
-            or pd.isna(forecast_dir)
-        ):
-            dir_accurate = True
-        else:
-            try:
-                dir_diff = circular_difference(int(forecast_dir), int(actual_dir))
-                dir_accurate = dir_diff is not None and dir_diff <= wind_dir_threshold
-                if not dir_accurate and dir_diff is not None:
-                    reasons.append(f"Wind Direction off by {dir_diff:.1f}°")
-            except (ValueError, TypeError):
-                print(
-                    f"Warning: Invalid wind direction for DATETIME {row['DATETIME']}."
-                )
-                reasons.append("Wind Direction - Invalid data")
-
-        # Handle speed accuracy
-        if (
-            pd.notna(actual_speed)
-            and pd.notna(forecast_speed)
-            and actual_speed != "N/A"
-            and forecast_speed != "N/A"
-        ):
-            try:
-                speed_diff = abs(int(forecast_speed) - int(actual_speed))
-                speed_accurate = speed_diff <= wind_speed_threshold
-                if not speed_accurate:
-                    reasons.append(f"Wind Speed off by {speed_diff} knots")
-            except (ValueError, TypeError):
-                print(f"Warning: Invalid wind speed for DATETIME {row['DATETIME']}.")
-                reasons.append("Wind Speed - Invalid data")
-        else:
-            print(f"Warning: Missing wind speed for DATETIME {row['DATETIME']}.")
-            reasons.append("Wind Speed - Missing data")
-
-        # Handle temperature accuracy
-        if (
-            pd.notna(actual_temp)
-            and pd.notna(forecast_temp)
-            and actual_temp != "N/A"
-            and forecast_temp != "N/A"
-        ):
-            try:
-                temp_diff = abs(float(forecast_temp) - float(actual_temp))
-                temp_accurate = temp_diff <= temp_threshold
-                if not temp_accurate:
-                    reasons.append(f"Temperature off by {temp_diff:.1f}°C")
-            except (ValueError, TypeError):
-                print(f"Warning: Invalid temperature for DATETIME {row['DATETIME']}.")
-                reasons.append("Temperature - Invalid data")
-        else:
-            print(f"Warning: Missing temperature for DATETIME {row['DATETIME']}.")
-            reasons.append("Temperature - Missing data")
-
-        # Handle QNH accuracy
-        if (
-            pd.notna(actual_qnh)
-            and pd.notna(forecast_qnh)
-            and actual_qnh != "N/A"
-            and forecast_qnh != "N/A"
-        ):
-            try:
-                qnh_diff = abs(float(forecast_qnh) - float(actual_qnh))
-                qnh_accurate = qnh_diff <= qnh_threshold
-                if not qnh_accurate:
-                    reasons.append(f"QNH off by {qnh_diff:.1f} hPa")
-            except (ValueError, TypeError):
-                print(f"Warning: Invalid QNH for DATETIME {row['DATETIME']}.")
-                reasons.append("QNH - Invalid data")
-        else:
-            print(f"Warning: Missing QNH for DATETIME {row['DATETIME']}.")
-            reasons.append("QNH - Missing data")
-
-        # Store individual accuracy flags
-        dir_accuracy_flags.append(dir_accurate)
-        speed_accuracy_flags.append(speed_accurate)
-        temp_accuracy_flags.append(temp_accurate)
-        qnh_accuracy_flags.append(qnh_accurate)
-
-        # Overall accuracy
-        overall_accuracy.append(
-            "Accurate"
-            if all([dir_accurate, speed_accurate, temp_accurate, qnh_accurate])
-            else "Not Accurate"
+    inaccuracy_reasons = [
+        " | ".join(reason for reason in row if reason) or "All Accurate"
+        for row in zip(
+            reasons(
+                dir_accuracy_flags, np.zeros(len(merged_df), dtype=bool), dir_invalid, "Wind Direction",
+                [f"Wind Direction off by {d:.1f}°" for d in dir_diff.tolist()],
+            ),
+            reasons(
+                speed_accuracy_flags, speed_missing, speed_invalid, "Wind Speed",
+                [f"Wind Speed off by {d:.0f} knots" for d in speed_diff.tolist()],
+            ),
+            reasons(
+                temp_accuracy_flags, temp_missing, temp_invalid, "Temperature",
+                [f"Temperature off by {d:.1f}°C" for d in temp_diff.tolist()],
+            ),
+            reasons(
+                qnh_accuracy_flags, qnh_missing, qnh_invalid, "QNH",
+                [f"QNH off by {d:.1f} hPa" for d in qnh_diff.tolist()],
+            ),
         )
-        
-        # Store inaccuracy reasons
-        inaccuracy_reasons.append(" | ".join(reasons) if reasons else "All Accurate")
+    ]
+
+    overall_flags = dir_accuracy_flags & speed_accuracy_flags & temp_accuracy_flags & qnh_accuracy_flags
 
     # Add accuracy flags to DataFrame
     merged_df["DIR_Accurate"] = dir_accuracy_flags
     merged_df["SPD_Accurate"] = speed_accuracy_flags
     merged_df["TEMP_Accurate"] = temp_accuracy_flags
     merged_df["QNH_Accurate"] = qnh_accuracy_flags
-    merged_df["Accuracy"] = overall_accuracy
+    merged_df["Accuracy"] = np.where(overall_flags, "Accurate", "Not Accurate")
     merged_df["Inaccuracy_Reason"] = inaccuracy_reasons
 
     # Group-wise summary per DAY
-    merged_df["DAY"] = merged_df["DATETIME"].str.split().str[0]  # Extract day again
+    # Days are labelled "DD", or "YYYY-MM-DD" when the data spans several months
+    slots = merged_df["DATETIME"].dt
+    multi_month = (slots.year * 12 + slots.month).nunique() > 1
+    merged_df["DAY"] = slots.strftime("%Y-%m-%d" if multi_month else "%d")
+
+    def summary(hits, total):
+        return f"{round(100 * hits / total, 1)}% ({hits})"
 
     # Calculate daily accuracy percentages with counts
-    daily_accuracy = (
-        merged_df.groupby("DAY")
-        .agg(
-            {
-                "DIR_Accurate": lambda x: f"{round(100 * x.sum() / len(x), 1)}% ({x.sum()})",
-                "SPD_Accurate": lambda x: f"{round(100 * x.sum() / len(x), 1)}% ({x.sum()})",
-                "TEMP_Accurate": lambda x: f"{round(100 * x.sum() / len(x), 1)}% ({x.sum()})",
-                "QNH_Accurate": lambda x: f"{round(100 * x.sum() / len(x), 1)}% ({x.sum()})",
-                "Accuracy": lambda x: f"{round(100 * (x == 'Accurate').sum() / len(x), 1)}% ({(x == 'Accurate').sum()})",
-            }
-        )
-        .rename(
-            columns={
-                "DIR_Accurate": "Wind Direction",
-                "SPD_Accurate": "Wind Speed",
-                "TEMP_Accurate": "Temperature",
-                "QNH_Accurate": "QNH",
-                "Accuracy": "Overall",
-            }
-        )
-        .reset_index()
-    )
+    flag_columns = {
+        "Wind Direction": "DIR_Accurate",
+        "Wind Speed": "SPD_Accurate",
+        "Temperature": "TEMP_Accurate",
+        "QNH": "QNH_Accurate",
+    }
+    hits = pd.DataFrame({name: merged_df[column] for name, column in flag_columns.items()})
+    hits["Overall"] = overall_flags
+    daily_hits = hits.groupby(merged_df["DAY"]).sum()
+    daily_totals = merged_df.groupby("DAY").size()
+    daily_accuracy = pd.DataFrame({
+        "DAY": daily_hits.index,
+        **{
+            name: [summary(int(h), int(n)) for h, n in zip(daily_hits[name], daily_totals)]
+            for name in daily_hits.columns
+        },
+    })
 
     # Calculate whole month accuracy
     total_records = len(merged_df)
-    whole_month = {
-        "DAY": "Whole Month",
-        "Wind Direction": f"{round(100 * merged_df['DIR_Accurate'].sum() / total_records, 1)}% ({merged_df['DIR_Accurate'].sum()})",
-        "Wind Speed": f"{round(100 * merged_df['SPD_Accurate'].sum() / total_records, 1)}% ({merged_df['SPD_Accurate'].sum()})",
-        "Temperature": f"{round(100 * merged_df['TEMP_Accurate'].sum() / total_records, 1)}% ({merged_df['TEMP_Accurate'].sum()})",
-        "QNH": f"{round(100 * merged_df['QNH_Accurate'].sum() / total_records, 1)}% ({merged_df['QNH_Accurate'].sum()})",
-        "Overall": f"{round(100 * (merged_df['Accuracy'] == 'Accurate').sum() / total_records, 1)}% ({(merged_df['Accuracy'] == 'Accurate').sum()})",
-    }
+    whole_month = {"DAY": "Whole Month"}
+    whole_month.update({name: summary(int(hits[name].sum()), total_records) for name in hits.columns})
 
     # Add ICAO requirements row
     icao_requirements = {
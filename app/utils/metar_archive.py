@@ -0,0 +1,97 @@
+"""
+Local store of METAR reports, one text file per station and month.
+
+Batch verification (app.utils.batch_verification) reads a station's month of METARs from
+here instead of fetching them. `archive_metar_file` splits a METAR file by month and
+merges each month into METAR_ARCHIVE_DIR/<ICAO>/<YYYYMM>.txt. Every stored report carries
+the OGIMET YYYYMMDDHHMM prefix (added where the file only had the DDHHMMZ group), so a
+month file reads on its own; reports are kept in time order and a report already stored
+is not added again. Month files are replaced atomically, so readers never see half a
+write.
+"""
+
+import os
+import re
+import tempfile
+
+import numpy as np
+
+from app.config import METAR_ARCHIVE_DIR
+from app.utils.file_profile import profile_metar_file
+from app.utils.timekeys import format_keys, key_periods, stamp_keys
+
+
+def metar_month_path(station, year, month, directory=METAR_ARCHIVE_DIR):
+    """Path of a station's month file in the store (it may not exist)."""
+    return os.path.join(directory, station.upper(), f"{year:04d}{month:02d}.txt")
+
+
+def archived_months(station, directory=METAR_ARCHIVE_DIR):
+    """(year, month) tuples stored for a station, in order."""
+    station_dir = os.path.join(directory, station.upper())
+    if not os.path.isdir(station_dir):
+        return []
+    names = (name[:-4] for name in os.listdir(station_dir) if re.fullmatch(r"\d{6}\.txt", name))
+    return sorted((int(name[:4]), int(name[4:])) for name in names)
+
+
+def _read_month(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _write_month(path, lines):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(handle, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
+
+
+def archive_metar_file(file_path, station=None, directory=METAR_ARCHIVE_DIR):
+    """
+    Merge the reports of a METAR file into the monthly store.
+
+    Args:
+        file_path (str): METAR file: OGIMET lines, or METAR lines following an
+            OGIMET-prefixed line that dates them.
+        station (str): ICAO code; defaults to the station the file reports for. Reports
+            of other stations are left out.
+        directory (str): Store location.
+
+    Returns:
+        dict: "station" and "months" ({"YYYYMM": reports added}). Reports without a
+        readable time are left out.
+
+    Raises:
+        ValueError: If no station is given or found in the file.
+    """
+    profile = profile_metar_file(file_path)
+    station = (station or profile.station or "").upper()
+    if not re.fullmatch(r"[A-Z0-9]{4}", station):
+        raise ValueError(f"No station found in {file_path}")
+
+    own_report = re.compile(rf"\b{station}\s+\d{{6}}Z")
+    chosen = [i for i, (line, key) in enumerate(zip(profile.lines, profile.keys.tolist()))
+              if key >= 0 and own_report.search(line)]
+    keys = profile.keys[chosen]
+    lines = [profile.lines[i] for i in chosen]
+    prefixed = (stamp_keys(lines) >= 0).tolist() if lines else []
+    lines = [line if ok else f"{stamp} {line}" for line, ok, stamp in zip(lines, prefixed, format_keys(keys))]
+
+    added = {}
+    years, months = key_periods(keys)
+    for year, month in sorted(set(zip(years.tolist(), months.tolist()))):
+        path = metar_month_path(station, year, month, directory)
+        stored = _read_month(path)
+        known = set(stored)
+        new = [line for line in dict.fromkeys(lines[i] for i in np.flatnonzero((years == year) & (months == month)))
+               if line not in known]
+        if new:
+            merged = stored + new
+            order = np.argsort(stamp_keys(merged), kind="stable")
+            _write_month(path, [merged[i] for i in order])
+        added[f"{year:04d}{month:02d}"] = len(new)
+    return {"station": station, "months": added}
@@ -0,0 +1,233 @@
+"""
+Gust and thunderstorm events in a METAR stream.
+
+`build_metar_feature_arrays` turns a METAR file profile into time-sorted arrays (wind
+direction, gust, TS present, CB present). `detect_events` run-length encodes a boolean
+mask over those arrays (a gust at or above a threshold, TS/TSRA, a CB cloud, or TS or
+CB for thunderstorm warnings) into contiguous events, each with its start, end, peak
+gust and dominant wind direction. Runs are found with one `np.diff` over the mask and
+summarised with `reduceat`, so a season of reports costs a few array passes.
+
+Times are epoch-minute keys (see app.utils.timekeys).
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.timekeys import format_keys
+
+# Consecutive flagged METARs further apart than this start a new event
+MAX_REPORT_GAP = 90
+
+# Gusts (KT) at or above this make a gust event; METARs only report significant gusts
+GUST_THRESHOLD = 0
+
+# The trend and remarks of a METAR are not observations
+OBSERVED_PART_RE = r"\s(?:TEMPO|BECMG|NOSIG|RMK)\b"
+TS_WEATHER_RE = r"(?<!\S)[+-]?(?:VC)?TS(?:RA|GR|GS|SN|PL|DZ)*(?![^\s=])"
+CB_CLOUD_RE = r"(?<!\S)(?:FEW|SCT|BKN|OVC)\d{3}CB(?![^\s=])"
+
+# "thunderstorm" is TS or CB, the phenomena a thunderstorm warning covers
+EVENT_KINDS = ("gust", "ts", "cb", "thunderstorm")
+
+MetarFeatures = namedtuple("MetarFeatures", [
+    "keys",      # int64 epoch-minute time, ascending and unique
+    "wind_dir",  # float64 degrees, NaN when missing or VRB
+    "gust",      # float64 KT, NaN when no gust was reported
+    "ts",        # bool, TS/TSRA/VCTS... in the present weather
+    "cb",        # bool, a CB cloud group
+])
+
+Event = namedtuple("Event", [
+    "kind",       # an EVENT_KINDS name
+    "start",      # key of the first report
+    "last",       # key of the last report
+    "end",        # key of the next report without the phenomenon, or `last`
+    "peak_gust",  # highest gust (KT) during the event, or None
+    "direction",  # circular mean wind direction (degrees) during the event, or None
+    "ts",         # whether TS was reported (for "thunderstorm": TS rather than CB only)
+])
+
+
+def build_metar_feature_arrays(profile):
+    """
+    Time-sorted per-METAR arrays for event detection.
+
+    Args:
+        profile (FileProfile): A METAR file profile (see app.utils.file_profile).
+
+    Returns:
+        MetarFeatures: Reports without a time are dropped, as are repeats of a time
+        (the first report wins).
+    """
+    keys = np.asarray(profile.keys)
+    observations = profile.observations
+    gust = np.where(observations.is_missing("gust"), np.nan, observations.gust)
+    wind_dir = np.where(observations.is_missing("wind_dir"), np.nan, observations.wind_dir)
+    observed = pd.Series(profile.lines, dtype=object).str.split(OBSERVED_PART_RE, n=1, regex=True).str[0]
+    ts = observed.str.contains(TS_WEATHER_RE, regex=True).to_numpy(dtype=bool)
+    cb = observed.str.contains(CB_CLOUD_RE, regex=True).to_numpy(dtype=bool)
+
+    order = np.argsort(keys, kind="stable")
+    order = order[keys[order] >= 0]
+    _, first = np.unique(keys[order], return_index=True)
+    order = order[first]
+    return MetarFeatures(keys[order], wind_dir[order].astype(np.float64), gust[order].astype(np.float64),
+                         ts[order], cb[order])
+
+
+def event_mask(features, kind, gust_threshold=GUST_THRESHOLD):
+    """Bool array of the reports showing an EVENT_KINDS phenomenon."""
+    if kind == "gust":
+        return ~np.isnan(features.gust) & (np.nan_to_num(features.gust) >= gust_threshold)
+    if kind == "ts":
+        return features.ts.copy()
+    if kind == "cb":
+        return features.cb.copy()
+    if kind == "thunderstorm":
+        return features.ts | features.cb
+    raise ValueError(f"Unknown event kind: {kind!r}")
+
+
+def run_lengths(mask, keys=None, max_gap=MAX_REPORT_GAP):
+    """
+    First and last index of each run of True in `mask`.
+
+    With `keys`, a run is also split where consecutive reports are more than `max_gap`
+    minutes apart.
+
+    Returns:
+        tuple: (first, last) int arrays.
+    """
+    padded = np.diff(np.concatenate(([0], np.asarray(mask, dtype=np.int8), [0])))
+    first = np.flatnonzero(padded == 1)
+    last = np.flatnonzero(padded == -1) - 1
+    if keys is not None and len(first):
+        # A gap inside a run ends it at the report before the gap
+        gaps = np.flatnonzero(np.diff(keys) > max_gap)
+        inside = gaps[mask[gaps] & mask[gaps + 1]]
+        first = np.sort(np.concatenate((first, inside + 1)))
+        last = np.sort(np.concatenate((last, inside)))
+    return first, last
+
+
+class EventTable:
+    """
+    Events of one kind as arrays, in time order.
+
+    Attributes:
+        kind (str): An EVENT_KINDS name.
+        first, last (np.ndarray): Report indices of each event in the feature arrays.
+        start, last_key, end (np.ndarray): Keys; see Event.
+        peak_gust, direction (np.ndarray): float64, NaN when not reported.
+        ts (np.ndarray): Bool, TS reported during the event.
+    """
+
+    def __init__(self, kind, features, first, last, end, peak_gust, direction, ts):
+        self.kind = kind
+        self.first = first
+        self.last = last
+        self.start = features.keys[first]
+        self.last_key = features.keys[last]
+        self.end = end
+        self.peak_gust = peak_gust
+        self.direction = direction
+        self.ts = ts
+
+    def __len__(self):
+        return len(self.first)
+
+    def __getitem__(self, index):
+        peak_gust, direction = self.peak_gust[index], self.direction[index]
+        return Event(
+            self.kind,
+            int(self.start[index]),
+            int(self.last_key[index]),
+            int(self.end[index]),
+            None if np.isnan(peak_gust) else int(peak_gust),
+            None if np.isnan(direction) else int(round(direction)) % 360,
+            bool(self.ts[index]),
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def select(self, chosen):
+        """Events where the bool array `chosen` is set, as a list of Event."""
+        return [self[i] for i in np.flatnonzero(chosen)]
+
+
+def _reduce(ufunc, values, index, run_starts, fill):
+    """ufunc.reduceat of `values` (NaN replaced by `fill`) over each run; `index` lists the run members."""
+    if not len(run_starts):
+        return np.empty(0, dtype=values.dtype)
+    return ufunc.reduceat(np.where(np.isnan(values[index]), fill, values[index]), run_starts)
+
+
+def detect_events(features, kind, gust_threshold=GUST_THRESHOLD):
+    """
+    Contiguous events of one kind.
+
+    An event runs over consecutive reports showing the phenomenon; its end is the
+    next report without it (or its last report, if none follows within
+    MAX_REPORT_GAP).
+
+    Args:
+        features (MetarFeatures): From build_metar_feature_arrays.
+        kind (str): "gust", "ts", "cb" or "thunderstorm" (TS or CB).
+        gust_threshold (int): Smallest gust (KT) that makes a gust event.
+
+    Returns:
+        EventTable
+    """
+    keys = features.keys
+    mask = event_mask(features, kind, gust_threshold)
+    first, last = run_lengths(mask, keys)
+
+    following = np.minimum(last + 1, max(len(keys) - 1, 0))
+    resumes = (last + 1 < len(keys)) & (keys[following] - keys[last] <= MAX_REPORT_GAP)
+    end = np.where(resumes, keys[following], keys[last])
+
+    # Members of all runs in order; each run starts at these positions
+    index = np.flatnonzero(mask)
+    run_starts = np.searchsorted(index, first)
+
+    peak_gust = _reduce(np.fmax, features.gust, index, run_starts, np.nan)
+    radians = np.deg2rad(features.wind_dir)
+    sin = _reduce(np.add, np.sin(radians), index, run_starts, 0.0)
+    cos = _reduce(np.add, np.cos(radians), index, run_starts, 0.0)
+    with np.errstate(invalid="ignore"):
+        direction = np.where((sin == 0) & (cos == 0), np.nan, np.rad2deg(np.arctan2(sin, cos)) % 360)
+    ts = np.logical_or.reduceat(features.ts[index], run_starts) if len(first) else np.zeros(0, dtype=bool)
+    return EventTable(kind, features, first, last, end, peak_gust, direction, ts)
+
+
+def event_label(event):
+    """Short text for an event: "G35KT/250", "TS", "CB"."""
+    if event.kind == "gust":
+        text = f"G{event.peak_gust}KT" if event.peak_gust is not None else "G"
+        return f"{text}/{event.direction:03d}" if event.direction is not None else text
+    if event.kind == "cb":
+        return "CB"
+    return "TS" if event.ts else "CB"
+
+
+def event_records(events):
+    """JSON-ready dicts for a list of Event."""
+    starts = format_keys([e.start for e in events], "%Y-%m-%d %H:%M")
+    ends = format_keys([e.end for e in events], "%Y-%m-%d %H:%M")
+    return [
+        {
+            "kind": e.kind,
+            "label": event_label(e),
+            "start": start,
+            "end": end,
+            "minutes": e.end - e.start,
+            "peak_gust": e.peak_gust,
+            "direction": e.direction,
+        }
+        for e, start, end in zip(events, starts, ends)
+    ]
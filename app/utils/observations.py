@@ -0,0 +1,272 @@
+"""
+Compact containers for decoded observations and forecast rows.
+
+An `Observation` is a `__slots__` record for single reports. An `ObservationBatch` holds
+many of them as one NumPy array per field (struct of arrays) with an explicit missing
+mask, so a month of METARs is a few kilobytes instead of a list of dicts, and stages can
+hand the batch on without re-boxing every value.
+
+Missing values are `None` on an Observation and a set bit in `ObservationBatch.missing`
+(the value slot then holds 0). VRB winds have no direction: `wind_dir` is missing and
+`vrb` is set.
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.utils.timekeys import OGIMET_PREFIX_RE, TIME_GROUP_RE
+from app.utils.wind import find_wind_group
+
+# Numeric fields and their storage types
+VALUE_FIELDS = {
+    "wind_dir": np.int16,     # degrees true
+    "wind_speed": np.int16,   # KT
+    "gust": np.int16,         # KT
+    "temp": np.float32,       # °C
+    "dewpt": np.float32,      # °C
+    "qnh": np.float32,        # hPa
+    "qfe": np.float32,        # hPa
+}
+
+# Time fields; 0 when unknown (e.g. month and year of a bare DDHHMMZ group)
+TIME_FIELDS = {
+    "year": np.int16,
+    "month": np.int8,
+    "day": np.int8,
+    "hour": np.int8,
+    "minute": np.int8,
+}
+
+FIELD_INDEX = {name: i for i, name in enumerate(VALUE_FIELDS)}
+
+# Pandas nullable dtypes matching the storage types
+NULLABLE_DTYPES = {
+    name: "Int16" if np.issubdtype(dtype, np.integer) else "Float32" for name, dtype in VALUE_FIELDS.items()
+}
+
+
+class Observation:
+    """One decoded METAR or forecast row."""
+
+    __slots__ = ("year", "month", "day", "hour", "minute", "vrb") + tuple(VALUE_FIELDS)
+
+    def __init__(self, day=None, hour=None, minute=None, year=None, month=None, vrb=False, **values):
+        self.year = year
+        self.month = month
+        self.day = day
+        self.hour = hour
+        self.minute = minute
+        self.vrb = vrb
+        for name in VALUE_FIELDS:
+            setattr(self, name, values.pop(name, None))
+        if values:
+            raise TypeError(f"Unknown observation fields: {sorted(values)}")
+
+    @property
+    def time_group(self):
+        """The DDHHMM group as an int (e.g. 10230 for 010230Z), or None."""
+        if self.day is None or self.hour is None or self.minute is None:
+            return None
+        return self.day * 10000 + self.hour * 100 + self.minute
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__ if getattr(self, name) is not None)
+        return f"Observation({fields})"
+
+
+def observation_from_report(report):
+    """
+    Build an Observation from a decoded `metar.Metar.Metar` report.
+
+    Args:
+        report (Metar): Decoded report.
+
+    Returns:
+        Observation: The report's time, wind, temperatures and pressure.
+    """
+    def value(attr, *units):
+        group = getattr(report, attr, None)
+        return group.value(*units) if group else None
+
+    wind_dir = value("wind_dir")
+    wind_speed = value("wind_speed", "KT")
+    gust = value("wind_gust", "KT")
+    time = report.time
+    return Observation(
+        year=time.year if time else None,
+        month=time.month if time else None,
+        day=time.day if time else None,
+        hour=time.hour if time else None,
+        minute=time.minute if time else None,
+        vrb=wind_dir is None and wind_speed is not None,
+        wind_dir=int(wind_dir) if wind_dir is not None else None,
+        wind_speed=int(round(wind_speed)) if wind_speed is not None else None,
+        gust=int(round(gust)) if gust is not None else None,
+        temp=value("temp", "C"),
+        dewpt=value("dewpt", "C"),
+        qnh=value("press", "hPa"),
+    )
+
+
+def observation_from_line(line):
+    """
+    Pick time and wind out of a METAR line without a full decode.
+
+    The DDHHMMZ group is used for the time; year and month come from an OGIMET
+    YYYYMMDDHHMM prefix when there is one.
+    """
+    obs = Observation()
+    prefix = OGIMET_PREFIX_RE.match(line)
+    if prefix:
+        obs.year, obs.month, obs.day, obs.hour, obs.minute = (int(g) for g in prefix.groups())
+    group = TIME_GROUP_RE.search(line)
+    if group:
+        obs.day, obs.hour, obs.minute = (int(g) for g in group.groups())
+    wind = find_wind_group(line)
+    if wind:
+        obs.wind_dir, obs.wind_speed, obs.gust, obs.vrb = wind
+    return obs
+
+
+class ObservationBatch:
+    """
+    Struct-of-arrays container for many observations.
+
+    Attributes:
+        year, month, day, hour, minute (np.ndarray): Time fields.
+        wind_dir, wind_speed, gust, temp, dewpt, qnh, qfe (np.ndarray): Values (0 where missing).
+        vrb (np.ndarray): Variable wind flag.
+        missing (np.ndarray): Bool array of shape (n, len(VALUE_FIELDS)); column order as VALUE_FIELDS.
+        text (np.ndarray): Optional raw report text (object array), or None.
+    """
+
+    def __init__(self, columns, missing, vrb, text=None):
+        self._columns = columns
+        self.missing = missing
+        self.vrb = vrb
+        self.text = text
+
+    def __getattr__(self, name):
+        columns = self.__dict__.get("_columns", {})
+        if name in columns:
+            return columns[name]
+        raise AttributeError(name)
+
+    def __len__(self):
+        return len(self.vrb)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.record(index)
+        return ObservationBatch(
+            {name: values[index] for name, values in self._columns.items()},
+            self.missing[index],
+            self.vrb[index],
+            self.text[index] if self.text is not None else None,
+        )
+
+    @classmethod
+    def from_records(cls, records, text=None):
+        """
+        Pack a sequence of Observations into arrays.
+
+        Args:
+            records (list): Observation objects.
+            text (list): Optional raw text per record.
+        """
+        n = len(records)
+        columns = {}
+        for name, dtype in TIME_FIELDS.items():
+            columns[name] = np.fromiter((getattr(r, name) or 0 for r in records), dtype=dtype, count=n)
+        missing = np.zeros((n, len(VALUE_FIELDS)), dtype=bool)
+        for i, (name, dtype) in enumerate(VALUE_FIELDS.items()):
+            values = [getattr(r, name) for r in records]
+            missing[:, i] = [v is None for v in values]
+            columns[name] = np.fromiter((0 if v is None else v for v in values), dtype=dtype, count=n)
+        vrb = np.fromiter((bool(r.vrb) for r in records), dtype=bool, count=n)
+        if text is not None:
+            text = np.array(text, dtype=object)
+        return cls(columns, missing, vrb, text)
+
+    @classmethod
+    def from_lines(cls, lines):
+        """Build a batch from raw METAR lines with `observation_from_line`, keeping the text."""
+        return cls.from_records([observation_from_line(line) for line in lines], text=list(lines))
+
+    @classmethod
+    def concat(cls, batches):
+        """Join batches end to end."""
+        batches = list(batches)
+        if not batches:
+            return cls.from_records([])
+        columns = {name: np.concatenate([b._columns[name] for b in batches]) for name in batches[0]._columns}
+        text = None
+        if all(b.text is not None for b in batches):
+            text = np.concatenate([b.text for b in batches])
+        return cls(
+            columns,
+            np.concatenate([b.missing for b in batches]),
+            np.concatenate([b.vrb for b in batches]),
+            text,
+        )
+
+    def is_missing(self, name):
+        """Bool array: True where the field has no value."""
+        return self.missing[:, FIELD_INDEX[name]]
+
+    def values(self, name, missing=None):
+        """
+        Return a field as Python scalars, with `missing` in the gaps.
+
+        Integer fields give ints and float fields floats rounded to 0.1.
+        """
+        column = self._columns[name]
+        if np.issubdtype(column.dtype, np.floating):
+            out = np.round(column.astype(np.float64), 1).astype(object)
+        else:
+            out = column.astype(object)
+        if name in FIELD_INDEX:
+            out[self.is_missing(name)] = missing
+        return out
+
+    def column(self, name, dtype=None):
+        """
+        Return a field as a pandas nullable array (missing values are <NA>).
+
+        Args:
+            name (str): Field name.
+            dtype (str): Pandas dtype, e.g. "Int16" or "Float32" (default: the storage type).
+        """
+        values = self._columns[name]
+        if name not in FIELD_INDEX:
+            return pd.array(values, dtype=dtype)
+        dtype = pd.api.types.pandas_dtype(dtype or NULLABLE_DTYPES[name])
+        if np.issubdtype(dtype.numpy_dtype, np.integer):
+            values = np.rint(values) if np.issubdtype(values.dtype, np.floating) else values
+            return pd.arrays.IntegerArray(values.astype(dtype.numpy_dtype), self.is_missing(name).copy())
+        return pd.arrays.FloatingArray(values.astype(dtype.numpy_dtype), self.is_missing(name).copy())
+
+    @property
+    def time_groups(self):
+        """DDHHMM groups as int32 (e.g. 10230 for 010230Z)."""
+        return self.day.astype(np.int32) * 10000 + self.hour.astype(np.int32) * 100 + self.minute
+
+    def record(self, index):
+        """Unpack one observation."""
+        obs = Observation(vrb=bool(self.vrb[index]))
+        for name in TIME_FIELDS:
+            value = int(self._columns[name][index])
+            setattr(obs, name, value if value or name in ("hour", "minute") else None)
+        for i, name in enumerate(VALUE_FIELDS):
+            if not self.missing[index, i]:
+                setattr(obs, name, self._columns[name][index].item())
+        return obs
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.record(index)
+
+    @property
+    def nbytes(self):
+        """Memory held by the numeric arrays (raw text excluded)."""
+        return sum(values.nbytes for values in self._columns.values()) + self.missing.nbytes + self.vrb.nbytes
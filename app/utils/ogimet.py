@@ -13,6 +13,7 @@ import random
 import string
 import os
 from app.config import METAR_DATA_DIR
+from app.utils.metrics import instrumented
 
 class OgimetAPI:
     """
@@ -28,6 +29,7 @@ class OgimetAPI:
         """Initialize the OGIMET API client."""
         pass
     
+    @instrumented("ogimet_fetch")
     def get_metar(self, 
                  begin: Union[str, datetime],
                  end: Optional[Union[str, datetime]] = None,
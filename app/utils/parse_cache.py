@@ -0,0 +1,221 @@
+"""
+Content-addressed cache of parsed input files.
+
+Users often upload the same TAKEOFF forecast, observation file or warning bulletin
+again while adjusting dates. Uploads are hashed as they are written to disk
+(`save_upload`), and parsers given that digest look their result up here before parsing
+(`cached_parse`). Entries are keyed by (parser, parser version, content hash, parser
+arguments), so a repeated upload skips parsing entirely and a parser change invalidates
+old entries by bumping its version in PARSER_VERSIONS.
+
+Results are kept in an in-memory LRU bounded by bytes, backed by a directory of pickles
+(PARSE_CACHE_DIR) with its own byte bound, so the cache survives worker restarts and is
+shared between workers on one host.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from app.config import PARSE_CACHE_DIR, PARSE_CACHE_DISK_BYTES, PARSE_CACHE_MEMORY_BYTES
+from app.utils.log import get_logger
+from app.utils.metrics import PARSE_CACHE_LOOKUPS
+
+logger = get_logger(__name__)
+
+# Bump a parser's version whenever its output for the same input changes
+PARSER_VERSIONS = {
+    "forecast": 1,   # extract_data_from_file_with_day_and_wind
+    "metar": 1,      # decode_metar_to_csv
+    "warning": 3,    # parse_warning_file
+}
+
+CHUNK_BYTES = 1 << 20
+
+
+def hash_file(file_path):
+    """SHA-1 hex digest of a file's content (the digest FileProfile uses too)."""
+    digest = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def save_upload(file_storage, file_path):
+    """
+    Write an uploaded file to `file_path`, hashing it on the way.
+
+    Args:
+        file_storage (werkzeug.datastructures.FileStorage): The upload.
+        file_path (str): Destination path.
+
+    Returns:
+        str: SHA-1 hex digest of the content.
+    """
+    digest = hashlib.sha1()
+    with open(file_path, "wb") as out:
+        for chunk in iter(lambda: file_storage.stream.read(CHUNK_BYTES), b""):
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+
+def _size(value):
+    """Approximate in-memory size of a cached value in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _copy(value):
+    """Hand out copies so callers cannot modify a cached result."""
+    return value.copy() if isinstance(value, pd.DataFrame) else value
+
+
+class ParseCache:
+    """
+    Two-tier LRU cache: memory bounded by `max_bytes`, disk by `disk_max_bytes`.
+
+    Args:
+        max_bytes (int): Memory budget.
+        directory (str): Disk tier location, or None for memory only.
+        disk_max_bytes (int): Disk budget; the least recently used files go first.
+    """
+
+    def __init__(self, max_bytes, directory=None, disk_max_bytes=0):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        name = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.pkl")
+
+    def get(self, key):
+        """Return the cached value for `key` or None, promoting disk hits to memory."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                PARSE_CACHE_LOOKUPS.inc(result="memory")
+                return _copy(entry[0])
+
+        value = self._load(key)
+        if value is None:
+            PARSE_CACHE_LOOKUPS.inc(result="miss")
+            return None
+        PARSE_CACHE_LOOKUPS.inc(result="disk")
+        self._remember(key, value)
+        return _copy(value)
+
+    def put(self, key, value):
+        """Store `value` in memory and on disk."""
+        self._remember(key, value)
+        self._store(key, value)
+
+    def _remember(self, key, value):
+        size = _size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                stored_key, value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("Discarding unreadable parse cache entry %s: %s", path, e)
+            return None
+        if stored_key != key:
+            return None
+        os.utime(path)  # mark as recently used for disk eviction
+        return value
+
+    def _store(self, key, value):
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(handle, "wb") as f:
+                pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+            self._trim_disk()
+        except OSError as e:
+            logger.warning("Could not write parse cache entry: %s", e)
+
+    def _trim_disk(self):
+        """Delete the least recently used files until the disk tier fits its budget."""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".pkl"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Empty the memory tier (the disk tier is left alone)."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_cache = ParseCache(PARSE_CACHE_MEMORY_BYTES, PARSE_CACHE_DIR, PARSE_CACHE_DISK_BYTES)
+
+
+def cached_parse(parser, digest, parse, **params):
+    """
+    Return `parse()` for content `digest`, from the cache when it was parsed before.
+
+    Args:
+        parser (str): A PARSER_VERSIONS name.
+        digest (str): SHA-1 of the input (save_upload, hash_file or FileProfile.digest);
+            None bypasses the cache.
+        parse (callable): Produces the result on a miss.
+        **params: Other inputs the result depends on (period, station, ...).
+
+    Returns:
+        The parsed result (a copy when served from the cache).
+    """
+    if digest is None:
+        return parse()
+    key = (parser, PARSER_VERSIONS[parser], digest, tuple(sorted(params.items())))
+    value = _cache.get(key)
+    if value is not None:
+        logger.debug("Parse cache hit for %s %s", parser, digest)
+        return value
+    value = parse()
+    if value is not None:
+        _cache.put(key, value)
+    return _copy(value)
@@ -0,0 +1,160 @@
+"""
+Match forecast weather phenomena against METAR present-weather groups.
+
+Forecast verification used to test every forecast keyword against every METAR line with
+a substring check, so "RA" also matched "TSRA", a station name or a remark. Here both
+sides are read as weather groups instead: a group is an optional intensity or VC, an
+optional descriptor (MI, BC, SH, TS, ...) and phenomenon codes (RA, HZ, FU, ...), and
+only the observed part of a METAR (before its trend and remarks) counts.
+`match_phenomena` finds the weather groups with one regex pass over the joined METAR
+text and checks each distinct group code once against all forecast phenomena, so a file
+costs one pass whatever the number of phenomena.
+
+A group stands for its parts: a descriptor with its first phenomenon ("TSRA"), each
+further phenomenon ("GR" of "TSRAGR", "DZ" of "RADZ") and the descriptor alone ("TS").
+A forecast phenomenon matches a group that has all of its parts, ignoring intensity and
+VC: "RA" matches "-RA" and "RADZ", "GR" matches "TSRAGR", "TS" matches "TSRA", but "RA"
+does not match "TSRA". Codes in EQUIVALENT_CODES stand for each other.
+"""
+
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from app.utils.metar_events import OBSERVED_PART_RE
+from app.utils.timekeys import stamp_keys
+
+DESCRIPTORS = ("MI", "PR", "BC", "DR", "BL", "SH", "TS", "FZ")
+PHENOMENA = (
+    "DZ", "RA", "SN", "SG", "IC", "PL", "GR", "GS", "UP",       # precipitation
+    "BR", "FG", "FU", "VA", "DU", "SA", "HZ", "PY",             # obscuration
+    "PO", "SQ", "FC", "SS", "DS",                               # other
+)
+
+_PHENOMENON = f"(?:{'|'.join(PHENOMENA)})"
+_CODE = rf"(?:{'|'.join(DESCRIPTORS)}){_PHENOMENON}*|{_PHENOMENON}+"
+# A whole whitespace-delimited group; recent weather (RE...) is not observed weather
+WEATHER_GROUP_RE = re.compile(rf"(?<!\S)(?P<intensity>[+-]|VC)?(?P<code>{_CODE})(?![^\s=])")
+# A weather group in text joined by match_phenomena; the literal space lets the regex
+# engine skip ahead between groups
+_GROUP_IN_TEXT_RE = re.compile(rf" (?P<group>(?:[+-]|VC)?(?P<code>{_CODE}))(?![^\s=])")
+# Where the observed part of a METAR ends, in text joined by match_phenomena
+_TREND_RE = re.compile(OBSERVED_PART_RE.replace(r"\s", " ", 1))
+
+# Forecast codes that verify against each other (showers of rain are rain)
+EQUIVALENT_CODES = {"SHRA": "RA"}
+
+# Forecast intensity words, as format_weather_text in app.utils.upper_air_weather reads them
+INTENSITY_WORDS = {"FBL": "-", "MOD": "", "HVY": "+"}
+
+PhenomenonMatch = namedtuple("PhenomenonMatch", [
+    "phenomenon",  # the forecast code that matched
+    "key",         # epoch-minute time of the METAR, or -1 when its line has no stamp
+    "group",       # the METAR weather group, e.g. "-TSRA"
+    "line",        # index of the METAR line
+])
+
+
+def weather_code(token):
+    """The code of a weather group ("-TSRA" -> "TSRA"), or None if `token` is not one."""
+    match = WEATHER_GROUP_RE.fullmatch(token.strip().rstrip("="))
+    return match.group("code") if match else None
+
+
+def forecast_phenomena(weather):
+    """
+    Weather phenomena named in forecast text, in order and without repeats.
+
+    Args:
+        weather (str or list): Forecast weather text, or its tokens (as returned by
+            format_weather_text). FBL/MOD/HVY prefixes and non-weather words such as
+            BECMG, TEMPO or NSW are ignored.
+
+    Returns:
+        list: Weather codes, e.g. ["TSRA", "HZ"].
+    """
+    tokens = weather.split() if isinstance(weather, str) else weather
+    codes = (weather_code(token) for token in tokens if token not in INTENSITY_WORDS)
+    return list(dict.fromkeys(code for code in codes if code))
+
+
+def _parts(code):
+    """
+    The parts a weather code stands for, with EQUIVALENT_CODES applied.
+
+    Returns:
+        tuple: (descriptor or "", set of parts without the lone descriptor), e.g.
+        ("TS", {"TSRA", "GR"}) for "TSRAGR" and ("", {"RA", "DZ"}) for "RADZ".
+    """
+    descriptor = code[:2] if code[:2] in DESCRIPTORS else ""
+    rest = code[len(descriptor):]
+    phenomena = [rest[i:i + 2] for i in range(0, len(rest), 2)]
+    if descriptor and phenomena:
+        phenomena[0] = descriptor + phenomena[0]
+    return descriptor, {EQUIVALENT_CODES.get(part, part) for part in phenomena}
+
+
+def match_phenomena(phenomena, metar_lines):
+    """
+    Every METAR weather group that verifies a forecast phenomenon.
+
+    Args:
+        phenomena (list): Forecast weather codes or tokens (see forecast_phenomena).
+        metar_lines (list): METAR lines, OGIMET-prefixed or not.
+
+    Returns:
+        list: PhenomenonMatch tuples in line order; a group matching several
+        phenomena gives one tuple each.
+    """
+    # The parts each forecast phenomenon needs; a lone descriptor needs just itself
+    table = []
+    for phenomenon in forecast_phenomena(phenomena):
+        descriptor, parts = _parts(phenomenon)
+        table.append((phenomenon, parts or {descriptor}))
+    lines = [line.strip() for line in metar_lines]
+    if not table or not lines:
+        return []
+
+    # One space-separated text, line i starting at starts[i]
+    text = "".join(" " + line for line in lines).replace("\t", " ")
+    lengths = np.array([len(line) + 1 for line in lines], dtype=np.int64)
+    starts = np.cumsum(lengths) - lengths
+
+    # Each distinct group code is checked against the forecast once; groups verifying
+    # nothing are dropped before their lines are looked at
+    phenomena_of = {}
+    found = []
+    for m in _GROUP_IN_TEXT_RE.finditer(text):
+        code = m.group("code")
+        verified = phenomena_of.get(code)
+        if verified is None:
+            descriptor, parts = _parts(code)
+            if descriptor:
+                parts.add(descriptor)
+            verified = phenomena_of[code] = [phenomenon for phenomenon, needed in table if needed <= parts]
+        if verified:
+            found.append((m.start(), m.group("group"), verified))
+    if not found:
+        return []
+    positions = np.array([position for position, _, _ in found], dtype=np.int64)
+    line_index = np.searchsorted(starts, positions, side="right") - 1
+
+    # Trends and times are only read for the lines with a candidate group
+    hit_lines = np.unique(line_index)
+    cut = {}
+    for line in hit_lines.tolist():
+        trend = _TREND_RE.search(text, starts[line], starts[line] + lengths[line])
+        cut[line] = trend.start() if trend else starts[line] + lengths[line]
+    time_of = dict(zip(hit_lines.tolist(), stamp_keys([lines[line] for line in hit_lines]).tolist()))
+
+    matches = []
+    for (position, group, verified), line in zip(found, line_index.tolist()):
+        if position < cut[line]:
+            matches.extend(PhenomenonMatch(phenomenon, time_of[line], group, line) for phenomenon in verified)
+    return matches
+
+
+def matched_phenomena(matches):
+    """The distinct phenomena of match_phenomena output, in order of first match."""
+    return list(dict.fromkeys(match.phenomenon for match in matches))
@@ -0,0 +1,139 @@
+"""
+Server-Sent Events progress channels for long verification runs.
+
+The browser generates a job id, opens `/api/progress/<job_id>` as an EventSource and
+sends the same id with its POST. The route then wraps each step in
+`channel.stage("fetch")` etc., which emits start/end events with per-stage timings,
+and reports processed row counts with `channel.rows(...)`.
+
+Channels live in memory in one process, so the stream and the POST must reach the same
+server process: run a single worker (e.g. `gunicorn -w 1 --threads 8`) or route a
+client's requests to one worker with sticky sessions. A stream whose job never reaches
+its process gets an `unknown_job` event after JOB_WAIT_SECONDS instead of waiting out
+the channel TTL.
+"""
+
+import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# Channels that were never streamed (or whose client went away) are dropped after this
+CHANNEL_TTL_SECONDS = 600
+
+# How long a stream waits for its job's request to reach this process
+JOB_WAIT_SECONDS = 30
+
+
+class ProgressChannel:
+    """Event queue for one job."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.created = time.time()
+        self.timings = {}
+        self.closed = False
+        # Set once the job's own request has taken the channel (see get_channel)
+        self.attached = False
+        self._started = time.perf_counter()
+        self._events = queue.Queue()
+
+    def emit(self, event, **data):
+        data.setdefault("elapsed_ms", round((time.perf_counter() - self._started) * 1000, 1))
+        self._events.put((event, data))
+
+    @contextmanager
+    def stage(self, name):
+        """Time a pipeline stage, emitting `stage_start` and `stage_end` (or `error`) events."""
+        self.emit("stage_start", stage=name)
+        start = time.perf_counter()
+        try:
+            yield self
+        except Exception as e:
+            self.emit("error", stage=name, error=str(e))
+            raise
+        finally:
+            duration_ms = round((time.perf_counter() - start) * 1000, 1)
+            self.timings[name] = self.timings.get(name, 0) + duration_ms
+        self.emit("stage_end", stage=name, duration_ms=duration_ms)
+
+    def rows(self, stage, count):
+        """Report the number of rows processed by a stage."""
+        self.emit("rows", stage=stage, count=int(count))
+
+    def done(self, **data):
+        """Emit the final event and close the channel."""
+        self.emit("done", timings=self.timings, **data)
+        self.closed = True
+
+    def stream(self, heartbeat_seconds=15):
+        """Yield SSE-formatted events until the job is done."""
+        while True:
+            timeout = heartbeat_seconds
+            if not self.attached:
+                timeout = max(min(timeout, self.created + JOB_WAIT_SECONDS - time.time()), 0.1)
+            try:
+                event, data = self._events.get(timeout=timeout)
+            except queue.Empty:
+                if not self.attached and time.time() - self.created >= JOB_WAIT_SECONDS:
+                    message = "No request for this job reached this server process"
+                    yield f"event: unknown_job\ndata: {json.dumps({'job_id': self.job_id, 'error': message})}\n\n"
+                    break
+                if time.time() - self.created > CHANNEL_TTL_SECONDS:
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+            if event == "done":
+                break
+        _discard_channel(self.job_id)
+
+
+class NullChannel(ProgressChannel):
+    """Channel used when the client did not ask for progress; records timings only."""
+
+    def __init__(self):
+        super().__init__(None)
+
+    def emit(self, event, **data):
+        pass
+
+
+_channels = {}
+_channels_lock = threading.Lock()
+
+
+def get_channel(job_id):
+    """
+    Return the channel for a job, creating it if needed; called by the request running the job.
+
+    Either side may arrive first: the EventSource connection or the POST that runs the job.
+    A missing job id gives a NullChannel so routes can instrument stages unconditionally.
+    """
+    if not job_id:
+        return NullChannel()
+    channel = _channel(job_id)
+    channel.attached = True
+    return channel
+
+
+def stream_channel(job_id):
+    """Return the channel for a job to stream, without claiming it for the job."""
+    return _channel(job_id)
+
+
+def _channel(job_id):
+    now = time.time()
+    with _channels_lock:
+        for stale in [key for key, ch in _channels.items() if now - ch.created > CHANNEL_TTL_SECONDS]:
+            del _channels[stale]
+        channel = _channels.get(job_id)
+        if channel is None:
+            channel = _channels[job_id] = ProgressChannel(job_id)
+        return channel
+
+
+def _discard_channel(job_id):
+    with _channels_lock:
+        _channels.pop(job_id, None)
@@ -0,0 +1,151 @@
+"""
+Continuous verification scores for a METAR/forecast comparison.
+
+Alongside the hit rates from compare_weather_data, `continuous_scores` reports how far
+off the forecasts were: bias (mean forecast minus actual), MAE and RMSE for wind speed,
+temperature and QNH, the circular mean and mean absolute error of wind direction, and
+the vector wind error from u/v components. Scores are grouped per day, per month and per
+station with one groupby-sum over per-row error terms, so the cost is a handful of array
+operations whatever the length of the archive.
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.utils.metar import element_values
+
+# Elements scored with bias/MAE/RMSE and the merged-frame prefix of their score columns
+LINEAR_ELEMENTS = {
+    "Wind Speed": "WIND_SPEED",
+    "Temperature": "TEMP",
+    "QNH": "QNH",
+}
+
+LEVELS = ("day", "month", "station")
+
+
+def _wind_components(direction, speed):
+    """u (east) and v (north) components of a wind blowing from `direction` degrees."""
+    radians = np.deg2rad(direction)
+    return -speed * np.sin(radians), -speed * np.cos(radians)
+
+
+def _error_terms(merged_df):
+    """
+    Per-row sums that the grouped scores are built from.
+
+    Every score is a ratio of group sums (e.g. MAE = sum |e| / n), so rows without a
+    value contribute 0 to the sums and 0 to the count.
+    """
+    terms = {}
+    for name, prefix in LINEAR_ELEMENTS.items():
+        actual, forecast, _, _ = element_values(merged_df, name)
+        if prefix == "WIND_SPEED":  # whole knots, as in compare_weather_data
+            actual, forecast = np.trunc(actual), np.trunc(forecast)
+        error = forecast - actual
+        valid = ~np.isnan(error)
+        error = np.where(valid, error, 0.0)
+        terms[f"{prefix}_N"] = valid
+        terms[f"{prefix}_SUM"] = error
+        terms[f"{prefix}_ABS"] = np.abs(error)
+        terms[f"{prefix}_SQ"] = error ** 2
+
+    # Direction: signed difference wrapped to [-180, 180); VRB or missing is skipped
+    actual_dir, forecast_dir, _, _ = element_values(merged_df, "Wind Direction")
+    difference = (np.trunc(forecast_dir) - np.trunc(actual_dir) + 180) % 360 - 180
+    valid = ~np.isnan(difference)
+    radians = np.deg2rad(np.where(valid, difference, 0.0))
+    terms["WIND_DIR_N"] = valid
+    terms["WIND_DIR_SIN"] = np.where(valid, np.sin(radians), 0.0)
+    terms["WIND_DIR_COS"] = np.where(valid, np.cos(radians), 0.0)
+    terms["WIND_DIR_ABS"] = np.where(valid, np.abs(difference), 0.0)
+
+    # Vector wind error needs direction and speed on both sides
+    actual_speed, forecast_speed, _, _ = element_values(merged_df, "Wind Speed")
+    actual_u, actual_v = _wind_components(actual_dir, actual_speed)
+    forecast_u, forecast_v = _wind_components(forecast_dir, forecast_speed)
+    vector_error = np.hypot(forecast_u - actual_u, forecast_v - actual_v)
+    valid = ~np.isnan(vector_error)
+    vector_error = np.where(valid, vector_error, 0.0)
+    terms["VECTOR_WIND_N"] = valid
+    terms["VECTOR_WIND_SUM"] = vector_error
+    terms["VECTOR_WIND_SQ"] = vector_error ** 2
+    return pd.DataFrame(terms)
+
+
+def _scores_from_sums(sums):
+    """Turn grouped term sums into the score columns."""
+    scores = pd.DataFrame(index=sums.index)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for prefix in LINEAR_ELEMENTS.values():
+            count = sums[f"{prefix}_N"]
+            scores[f"{prefix}_N"] = count
+            scores[f"{prefix}_BIAS"] = sums[f"{prefix}_SUM"] / count
+            scores[f"{prefix}_MAE"] = sums[f"{prefix}_ABS"] / count
+            scores[f"{prefix}_RMSE"] = np.sqrt(sums[f"{prefix}_SQ"] / count)
+
+        count = sums["WIND_DIR_N"]
+        scores["WIND_DIR_N"] = count
+        circular_mean = np.rad2deg(np.arctan2(sums["WIND_DIR_SIN"], sums["WIND_DIR_COS"]))
+        scores["WIND_DIR_BIAS"] = circular_mean.where(count > 0)
+        scores["WIND_DIR_MAE"] = sums["WIND_DIR_ABS"] / count
+
+        count = sums["VECTOR_WIND_N"]
+        scores["VECTOR_WIND_N"] = count
+        scores["VECTOR_WIND_ERROR"] = sums["VECTOR_WIND_SUM"] / count
+        scores["VECTOR_WIND_RMSE"] = np.sqrt(sums["VECTOR_WIND_SQ"] / count)
+    return scores.round(2)
+
+
+def continuous_scores(merged_df, station=None):
+    """
+    Bias, MAE, RMSE, circular direction error and vector wind error per day, month and station.
+
+    Args:
+        merged_df (pd.DataFrame): The merged frame returned by compare_weather_data.
+        station (str): ICAO code; a STATION column in merged_df takes precedence
+            (multi-station archives).
+
+    Returns:
+        pd.DataFrame: One row per group with LEVEL ("day", "month" or "station"),
+        STATION and PERIOD (day label, "YYYY-MM", or "All"), then for WIND_SPEED (KT),
+        TEMP (°C) and QNH (hPa) the _N, _BIAS, _MAE and _RMSE columns, WIND_DIR_N,
+        WIND_DIR_BIAS (circular mean of forecast minus actual, degrees) and WIND_DIR_MAE,
+        and VECTOR_WIND_N, VECTOR_WIND_ERROR and VECTOR_WIND_RMSE (KT). Scores are NaN
+        for a group without any comparable value.
+    """
+    if merged_df is None or merged_df.empty:
+        return pd.DataFrame()
+    terms = _error_terms(merged_df)
+    if "STATION" in merged_df.columns:
+        stations = merged_df["STATION"].astype(str).to_numpy()
+    else:
+        stations = np.full(len(merged_df), station or "ALL", dtype=object)
+    months = pd.to_datetime(merged_df["DATETIME"]).dt.strftime("%Y-%m").to_numpy()
+    days = merged_df["DAY"].astype(str).to_numpy()
+
+    # The sums are additive, so months and stations are rolled up from the day groups
+    day_sums = terms.groupby([stations, months, days], sort=True).sum()
+    grouped = {
+        "day": day_sums.droplevel(1),
+        "month": day_sums.groupby(level=[0, 1], sort=True).sum(),
+        "station": day_sums.groupby(level=0, sort=True).sum(),
+    }
+    grouped["station"].index = pd.MultiIndex.from_arrays(
+        [grouped["station"].index, ["All"] * len(grouped["station"])]
+    )
+
+    frames = []
+    for level in LEVELS:
+        scores = _scores_from_sums(grouped[level])
+        scores.index = scores.index.set_names(["STATION", "PERIOD"])
+        scores = scores.reset_index()
+        scores.insert(0, "LEVEL", level)
+        frames.append(scores)
+    return pd.concat(frames, ignore_index=True)
+
+
+def score_records(scores, level="station"):
+    """Rows of one level as JSON-ready dicts (NaN becomes None)."""
+    rows = scores[scores["LEVEL"] == level]
+    return rows.astype(object).where(rows.notna(), None).to_dict(orient="records")
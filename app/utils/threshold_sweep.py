@@ -0,0 +1,130 @@
+"""
+Score many tolerance sets against one METAR/forecast comparison.
+
+compare_weather_data scores a single set of thresholds. `sweep_thresholds` takes the
+merged frame it returns, computes the per-element error arrays once, and broadcasts them
+against a grid of threshold sets, so the sensitivity of ICAO compliance to the tolerance
+choice comes out of one vectorised pass instead of one pipeline run per combination.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from app.utils.metar import ELEMENTS, comparison_errors, element_hits
+from app.utils.metrics import instrumented
+
+# compare_weather_data keyword for each element's tolerance
+THRESHOLD_ARGS = {
+    "Wind Direction": "wind_dir_threshold",
+    "Wind Speed": "wind_speed_threshold",
+    "Temperature": "temp_threshold",
+    "QNH": "qnh_threshold",
+}
+
+DEFAULT_THRESHOLDS = {
+    "wind_dir_threshold": 30,
+    "wind_speed_threshold": 5,
+    "temp_threshold": 1,
+    "qnh_threshold": 1,
+}
+
+ICAO_TARGET = 80.0
+
+# Upper bound on threshold sets x rows evaluated at once, to cap memory on long archives
+CHUNK_CELLS = 20_000_000
+
+
+def threshold_grid(**values):
+    """
+    Build every combination of the given tolerances.
+
+    Example:
+        threshold_grid(wind_dir_threshold=[20, 30], temp_threshold=[1, 2])
+        # -> 4 sets; the speed and QNH tolerances keep their defaults
+
+    Returns:
+        list: Dicts of compare_weather_data threshold keywords.
+    """
+    unknown = set(values) - set(DEFAULT_THRESHOLDS)
+    if unknown:
+        raise ValueError(f"Unknown thresholds: {sorted(unknown)}")
+    axes = {name: list(values.get(name, [default])) for name, default in DEFAULT_THRESHOLDS.items()}
+    return [dict(zip(axes, combination)) for combination in itertools.product(*axes.values())]
+
+
+def _count_per_day(flags, day_codes, day_count):
+    """Sum (sets, rows) flags into (sets, days + 1) counts; the last column is the whole period."""
+    sets = flags.shape[0]
+    bins = (np.arange(sets)[:, np.newaxis] * day_count + day_codes).ravel()
+    counts = np.bincount(bins, weights=flags.ravel(), minlength=sets * day_count).reshape(sets, day_count)
+    return np.concatenate([counts, counts.sum(axis=1, keepdims=True)], axis=1).astype(np.int64)
+
+
+@instrumented("threshold_sweep")
+def sweep_thresholds(merged_df, threshold_sets):
+    """
+    Compliance of every threshold set, per day and element.
+
+    Args:
+        merged_df (pd.DataFrame): The merged frame returned by compare_weather_data.
+        threshold_sets (list): Dicts of compare_weather_data threshold keywords; missing
+            keys use the defaults (see threshold_grid).
+
+    Returns:
+        dict: "threshold_sets", "days" (ending with "Whole Month"), "elements" (ending
+        with "Overall"), "totals" (comparisons per day), "hits" (int array of shape
+        sets x days x elements) and "compliance" (percentages, same shape).
+    """
+    threshold_sets = [{**DEFAULT_THRESHOLDS, **thresholds} for thresholds in threshold_sets]
+    elements = list(ELEMENTS) + ["Overall"]
+    day_codes, days = pd.factorize(merged_df["DAY"], sort=True)
+    days = list(days) + ["Whole Month"]
+    totals = np.append(np.bincount(day_codes, minlength=len(days) - 1), len(merged_df))
+
+    errors = comparison_errors(merged_df)
+    limits = {
+        name: np.array([float(t[THRESHOLD_ARGS[name]]) for t in threshold_sets])[:, np.newaxis]
+        for name in ELEMENTS
+    }
+    hits = np.zeros((len(threshold_sets), len(days), len(elements)), dtype=np.int64)
+    step = max(1, CHUNK_CELLS // max(len(merged_df), 1))
+    for start in range(0, len(threshold_sets), step):
+        block = slice(start, start + step)
+        overall = None
+        for index, name in enumerate(ELEMENTS):
+            flags = element_hits(name, *errors[name], limits[name][block])
+            overall = flags if overall is None else overall & flags
+            hits[block, :, index] = _count_per_day(flags, day_codes, len(days) - 1)
+        hits[block, :, -1] = _count_per_day(overall, day_codes, len(days) - 1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        compliance = np.round(100 * hits / totals[np.newaxis, :, np.newaxis], 1)
+    return {
+        "threshold_sets": threshold_sets,
+        "days": days,
+        "elements": elements,
+        "totals": totals,
+        "hits": hits,
+        "compliance": compliance,
+    }
+
+
+def sweep_frame(sweep):
+    """
+    Flatten a sweep_thresholds result into one row per threshold set, day and element.
+
+    Columns: the four threshold keywords, DAY, ELEMENT, HITS, TOTAL, COMPLIANCE and
+    MEETS_ICAO (compliance of at least 80%).
+    """
+    sets, days, elements = len(sweep["threshold_sets"]), len(sweep["days"]), len(sweep["elements"])
+    set_index, day_index, element_index = np.indices((sets, days, elements)).reshape(3, -1)
+    frame = pd.DataFrame(sweep["threshold_sets"]).iloc[set_index].reset_index(drop=True)
+    frame["DAY"] = np.array(sweep["days"], dtype=object)[day_index]
+    frame["ELEMENT"] = np.array(sweep["elements"], dtype=object)[element_index]
+    frame["HITS"] = sweep["hits"].reshape(-1)
+    frame["TOTAL"] = sweep["totals"][day_index]
+    frame["COMPLIANCE"] = sweep["compliance"].reshape(-1)
+    frame["MEETS_ICAO"] = frame["COMPLIANCE"] >= ICAO_TARGET
+    return frame
@@ -0,0 +1,393 @@
+"""
+Integer time keys for matching observations with forecasts.
+
+Times are keyed as minutes since 1970-01-01 (int64), so keys sort chronologically,
+compare without string formatting and cross month and year boundaries. METARs and
+TAKEOFF forecasts only carry DAY and HHMM; the month comes from a YEAR/MONTH column, or
+the reference month passed in, and advances whenever the day number wraps back (e.g.
+31 -> 01) in a file covering several months.
+
+The text forms found in the input files are parsed here too, at fixed offsets and in
+bulk: OGIMET YYYYMMDDHHMM prefixes (`stamp_keys`), DDHHMM(Z) time groups
+(`time_group_keys`) and aerodrome warning VALID groups (`validity_keys`). Each takes an
+array of strings and returns keys, -1 for values that do not parse; groups without a
+month take it from a (year, month) period.
+"""
+
+import re
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+MINUTES_PER_DAY = 1440
+
+# Reference month when neither frame says which month it covers (a 31-day month)
+DEFAULT_PERIOD = (2000, 1)
+
+# A drop in day number larger than this starts the next month; smaller drops are
+# out-of-order or corrected reports within the same month
+DAY_WRAP = 14
+
+# Text forms of a time: "202507010030 METAR ...", "010030Z", "VALID 010100/010500"
+OGIMET_PREFIX_RE = re.compile(r"^(\d{4})(\d{2})(\d{2})(\d{2})(\d{2})\b")
+TIME_GROUP_RE = re.compile(r"\b(\d{2})(\d{2})(\d{2})Z\b")
+VALID_GROUP_RE = re.compile(r"VALID\s*(\d{6,8})/(\d{6,8})")
+
+STAMP_FORMAT = "%Y%m%d%H%M"
+
+
+def month_starts(year, month):
+    """Epoch minute of 00:00Z on the first of each (year, month)."""
+    months = np.asarray(year, dtype=np.int64) * 12 + np.asarray(month, dtype=np.int64) - 1
+    return (months - 1970 * 12).astype("datetime64[M]").astype("datetime64[m]").astype(np.int64)
+
+
+def epoch_minutes(year, month, day, hour, minute):
+    """
+    Epoch-minute keys for arrays (or scalars) of time fields.
+
+    Days are counted from the start of the month without calendar checks, so day 31
+    of a 30-day month is the first minute-range of the next month.
+    """
+    day = np.asarray(day, dtype=np.int64)
+    hour = np.asarray(hour, dtype=np.int64)
+    minute = np.asarray(minute, dtype=np.int64)
+    return month_starts(year, month) + (day - 1) * MINUTES_PER_DAY + hour * 60 + minute
+
+
+def days_in_month(year, month):
+    """Number of days in each (year, month)."""
+    year = np.asarray(year, dtype=np.int64)
+    month = np.asarray(month, dtype=np.int64)
+    return (month_starts(year + month // 12, month % 12 + 1) - month_starts(year, month)) // MINUTES_PER_DAY
+
+
+def current_period():
+    """(year, month) of the current UTC month, for groups read without any other context."""
+    now = datetime.now(timezone.utc)
+    return now.year, now.month
+
+
+def _fixed_digits(values, width):
+    """
+    Leading `width` characters of each string as digit values.
+
+    Returns:
+        tuple: (digits, ok) where digits is an (n, width) int64 array (non-digit
+        characters give values outside 0-9) and ok marks rows that are all digits.
+    """
+    text = np.asarray(values, dtype=f"U{width}").reshape(-1)
+    digits = text.view(np.uint32).reshape(len(text), width).astype(np.int64) - ord("0")
+    return digits, ((digits >= 0) & (digits <= 9)).all(axis=1)
+
+
+def _field(digits, start, stop):
+    """Integer value of digit columns start:stop."""
+    return digits[:, start:stop] @ (10 ** np.arange(stop - start - 1, -1, -1, dtype=np.int64))
+
+
+def _day_time_valid(year, month, day, hour, minute, allow_2400=False):
+    """Calendar check; 2400 is accepted (as the next day's 0000) only with allow_2400."""
+    valid = (month >= 1) & (month <= 12) & (day >= 1) & (minute >= 0) & (minute < 60) & (hour >= 0)
+    valid &= (hour < 24) | (allow_2400 & (hour == 24) & (minute == 0))
+    return valid & (day <= days_in_month(year, np.clip(month, 1, 12)))
+
+
+def stamp_keys(values, with_time=True):
+    """
+    Parse YYYYMMDDHHMM stamps (or YYYYMMDD dates with with_time=False) in bulk.
+
+    A value may continue after the stamp (an OGIMET line such as "202507010030 METAR
+    ..."), but not with another digit.
+
+    Args:
+        values (array-like): Strings.
+        with_time (bool): Whether the stamps carry HHMM.
+
+    Returns:
+        np.ndarray: int64 epoch-minute keys, -1 where a value does not parse.
+    """
+    width = 12 if with_time else 8
+    digits, _ = _fixed_digits(values, width + 1)
+    is_digit = (digits >= 0) & (digits <= 9)
+    ok = is_digit[:, :width].all(axis=1) & ~is_digit[:, width]
+    year, month, day = _field(digits, 0, 4), _field(digits, 4, 6), _field(digits, 6, 8)
+    hour = _field(digits, 8, 10) if with_time else np.zeros_like(year)
+    minute = _field(digits, 10, 12) if with_time else np.zeros_like(year)
+    valid = ok & _day_time_valid(year, month, day, hour, minute)
+    keys = epoch_minutes(
+        np.where(valid, year, 2000), np.where(valid, month, 1),
+        np.where(valid, day, 1), np.where(valid, hour, 0), np.where(valid, minute, 0),
+    )
+    return np.where(valid, keys, -1)
+
+
+def parse_stamp(text, with_time=True):
+    """Key of one YYYYMMDDHHMM (or YYYYMMDD) stamp, or None if it does not parse."""
+    key = int(stamp_keys([text or ""], with_time=with_time)[0])
+    return key if key >= 0 else None
+
+
+def stamp_datetime(text):
+    """
+    One YYYYMMDDHHMM stamp as a naive datetime.
+
+    Raises:
+        ValueError: If `text` is not a valid stamp, like datetime.strptime would.
+    """
+    text = (text or "").strip()
+    key = parse_stamp(text) if len(text) == 12 else None
+    if key is None:
+        raise ValueError(f"time data {text!r} does not match format {STAMP_FORMAT!r}")
+    return key_timestamps([key])[0].to_pydatetime()
+
+
+def _rolled_month_index(day, valid, month_index):
+    """Advance the month wherever the day number wraps back between valid rows of one month."""
+    valid_rows = np.flatnonzero(valid)
+    wrapped = np.zeros(len(day), dtype=np.int64)
+    if len(valid_rows) > 1:
+        drops = (np.diff(day[valid_rows]) < -DAY_WRAP) & (np.diff(month_index[valid_rows]) == 0)
+        wrapped[valid_rows[1:]] = np.cumsum(drops)
+    return month_index + wrapped
+
+
+def _keys_in(month_index, day, hour, minute, ok, allow_2400):
+    """Keys of day/time fields in the given months (as year * 12 + month - 1), -1 if invalid."""
+    years, months = month_index // 12, month_index % 12 + 1
+    valid = ok & _day_time_valid(years, months, day, hour, minute, allow_2400)
+    keys = epoch_minutes(
+        years, months, np.where(valid, day, 1), np.where(valid, hour, 0), np.where(valid, minute, 0)
+    )
+    return np.where(valid, keys, -1)
+
+
+def _group_keys(day, hour, minute, ok, period, roll, allow_2400):
+    year, month = period or current_period()
+    month_index = np.full(len(day), year * 12 + month - 1, dtype=np.int64)
+    if roll:
+        month_index = _rolled_month_index(day, ok & (day >= 1) & (day <= 31), month_index)
+    return _keys_in(month_index, day, hour, minute, ok, allow_2400)
+
+
+def time_group_keys(values, period=None, roll=True):
+    """
+    Parse DDHHMM or DDHHMMZ groups in bulk.
+
+    Args:
+        values (array-like): Strings starting with the group (e.g. "010030Z").
+        period (tuple): (year, month) of the first group; defaults to the current month.
+        roll (bool): Move to the next month each time the day number wraps back, for
+            groups in file order.
+
+    Returns:
+        np.ndarray: int64 epoch-minute keys, -1 where a group does not parse or does
+        not exist in its month.
+    """
+    digits, ok = _fixed_digits(values, 6)
+    return _group_keys(
+        _field(digits, 0, 2), _field(digits, 2, 4), _field(digits, 4, 6), ok, period, roll, False
+    )
+
+
+def _nearest_keys(day, hour, minute, ok, reference, allow_2400):
+    """Day/time fields in whichever month (the reference's, the one before or after) puts them nearest the reference key."""
+    years, months = key_periods(np.where(reference >= 0, reference, 0))
+    month_index = years * 12 + months - 1
+    candidates = np.stack([
+        _keys_in(month_index + shift, day, hour, minute, ok, allow_2400) for shift in (-1, 0, 1)
+    ])
+    distance = np.where(candidates >= 0, np.abs(candidates - reference), np.iinfo(np.int64).max)
+    keys = np.take_along_axis(candidates, distance.argmin(axis=0)[np.newaxis], axis=0)[0]
+    return np.where(reference >= 0, keys, -1)
+
+
+def validity_keys(starts, ends, period=None, reference=None):
+    """
+    Parse the two halves of warning VALID groups ("010100/010500") in bulk.
+
+    Only the last six digits (DDHHMM) of each half are used, and 2400 is the end of the
+    day. A start is placed in the month nearest its `reference` key (e.g. the time of
+    the bulletin it came in), so bulletins from several months can be read together;
+    without one, starts roll over months in file order like time_group_keys. An end
+    earlier than its start falls in the following month.
+
+    Args:
+        starts, ends (array-like): "DDHHMM" or "DDHHMMZ" strings.
+        period (tuple): (year, month) of the first start, for rows without a reference.
+        reference (array-like): Optional epoch-minute key per row, -1 where unknown.
+
+    Returns:
+        tuple: (start keys, end keys), -1 where a half does not parse.
+    """
+    halves = []
+    for values in (starts, ends):
+        text = [str(value).strip().rstrip("Z")[-6:] for value in np.asarray(values, dtype=object).reshape(-1)]
+        digits, ok = _fixed_digits(text, 6)
+        halves.append((_field(digits, 0, 2), _field(digits, 2, 4), _field(digits, 4, 6), ok))
+
+    if reference is None:
+        start = _group_keys(*halves[0], period, True, True)
+    else:
+        reference = np.asarray(reference, dtype=np.int64)
+        start = _nearest_keys(*halves[0], reference, True)
+        unknown = reference < 0
+        if unknown.any():
+            start[unknown] = _group_keys(*(field[unknown] for field in halves[0]), period, True, True)
+
+    # Each end is read in its start's month, or the next one if it would come first
+    years, months = key_periods(np.where(start >= 0, start, 0))
+    month_index = years * 12 + months - 1
+    same = _keys_in(month_index, *halves[1], True)
+    following = _keys_in(month_index + 1, *halves[1], True)
+    end = np.where((same >= 0) & (same >= start), same, following)
+    return start, np.where(start >= 0, end, -1)
+
+
+def key_periods(keys):
+    """(year, month) arrays of epoch-minute keys."""
+    year, month, _, _, _ = key_fields(keys)
+    return year, month
+
+
+def key_fields(keys):
+    """(year, month, day, hour, minute) int64 arrays of epoch-minute keys."""
+    keys = np.asarray(keys, dtype=np.int64)
+    dates = (keys // MINUTES_PER_DAY).astype("datetime64[D]")
+    months = dates.astype("datetime64[M]")
+    month_index = months.astype(np.int64) + 1970 * 12
+    day = (dates - months).astype(np.int64) + 1
+    return month_index // 12, month_index % 12 + 1, day, keys % MINUTES_PER_DAY // 60, keys % 60
+
+
+# strftime codes format_keys fills in itself
+_FORMAT_FIELDS = {"%Y": "{0:04d}", "%m": "{1:02d}", "%d": "{2:02d}", "%H": "{3:02d}", "%M": "{4:02d}"}
+
+
+def format_keys(keys, fmt=STAMP_FORMAT):
+    """Format keys as strings (YYYYMMDDHHMM by default); None for -1."""
+    keys = np.asarray(keys, dtype=np.int64)
+    valid = keys >= 0
+    template = fmt.replace("{", "{{").replace("}", "}}")
+    for code, field in _FORMAT_FIELDS.items():
+        template = template.replace(code, field)
+    if "%" in template:  # other strftime codes
+        formatted = key_timestamps(np.where(valid, keys, 0)).strftime(fmt)
+    else:
+        fields = [field.tolist() for field in key_fields(np.where(valid, keys, 0))]
+        formatted = [template.format(*row) for row in zip(*fields)]
+    return [text if ok else None for text, ok in zip(formatted, valid.tolist())]
+
+
+def _by_value(series, parse):
+    """
+    Apply `parse` (Series -> float array) to the distinct values of a column only.
+
+    DAY, TIME, MONTH and YEAR hold a few hundred distinct values at most, so this is
+    much cheaper than parsing every row of a multi-month frame.
+    """
+    codes, uniques = pd.factorize(series)
+    parsed = np.append(np.asarray(parse(pd.Series(uniques, dtype=object)), dtype=np.float64), np.nan)
+    return parsed[codes]  # code -1 (missing) picks the trailing NaN
+
+
+def _numeric(values):
+    return pd.to_numeric(values, errors="coerce")
+
+
+def _column(frame, name):
+    """A numeric column as float64 with NaN for missing or unparseable values, or None."""
+    if name not in frame.columns:
+        return None
+    column = frame[name]
+    if pd.api.types.is_numeric_dtype(column.dtype) and not pd.api.types.is_bool_dtype(column.dtype):
+        return column.to_numpy(dtype=np.float64, na_value=np.nan)
+    return _by_value(column, _numeric)
+
+
+def frame_period(frame):
+    """Return the (year, month) of the first row with YEAR and MONTH set, or None."""
+    year, month = _column(frame, "YEAR"), _column(frame, "MONTH")
+    if year is None or month is None:
+        return None
+    known = np.flatnonzero(~np.isnan(year) & ~np.isnan(month))
+    return (int(year[known[0]]), int(month[known[0]])) if len(known) else None
+
+
+def frame_minute_keys(frame, period=None):
+    """
+    Epoch-minute keys for a frame with DAY and TIME ("HHMMZ") columns.
+
+    YEAR and MONTH columns are used where present; otherwise rows fall in `period` (or
+    DEFAULT_PERIOD) and move on a month each time the day number wraps back. The frame
+    is not modified.
+
+    Args:
+        frame (pd.DataFrame): Decoded METARs or forecast rows, in file order.
+        period (tuple): (year, month) for rows without YEAR/MONTH.
+
+    Returns:
+        np.ndarray: int64 keys, -1 where DAY or TIME is missing or invalid.
+    """
+    if not len(frame):
+        return np.empty(0, dtype=np.int64)
+    year, month = period or DEFAULT_PERIOD
+    row_year, row_month = _column(frame, "YEAR"), _column(frame, "MONTH")
+    years = np.where(np.isnan(row_year), year, row_year) if row_year is not None else np.full(len(frame), year)
+    months = np.where(np.isnan(row_month), month, row_month) if row_month is not None else np.full(len(frame), month)
+    month_index = years.astype(np.int64) * 12 + months.astype(np.int64) - 1
+
+    day = _column(frame, "DAY")
+    hour = _by_value(frame["TIME"], lambda times: _numeric(times.astype(str).str[:2]))
+    minute = _by_value(frame["TIME"], lambda times: _numeric(times.astype(str).str[2:4]))
+    valid = (day >= 1) & (day <= 31) & (hour >= 0) & (hour <= 24) & (minute >= 0) & (minute < 60)
+
+    # Roll the month forward on a day wrap between valid rows of the same stated month
+    month_index = _rolled_month_index(day, valid, month_index)
+
+    keys = epoch_minutes(
+        month_index // 12, month_index % 12 + 1,
+        np.where(valid, day, 1), np.where(valid, hour, 0), np.where(valid, minute, 0),
+    )
+    return np.where(valid, keys, -1)
+
+
+def first_occurrences(keys):
+    """Positions of the first row for each valid key, in key order."""
+    unique_keys, positions = np.unique(keys, return_index=True)
+    keep = unique_keys >= 0
+    return unique_keys[keep], positions[keep]
+
+
+def asof_match(left_keys, right_keys, tolerance=10):
+    """
+    Match each left key to the nearest right key within `tolerance` minutes.
+
+    Both key arrays must be sorted. Ties go to the earlier right key.
+
+    Returns:
+        tuple: (left positions, right positions) of the matched pairs, in left order.
+    """
+    left_keys = np.asarray(left_keys, dtype=np.int64)
+    right_keys = np.asarray(right_keys, dtype=np.int64)
+    if not len(left_keys) or not len(right_keys):
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+    no_match = np.iinfo(np.int64).max
+    after = np.searchsorted(right_keys, left_keys, side="left")
+    before = after - 1
+    after_key = right_keys[np.minimum(after, len(right_keys) - 1)]
+    before_key = right_keys[np.maximum(before, 0)]
+    after_gap = np.where(after < len(right_keys), after_key - left_keys, no_match)
+    before_gap = np.where(before >= 0, left_keys - before_key, no_match)
+    use_before = before_gap <= after_gap
+    nearest = np.where(use_before, before, after)
+    gap = np.where(use_before, before_gap, after_gap)
+    matched = np.flatnonzero(gap <= tolerance)
+    return matched, nearest[matched]
+
+
+def key_timestamps(keys):
+    """Convert epoch-minute keys to pandas Timestamps."""
+    return pd.to_datetime(np.asarray(keys, dtype=np.int64), unit="m")
@@ -1,10 +1,29 @@
 import os
+from collections import namedtuple
 from PyPDF2 import PdfReader
 import re
-from datetime import datetime, timedelta
+from datetime import datetime
+import numpy as np
 from app.utils.ogimet import OgimetAPI
+from app.utils.log import get_logger
+from app.utils.metrics import instrumented
+from app.utils.phenomena import forecast_phenomena, match_phenomena
+from app.utils.timekeys import STAMP_FORMAT, format_keys, parse_stamp, stamp_keys, validity_keys
 
+logger = get_logger(__name__)
 
+WeatherSlice = namedtuple("WeatherSlice", [
+    "start",     # epoch-minute key the slice starts at
+    "end",       # epoch-minute key the slice ends at (exclusive)
+    "changes",   # "BECMG"/"TEMPO" groups in force, e.g. ["TEMPO"]
+    "expected",  # weather codes that verify the slice; empty when no weather is forecast
+    "observed",  # forecast weather codes seen in the slice's METARs
+    "metars",    # number of METARs in the slice
+    "correct",   # bool, or None when the slice has no METARs
+])
+
+
+@instrumented("pdf_parse")
 def get_pdf_text(pdf_path):
     """
     Extract text content from a PDF file.
@@ -154,46 +173,134 @@ def get_bcmg_temp_data(weather_text):
     return changes
 
 
-def check_if_date_is_in_range(
-    start_time, end_time, total_start_time: datetime, total_end_time: datetime
-):
+def _period_key(value):
+    """Epoch-minute key of a datetime or YYYYMMDDHHMM string."""
+    if isinstance(value, datetime):
+        value = value.strftime(STAMP_FORMAT)
+    key = parse_stamp(str(value))
+    if key is None:
+        raise ValueError(f"Invalid forecast time: {value!r}")
+    return key
+
+
+def forecast_timeline(weather_text, start_time, end_time):
     """
-    Check if the given time range overlaps with more than half of the total time range.
+    Split a forecast period into slices with the weather expected in each.
+
+    The slices are cut at every BECMG and TEMPO time. The base weather holds until a
+    BECMG group has finished changing it; during the change either weather verifies,
+    and so does the weather of a TEMPO group in force. DDHH change times are placed
+    in the month nearest the period start, so periods across a month end read right.
 
     Args:
-        start_time (str): Start time in DDHH format
-        end_time (str): End time in DDHH format
-        total_start_time (datetime): Total range start time
-        total_end_time (datetime): Total range end time
+        weather_text (str): Weather section text (see parse_weather_section).
+        start_time, end_time (datetime or str): The forecast period (YYYYMMDDHHMM).
 
     Returns:
-        bool: True if time range overlaps with more than half of total range
+        list: WeatherSlice tuples in time order, without observations ("observed" empty,
+        "metars" 0, "correct" None).
     """
-    # Convert DDHH strings to datetime objects
-    start_day = int(start_time[:2])
-    start_hour = int(start_time[2:])
-    end_day = int(end_time[:2])
-    end_hour = int(end_time[2:])
-
-    # Create datetime objects using the base date from total_start_time
-    base_date = total_start_time.replace(hour=0, minute=0, second=0, microsecond=0)
-
-    # Calculate the actual datetime by adding days and hours to base date
-    range_start = base_date + timedelta(days=start_day - 1, hours=start_hour)
-    range_end = base_date + timedelta(days=end_day - 1, hours=end_hour)
+    start, end = _period_key(start_time), _period_key(end_time)
+    weather_text = " ".join(weather_text.split())
+    base = forecast_phenomena(format_weather_text(weather_text))
+    changes = get_bcmg_temp_data(weather_text)
+    change_starts, change_ends = validity_keys(
+        [change["start_time"] + "00" for change in changes],
+        [change["end_time"] + "00" for change in changes],
+        reference=np.full(len(changes), start, dtype=np.int64),
+    )
+    changes = [
+        (change["change_type"], int(first), int(last), forecast_phenomena(change["weather_data"]))
+        for change, first, last in zip(changes, change_starts, change_ends) if first >= 0
+    ]
+    becmg = sorted((change for change in changes if change[0] == "BECMG"), key=lambda change: change[1])
+    tempo = [change for change in changes if change[0] == "TEMPO"]
+
+    cuts = [start, end] + [time for _, first, last, _ in changes for time in (first, last)]
+    cuts = sorted({min(max(time, start), end) for time in cuts})
+    slices = []
+    for first, last in zip(cuts[:-1], cuts[1:]):
+        prevailing, alternatives, in_force = base, [], []
+        for kind, change_start, change_end, weather in becmg:
+            if change_end <= first:
+                prevailing = weather
+            elif change_start <= first:
+                alternatives += weather
+                in_force.append(kind)
+        for kind, change_start, change_end, weather in tempo:
+            if change_start <= first < change_end:
+                alternatives += weather
+                in_force.append(kind)
+        expected = list(dict.fromkeys(prevailing + alternatives))
+        slices.append(WeatherSlice(first, last, in_force, expected, [], 0, None))
+    return slices
+
+
+def evaluate_timeline(slices, metar_data):
+    """
+    Score each forecast slice against the METARs reported in it.
 
-    # Handle case where end time is before start time (crosses month boundary)
-    if range_end <= range_start:
-        range_end += timedelta(days=30)  # Assume next month
+    METAR weather groups are matched once for every phenomenon of the forecast and
+    bucketed into the slices by report time. A slice is correct when one of its
+    expected phenomena was observed in it; a slice forecasting no weather is correct
+    when none of the forecast phenomena was observed in it.
 
-    # Calculate the duration of the given time range in seconds
-    range_duration = (range_end - range_start).total_seconds()
+    Args:
+        slices (list): forecast_timeline output.
+        metar_data (str or list): METAR text or lines, OGIMET-prefixed.
 
-    # Calculate the duration of the total time range in seconds
-    total_duration = (total_end_time - total_start_time).total_seconds()
-    print(range_duration, total_duration, total_start_time, total_end_time)
-    # Check if the given range duration is more than half of the total duration
-    return range_duration > total_duration / 2
+    Returns:
+        list: The slices with "observed", "metars" and "correct" filled in.
+    """
+    if not slices:
+        return []
+    lines = metar_data.split("\n") if isinstance(metar_data, str) else list(metar_data)
+    bounds = np.array([piece.start for piece in slices] + [slices[-1].end], dtype=np.int64)
+
+    def slice_of(keys):
+        index = np.searchsorted(bounds, keys, side="right") - 1
+        return np.where((keys >= bounds[0]) & (keys < bounds[-1]), index, -1)
+
+    keys = stamp_keys(lines) if lines else np.empty(0, dtype=np.int64)
+    counts = np.bincount(slice_of(keys[keys >= 0]) + 1, minlength=len(slices) + 1)[1:]
+
+    phenomena = list(dict.fromkeys(phenomenon for piece in slices for phenomenon in piece.expected))
+    matches = match_phenomena(phenomena, lines)
+    observed = [[] for _ in slices]
+    for match, index in zip(matches, slice_of(np.array([match.key for match in matches], dtype=np.int64)).tolist()):
+        if index >= 0:
+            observed[index].append(match.phenomenon)
+
+    scored = []
+    for piece, seen, count in zip(slices, observed, counts.tolist()):
+        seen = list(dict.fromkeys(seen))
+        if not count:
+            correct = None
+        elif piece.expected:
+            correct = bool(set(piece.expected) & set(seen))
+        else:
+            correct = not seen
+        scored.append(piece._replace(observed=seen, metars=count, correct=correct))
+    return scored
+
+
+def timeline_accuracy(slices):
+    """Percentage of the scored forecast time (slices with METARs) that verified, or None."""
+    scored = [piece for piece in slices if piece.correct is not None]
+    total = sum(piece.end - piece.start for piece in scored)
+    if not total:
+        return None
+    return round(100 * sum(piece.end - piece.start for piece in scored if piece.correct) / total, 1)
+
+
+def timeline_rows(slices):
+    """Slices as JSON-ready dicts, with YYYYMMDDHHMM start and end times."""
+    starts = format_keys([piece.start for piece in slices])
+    ends = format_keys([piece.end for piece in slices])
+    return [
+        {**piece._asdict(), "start": first, "end": last}
+        for piece, first, last in zip(slices, starts, ends)
+    ]
 
 
 def is_accurate_weather_data(weather_data, metar_data):
@@ -205,104 +312,47 @@ def is_accurate_weather_data(weather_data, metar_data):
         metar_data (str): Raw METAR data as multiline string.
 
     Returns:
-        bool: True if any weather condition is found in METAR data, False otherwise.
+        bool: True if any weather condition was observed in a METAR (see
+        app.utils.phenomena), False otherwise.
     """
-    for line in metar_data.split("\n"):
-        for item in weather_data:
-            # Special case: if item is RA or SHRA, check for both
-            if item == "RA" or item == "SHRA":
-                if "RA" in line or "SHRA" in line:
-                    print(line)
-                    print(item)
-                    return True
-            elif item in line:
-                print(line)
-                print(item)
-                return True
-    return False
+    matches = match_phenomena(weather_data, metar_data.split("\n"))
+    if matches:
+        logger.debug("Forecast %s observed as %s", matches[0].phenomenon, matches[0].group)
+    return bool(matches)
 
 def process_weather_accuracy_helper(weather_text, start_datetime, end_datetime, icao):
-    accuracy_point = 0
-
+    """
+    Verify forecast weather against the METARs of its period, slice by slice.
 
+    Returns:
+        tuple: (accuracy, slices): the timeline_accuracy percentage (None without
+        METARs) and the evaluate_timeline slices.
+    """
     ins = OgimetAPI()
     file = ins.save_metar_to_file(begin=start_datetime, end=end_datetime, icao=icao)
     with open(file, "r") as f:
         metar_data = f.read()
 
-    weather_data = format_weather_text(weather_text)
-
-    print(weather_text + " " + str(weather_data))
-    print(
-        f"From {start_datetime} to {end_datetime}"
-    )
-
-    if is_accurate_weather_data(weather_data, metar_data):
-        accuracy_point = 100
-
-    if accuracy_point == 0:
-        print("Not accurate in 1st attempt")
-
-        temp_data = get_bcmg_temp_data(weather_text=weather_text)
-
-        for item in temp_data:
-
-            if check_if_date_is_in_range(
-                item["start_time"], item["end_time"], start_datetime, end_datetime
-            ):
-                print(item)
-                weather_data = item["weather_data"]
-
-                if is_accurate_weather_data(weather_data, metar_data):
-                    accuracy_point = 50
-                    break
-
-    return accuracy_point
+    slices = evaluate_timeline(forecast_timeline(weather_text, start_datetime, end_datetime), metar_data)
+    logger.debug("Weather timeline from %s to %s: %s", start_datetime, end_datetime, timeline_rows(slices))
+    return timeline_accuracy(slices), slices
 
 def process_single_file(forecast_file_path, icao="VABB"):
-    accuracy_point = 0
+    """
+    Verify the weather of one forecast PDF slice by slice.
+
+    Returns:
+        tuple: (accuracy, slices), as process_weather_accuracy_helper.
+    """
     text = get_pdf_text(forecast_file_path)
 
     weather_text = parse_weather_section(text)
     # weather_text = "FY BECMG 1100/1102 HZ FU TEMPO 1101/1103 HZ FU BECMG 1104/1109 FU"
-    weather_data = format_weather_text(weather_text)
     start_date, end_date = get_date_range(text)
 
     begin = start_date.strftime("%Y%m%d%H%M")
     end = end_date.strftime("%Y%m%d%H%M")
-
-    ins = OgimetAPI()
-    file = ins.save_metar_to_file(begin=begin, end=end, icao=icao)
-
-    with open(file, "r") as f:
-        metar_data = f.read()
-
-    print(weather_data)
-    print(
-        f"From {start_date.strftime('%Y/%m/%d %H:%MUTC')} to {end_date.strftime('%Y/%m/%d %H:%MUTC')}"
-    )
-
-    if is_accurate_weather_data(weather_data, metar_data):
-        accuracy_point = 100
-
-    if accuracy_point == 0:
-        print("Not accurate in 1st attempt")
-
-        temp_data = get_bcmg_temp_data(weather_text=weather_text)
-
-        for item in temp_data:
-
-            if check_if_date_is_in_range(
-                item["start_time"], item["end_time"], start_date, end_date
-            ):
-                print(item)
-                weather_data = item["weather_data"]
-
-                if is_accurate_weather_data(weather_data, metar_data):
-                    accuracy_point = 50
-                    break
-
-    return accuracy_point
+    return process_weather_accuracy_helper(weather_text, begin, end, icao)
 
 
 if __name__ == "__main__":
@@ -315,56 +365,27 @@ if __name__ == "__main__":
         2. Extracts weather data and date ranges
         3. Fetches corresponding METAR data
         4. Compares forecast accuracy
-        5. Handles BECMG/TEMPO conditions if initial comparison fails
+        5. Scores each BECMG/TEMPO slice of the forecast period
 
-        Prints accuracy scores (0, 50, or 100) for each processed file.
+        Prints the slices and the accuracy of each processed file.
         """
         for file in os.listdir("pdf"):
-            accuracy_point = 0
             text = get_pdf_text(f"pdf/{file}")
 
             weather_text = parse_weather_section(text)
             weather_text = (
                 "FY BECMG 1100/1102 HZ FU TEMPO 1101/1103 HZ FU BECMG 1104/1109 FU"
             )
-            weather_data = format_weather_text(weather_text)
             start_date, end_date = get_date_range(text)
 
             begin = start_date.strftime("%Y%m%d%H%M")
             end = end_date.strftime("%Y%m%d%H%M")
 
-            ins = OgimetAPI()
-            file = ins.save_metar_to_file(begin=begin, end=end, icao="VABB")
-
-            with open(file, "r") as f:
-                metar_data = f.read()
-
-            print(weather_data)
-            print(
-                f"From {start_date.strftime('%Y/%m/%d %H:%MUTC')} to {end_date.strftime('%Y/%m/%d %H:%MUTC')}"
-            )
-
-            if is_accurate_weather_data(weather_data, metar_data):
-                accuracy_point = 100
-
-            if accuracy_point == 0:
-                print("Not accurate in 1st attempt")
-
-                temp_data = get_bcmg_temp_data(weather_text=weather_text)
-
-                for item in temp_data:
-
-                    if check_if_date_is_in_range(
-                        item["start_time"], item["end_time"], start_date, end_date
-                    ):
-                        print(item)
-                        weather_data = item["weather_data"]
-
-                        if is_accurate_weather_data(weather_data, metar_data):
-                            accuracy_point = 50
-                            break
+            accuracy, slices = process_weather_accuracy_helper(weather_text, begin, end, "VABB")
 
-            print(f"Accurare point:", accuracy_point)
+            for row in timeline_rows(slices):
+                print(row)
+            print(f"Accuracy:", accuracy)
             print("--------------------------------")
 
 
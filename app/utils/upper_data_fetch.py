@@ -3,8 +3,13 @@ from urllib.parse import quote
 from app.config import UPPER_AIR_DATA_DIR 
 import os
 from werkzeug.utils import secure_filename
+from app.utils.metrics import instrumented
+from app.utils.log import get_logger
 
+logger = get_logger(__name__)
 
+
+@instrumented("uwyo_fetch")
 def fetch_upper_air_data(datetime_str: str, station_id: str, src: str = 'UNKNOWN', data_type: str = 'TEXT:CSV') -> str:
     """
     Fetch upper air sounding data from University of Wyoming's weather site.
@@ -25,12 +30,12 @@ def fetch_upper_air_data(datetime_str: str, station_id: str, src: str = 'UNKNOWN
     datetime_encoded = quote(datetime_str)
     full_url = f"{base_url}?datetime={datetime_encoded}&id={station_id}&src={src}&type={data_type}"
 
-    print(f"[DEBUG] Called fetch_upper_air_data with datetime_str={datetime_str}, station_id={station_id}")
-    print(f"[DEBUG] Fetching from URL: {full_url}")
+    logger.debug("Called fetch_upper_air_data with datetime_str=%s, station_id=%s", datetime_str, station_id)
+    logger.debug("Fetching from URL: %s", full_url)
     response = requests.get(full_url)
 
-    print(f"[DEBUG] Response status: {response.status_code}")
-    print(f"[DEBUG] Response first 100 chars: {response.text[:100]}")
+    logger.debug("Response status: %s", response.status_code)
+    logger.debug("Response first 100 chars: %s", response.text[:100])
 
     if response.status_code == 200:
         if '<html>' in response.text.lower():
@@ -41,15 +46,15 @@ def fetch_upper_air_data(datetime_str: str, station_id: str, src: str = 'UNKNOWN
         dt = datetime_str.replace(":", "").replace("-", "").replace(" ", "_")
         filename = secure_filename(f"upper_air_{station_id}_{dt}.csv")
         file_path = os.path.join(download_dir, filename)
-        print(f"[DEBUG] Saving to: {file_path}")
         with open(file_path, "w", encoding="utf-8") as f:
             f.write(response.text)
-        print(f"[INFO] Data saved to {file_path}")
+        logger.info("Data saved to %s", file_path)
         return file_path
     else:
         raise Exception(f"Failed to fetch data. HTTP Status Code: {response.status_code}")
     
 import pandas as pd
+@instrumented("interpolation")
 def interpolate_temperature_only(actual_df, forecast_df):
     results = []
 
@@ -67,12 +72,12 @@ def interpolate_temperature_only(actual_df, forecast_df):
         upper = above.iloc[0]
 
         h1, h2 = lower["geopotential height_m"], upper["geopotential height_m"]
-        print(f"[DEBUG] Lower level: {h1} m, Upper level: {h2} m for forecast altitude {forecast_alt} m")
+        logger.debug("Lower level: %s m, Upper level: %s m for forecast altitude %s m", h1, h2, forecast_alt)
         t1, t2 = lower["temperature_C"], upper["temperature_C"]
 
         # Interpolate temperature
         interp_temp = ((h2 - forecast_alt) * t1 + (forecast_alt - h1) * t2) / (h2 - h1)
-        print(f"[DEBUG] Interpolated temperature at {forecast_alt} m: {interp_temp:.2f} C")
+        logger.debug("Interpolated temperature at %s m: %.2f C", forecast_alt, interp_temp)
 
         # For other parameters, take the closer one (nearest actual level)
         if abs(h1 - forecast_alt) <= abs(h2 - forecast_alt):
@@ -216,6 +221,7 @@ from openpyxl import Workbook
 from openpyxl.styles import Border, Side, Font, Alignment
 from openpyxl.utils import get_column_letter
 
+@instrumented("xlsx_write")
 def generate_upper_air_verification_xlsx(data_rows, metadata, file_path, weather_info=None):
     wb = Workbook()
     ws = wb.active
@@ -319,9 +325,6 @@ def generate_upper_air_verification_xlsx(data_rows, metadata, file_path, weather
 
     for idx, row in enumerate(filtered_rows):
         row_key = f"{row.get('date', '')}_{row.get('validity', '')}"
-        print(f"Checking weather_info for key: {row_key}")
-        if weather_info:
-            print("Available keys in weather_info:", weather_info.keys())
 
         values = [
             row.get("date", ""),
@@ -341,7 +344,7 @@ def generate_upper_air_verification_xlsx(data_rows, metadata, file_path, weather
         for col_num, val in enumerate(values, start=1):
             write_cell(ws, current_row, col_num, val)
         current_row += 1
-        print(values)
+        logger.debug("Wrote upper air row %s", values)
 
         # Check next row key
         next_row_key = None
@@ -354,7 +357,7 @@ def generate_upper_air_verification_xlsx(data_rows, metadata, file_path, weather
             weather_realised = " / ".join(weather_info.get(row_key, {}).get("matched", [])) if weather_info else ""
             weather_accuracy = weather_info.get(row_key, {}).get("accuracy", "") if weather_info else ""
 
-            print(f"Writing weather row for {row_key}")  # DEBUG
+            logger.debug("Writing weather row for %s (weather_info keys: %s)", row_key, list(weather_info or {}))
             weather_row = [
                 row.get("date", ""),
                 row.get("validity", ""),
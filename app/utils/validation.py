@@ -1,38 +1,23 @@
-import re
-from datetime import datetime, timedelta
 import os
 
+from app.utils.log import get_logger
+from app.utils.file_profile import issue_date_key, profile_metar_file, profile_warning_file
+from app.utils.timekeys import format_keys
+
+logger = get_logger(__name__)
+
+# METAR data must start within this many days of the warning issue date
+DATE_RANGE_DAYS = 30
+
 def extract_icao_from_metar(metar_file_path):
     """
     Extract ICAO station code from METAR file.
     METAR format: ICAO YYYYMMDDHHMMZ AUTO or similar
     """
     try:
-        with open(metar_file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        for line in lines:
-            line = line.strip()
-            if line:
-                # METAR format typically starts with 4-letter ICAO code
-                # Look for pattern: 4 uppercase letters followed by space or timestamp
-                match = re.match(r'^([A-Z]{4})\s+', line)
-                if match:
-                    return match.group(1)
-                
-                # Also check for ICAO code in the middle of the line (some formats)
-                match_middle = re.search(r'\b([A-Z]{4})\s+\d{6}Z', line)
-                if match_middle:
-                    return match_middle.group(1)
-                
-                # Check for ICAO code followed by any timestamp format
-                match_any = re.search(r'\b([A-Z]{4})\s+\d{8,12}', line)
-                if match_any:
-                    return match_any.group(1)
-        
-        return None
+        return profile_metar_file(metar_file_path).station
     except Exception as e:
-        print(f"Error extracting ICAO from METAR file: {e}")
+        logger.warning("Error extracting ICAO from METAR file: %s", e)
         return None
 
 def extract_icao_from_warning(warning_file_path):
@@ -41,26 +26,9 @@ def extract_icao_from_warning(warning_file_path):
     Warning format typically has ICAO code in the first few lines
     """
     try:
-        with open(warning_file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        for line in lines:
-            line = line.strip()
-            if line:
-                # Look for 4-letter ICAO code pattern
-                # Common patterns: "VABB" or "VABB 231105Z" etc.
-                match = re.search(r'\b([A-Z]{4})\b', line)
-                if match:
-                    return match.group(1)
-                
-                # Also check for ICAO code followed by date/time
-                match_with_time = re.search(r'\b([A-Z]{4})\s+\d{6}Z', line)
-                if match_with_time:
-                    return match_with_time.group(1)
-        
-        return None
+        return profile_warning_file(warning_file_path).station
     except Exception as e:
-        print(f"Error extracting ICAO from warning file: {e}")
+        logger.warning("Error extracting ICAO from warning file: %s", e)
         return None
 
 def extract_issue_date_from_warning(warning_file_path):
@@ -69,64 +37,20 @@ def extract_issue_date_from_warning(warning_file_path):
     Expected format: YYYYMMDD in the first line
     """
     try:
-        with open(warning_file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        # Check first few lines for date patterns
-        for line in lines[:5]:  # Check first 5 lines
-            line = line.strip()
-            if line:
-                # Look for YYYYMMDD pattern
-                match = re.search(r'(\d{8})', line)
-                if match:
-                    return match.group(1)
-                
-                # Also check for DDMMYYYY format and convert
-                ddmm_match = re.search(r'(\d{2})(\d{2})(\d{4})', line)
-                if ddmm_match:
-                    day, month, year = ddmm_match.groups()
-                    return f"{year}{month}{day}"
-        
-        return None
+        return profile_warning_file(warning_file_path).issue_date
     except Exception as e:
-        print(f"Error extracting issue date from warning file: {e}")
+        logger.warning("Error extracting issue date from warning file: %s", e)
         return None
 
 def extract_metar_timestamps(metar_file_path):
     """
-    Extract timestamps from METAR file.
-    Look for YYYYMMDDHHMM format in the first 12 digits of each METAR record.
+    Extract timestamps from METAR file as YYYYMMDDHHMM strings.
+    Reports without an OGIMET prefix take the year and month of the report before them.
     """
-    timestamps = []
     try:
-        with open(metar_file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        for line in lines:
-            line = line.strip()
-            if line:
-                # Look for YYYYMMDDHHMM pattern (12 digits)
-                match = re.search(r'(\d{12})', line)
-                if match:
-                    timestamp = match.group(1)
-                    timestamps.append(timestamp)
-                
-                # Also check for DDHHMMZ format and convert to YYYYMMDDHHMM
-                # This is common in METAR files where date is in a different format
-                ddhmm_match = re.search(r'(\d{6})Z', line)
-                if ddhmm_match:
-                    ddhmm = ddhmm_match.group(1)
-                    # Try to extract year from the line or use current year
-                    year_match = re.search(r'(\d{4})', line)
-                    if year_match:
-                        year = year_match.group(1)
-                        # Construct full timestamp
-                        timestamp = f"{year}{ddhmm}"
-                        timestamps.append(timestamp)
-        
-        return timestamps
+        return format_keys(profile_metar_file(metar_file_path).timestamps)
     except Exception as e:
-        print(f"Error extracting METAR timestamps: {e}")
+        logger.warning("Error extracting METAR timestamps: %s", e)
         return []
 
 def validate_station_code_match(metar_file_path, warning_file_path):
@@ -159,37 +83,21 @@ def validate_date_range_match(metar_file_path, warning_file_path):
     Returns:
         tuple: (is_valid, error_message)
     """
-    # Extract issue date from warning file
-    issue_date_str = extract_issue_date_from_warning(warning_file_path)
-    if not issue_date_str:
-        return False, "Could not extract issue date from warning file"
-    
     try:
+        # Extract issue date from warning file
+        issue_date_str = profile_warning_file(warning_file_path).issue_date
+        if not issue_date_str:
+            return False, "Could not extract issue date from warning file"
+
         # Parse issue date (YYYYMMDD format)
-        issue_date = datetime.strptime(issue_date_str, "%Y%m%d")
-        
-        # Calculate 30-day range
-        range_start = issue_date
-        range_end = issue_date + timedelta(days=30)
-        
-        # Extract METAR timestamps
-        metar_timestamps = extract_metar_timestamps(metar_file_path)
-        if not metar_timestamps:
-            return False, "Could not extract timestamps from METAR file"
-        
+        range_start = issue_date_key(issue_date_str)
+
         # Check if any METAR timestamp falls within the range
-        valid_timestamps = []
-        for timestamp in metar_timestamps:
-            try:
-                # Parse timestamp (YYYYMMDDHHMM format)
-                metar_datetime = datetime.strptime(timestamp, "%Y%m%d%H%M")
-                if range_start <= metar_datetime <= range_end:
-                    valid_timestamps.append(metar_datetime)
-            except ValueError:
-                # Skip invalid timestamps
-                continue
-        
-        if not valid_timestamps:
+        metar_profile = profile_metar_file(metar_file_path)
+        if not metar_profile.record_count:
+            return False, "Could not extract timestamps from METAR file"
+
+        if not metar_profile.within(range_start, DATE_RANGE_DAYS):
             return False, "No METAR data falls within the valid warning period (within 30 days)"
         
         return True, None
@@ -204,7 +112,8 @@ def validate_files(metar_file_path, warning_file_path):
     Perform complete validation of METAR and warning files.
     
     Returns:
-        dict: Validation results with success status and error messages
+        dict: Validation results with success status and error messages; on success
+        also the FileProfile of each file ('metar_profile', 'warning_profile')
     """
     # Check if files exist
     if not os.path.exists(metar_file_path):
@@ -247,5 +156,7 @@ def validate_files(metar_file_path, warning_file_path):
         'success': True,
         'metar_code': metar_code,
         'warning_code': warning_code,
-        'message': 'Validation successful'
+        'message': 'Validation successful',
+        'metar_profile': profile_metar_file(metar_file_path),
+        'warning_profile': profile_warning_file(warning_file_path)
     } 
\ No newline at end of file
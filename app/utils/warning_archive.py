@@ -0,0 +1,366 @@
+"""
+Persistent archive of aerodrome warnings.
+
+parse_warning_file reads one bulletin into AD_warn_output.csv, which the next upload
+overwrites. The archive keeps every warning it is given in an SQLite database
+(WARNING_ARCHIVE_PATH), one row per (station, issue time, validity start) and indexed by
+station and validity start, so the warnings of any station and period are a range query
+away and come back in the AD_warn_output.csv layout the scoring code reads.
+
+`ingest_files` parses bulletins in worker processes and writes them in one transaction.
+A warning found in several bulletins is stored once. Cancellations ("CNL AD WRNG 03")
+go in their own table and are applied across bulletins, so a warning cancelled in a
+later file ends where it was cancelled whatever order the files come in. Files whose
+content was ingested before are skipped.
+
+Times are epoch-minute keys (see app.utils.timekeys).
+"""
+
+import multiprocessing
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from app.config import WARNING_ARCHIVE_PATH
+from app.utils.AD_warn import FULL_TIME_FORMAT, HALF_HOUR, WARNING_COLUMNS, apply_cancellations, warning_frame
+from app.utils.file_profile import profile_warning_file
+from app.utils.log import get_logger
+from app.utils.parse_cache import hash_file
+from app.utils.timekeys import format_keys, stamp_keys, validity_keys
+from app.utils.warning_bulletin import iter_warnings
+from app.utils.warning_coverage import validity_window_keys
+
+logger = get_logger(__name__)
+
+# Longest validity of a warning: bounds the index range a query scans, and how long
+# after a warning was issued a cancellation can still refer to it
+MAX_VALIDITY = 2 * 1440
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS warnings (
+    station TEXT NOT NULL,
+    issue_key INTEGER NOT NULL,
+    valid_from INTEGER NOT NULL,
+    valid_to INTEGER NOT NULL,
+    number INTEGER,
+    wind_dir INTEGER,
+    wind_speed TEXT NOT NULL,
+    gust TEXT NOT NULL,
+    sig_wx TEXT NOT NULL,
+    fcst_obs TEXT NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (station, issue_key, valid_from)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS warnings_by_time ON warnings (station, valid_from);
+CREATE TABLE IF NOT EXISTS cancellations (
+    station TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    issue_key INTEGER NOT NULL,
+    cut_key INTEGER NOT NULL,
+    PRIMARY KEY (station, number, issue_key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sources (
+    digest TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    warnings INTEGER NOT NULL,
+    ingested_at TEXT NOT NULL
+);
+"""
+
+# A warning seen again keeps its first text; a cancelled copy shortens it
+UPSERT_WARNING = """
+INSERT INTO warnings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (station, issue_key, valid_from) DO UPDATE SET valid_to = MIN(valid_to, excluded.valid_to)
+"""
+
+TABLE_COLUMNS = WARNING_COLUMNS[:4] + ["Valid from (UTC)", "Valid to (UTC)"] + WARNING_COLUMNS[4:]
+
+
+def worker_pool(workers=None):
+    """
+    Executor for CPU-bound parsing: forked processes, or threads where fork is unavailable.
+
+    Spawned processes would import app.config afresh, which clears the static data
+    directories that running requests write to.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+def _group_keys(groups, reference, period):
+    """Keys of DDHHMM groups in the month nearest `reference` (rolled from `period` where it is -1)."""
+    return validity_keys(groups, groups, period=period, reference=reference)[0]
+
+
+def parse_bulletin(file_path):
+    """
+    Warnings and cancellations of one bulletin file, in archive form.
+
+    Returns:
+        dict: "warnings" (row tuples for the warnings table, without those whose issue
+        time or validity cannot be read) and "cancellations" ((station, number, issue
+        key, cut key) tuples; the cut is rounded up to the half hour, like a validity end).
+    """
+    profile = profile_warning_file(file_path)
+    period = (int(profile.issue_date[:4]), int(profile.issue_date[4:6])) if profile.issue_date else None
+    records = list(iter_warnings(profile.lines))
+    kept = apply_cancellations(records)
+
+    warnings = []
+    if kept:
+        df = warning_frame(kept, period)
+        start, end = validity_window_keys(df)
+        bulletin = stamp_keys([r.bulletin for r in kept])
+        issued = _group_keys([r.issued for r in kept], np.where(bulletin >= 0, bulletin, start), period)
+        usable = (issued >= 0) & (start >= 0) & (end >= 0)
+        if not usable.all():
+            logger.debug("%d warnings without a readable issue time or validity in %s", int((~usable).sum()), file_path)
+        wind_dir = df["Wind dir (deg)"].astype(object).where(df["Wind dir (deg)"].notna(), None)
+        warnings = [
+            (r.station, key, valid_from, valid_to, r.number, None if direction is None else int(direction),
+             r.wind_speed, r.gust, r.sig_wx, r.fcst_obs, profile.digest)
+            for r, key, valid_from, valid_to, direction, ok in zip(
+                kept, issued.tolist(), start.tolist(), end.tolist(), wind_dir.tolist(), usable.tolist()
+            )
+            if ok
+        ]
+
+    cancels = [r for r in records if r.cancels is not None]
+    cancellations = []
+    if cancels:
+        reference = stamp_keys([r.bulletin for r in cancels])
+        cancel_issued = _group_keys([r.issued for r in cancels], reference, period)
+        cut = _group_keys(
+            [r.valid_from or r.issued for r in cancels], np.where(reference >= 0, reference, cancel_issued), period
+        )
+        cut = np.where(cut >= 0, cut + (-cut) % HALF_HOUR, -1)
+        cancellations = [
+            (r.station, r.cancels[0], key, cut_key)
+            for r, key, cut_key in zip(cancels, cancel_issued.tolist(), cut.tolist())
+            if key >= 0 and cut_key >= 0
+        ]
+    return {"warnings": warnings, "cancellations": cancellations}
+
+
+def _table(rows):
+    """Archive rows as a warning table in the AD_warn_output.csv layout."""
+    issued, start, end = (rows[column].to_numpy(np.int64) for column in ("issue_key", "valid_from", "valid_to"))
+    return pd.DataFrame({
+        "Station": rows["station"].tolist(),
+        "Issue date/time": format_keys(issued, "%d/%H%M"),
+        "Validity from": [f"{group}Z" for group in format_keys(start, "%d%H%M")],
+        "Validity To": [f"{group}Z" for group in format_keys(end, "%d%H%M")],
+        "Valid from (UTC)": format_keys(start, FULL_TIME_FORMAT),
+        "Valid to (UTC)": format_keys(end, FULL_TIME_FORMAT),
+        "Wind dir (deg)": pd.to_numeric(rows["wind_dir"], errors="coerce").astype("Int64").tolist(),
+        "Wind Speed": rows["wind_speed"].tolist(),
+        "Gust": rows["gust"].tolist(),
+        "Significant Wx": rows["sig_wx"].tolist(),
+        "FCST/OBS": rows["fcst_obs"].tolist(),
+    }, columns=TABLE_COLUMNS).astype({"Wind dir (deg)": "Int64"})
+
+
+class WarningArchive:
+    """
+    SQLite store of parsed aerodrome warnings.
+
+    Args:
+        path (str): Database file; created with its tables on first use.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    @contextmanager
+    def _connection(self):
+        """A connection inside one transaction, committed on success."""
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def ingest(self, file_paths, workers=None):
+        """
+        Parse bulletin files and add their warnings.
+
+        Args:
+            file_paths (iterable of str): Bulletin files.
+            workers (int): Parsing processes when there are several files (default:
+                one per CPU); 1 parses in this process.
+
+        Returns:
+            dict: "files" (ingested), "skipped" (content already in the archive),
+            "warnings" and "cancellations" (rows read), "cancelled" (archived warnings
+            shortened or removed by cancellations) and "failed" ({path: error}).
+        """
+        pending, skipped, failed = {}, 0, {}
+        with self._connection() as connection:
+            known = {digest for (digest,) in connection.execute("SELECT digest FROM sources")}
+        for path in file_paths:
+            try:
+                digest = hash_file(path)
+            except OSError as e:
+                failed[path] = str(e)
+                continue
+            if digest in known or digest in pending.values():
+                skipped += 1
+            else:
+                pending[path] = digest
+
+        parsed = {}
+        if len(pending) > 1 and workers != 1:
+            with worker_pool(workers) as pool:
+                futures = {path: pool.submit(parse_bulletin, path) for path in pending}
+                for path, future in futures.items():
+                    try:
+                        parsed[path] = future.result()
+                    except Exception as e:
+                        failed[path] = str(e)
+        else:
+            for path in pending:
+                try:
+                    parsed[path] = parse_bulletin(path)
+                except Exception as e:
+                    failed[path] = str(e)
+        for path, error in failed.items():
+            logger.warning("Could not ingest warning bulletin %s: %s", path, error)
+
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._connection() as connection:
+            for path, result in parsed.items():
+                connection.executemany(UPSERT_WARNING, result["warnings"])
+                connection.executemany("INSERT OR IGNORE INTO cancellations VALUES (?, ?, ?, ?)", result["cancellations"])
+                connection.execute(
+                    "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                    (pending[path], path, len(result["warnings"]), now),
+                )
+            stations = sorted({row[0] for result in parsed.values() for row in result["warnings"] + result["cancellations"]})
+            cancelled = self._apply_cancellations(connection, stations) if stations else 0
+
+        return {
+            "files": len(parsed),
+            "skipped": skipped,
+            "warnings": sum(len(result["warnings"]) for result in parsed.values()),
+            "cancellations": sum(len(result["cancellations"]) for result in parsed.values()),
+            "cancelled": cancelled,
+            "failed": failed,
+        }
+
+    def _apply_cancellations(self, connection, stations):
+        """
+        End each cancelled warning of `stations` where it was cancelled.
+
+        A cancellation refers to the latest warning of its station and number issued at
+        or before it (within MAX_VALIDITY). A warning cancelled before it started is
+        removed. Cutting only ever shortens a warning, so this can be repeated.
+
+        Returns:
+            int: Warnings shortened or removed.
+        """
+        marks = ", ".join("?" * len(stations))
+        cancellations = pd.read_sql_query(
+            f"SELECT station, number, issue_key, cut_key FROM cancellations WHERE station IN ({marks})",
+            connection, params=stations,
+        )
+        warnings = pd.read_sql_query(
+            f"SELECT station, number, issue_key, valid_from, valid_to FROM warnings "
+            f"WHERE number IS NOT NULL AND station IN ({marks})",
+            connection, params=stations,
+        )
+        if cancellations.empty or warnings.empty:
+            return 0
+        warnings["number"] = warnings["number"].astype(np.int64)
+        warnings["target"] = warnings["issue_key"]
+        matched = pd.merge_asof(
+            cancellations.sort_values("issue_key"), warnings.sort_values("issue_key"),
+            on="issue_key", by=["station", "number"], direction="backward", tolerance=MAX_VALIDITY,
+        ).dropna(subset=["target"])
+        matched = matched[matched["cut_key"] < matched["valid_to"]]
+        removed = matched["cut_key"] <= matched["valid_from"]
+
+        def keys(frame):
+            return zip(frame["station"].tolist(), frame["target"].astype(np.int64).tolist(),
+                       frame["valid_from"].astype(np.int64).tolist())
+
+        connection.executemany(
+            "DELETE FROM warnings WHERE station = ? AND issue_key = ? AND valid_from = ?", keys(matched[removed])
+        )
+        connection.executemany(
+            "UPDATE warnings SET valid_to = MIN(valid_to, ?) WHERE station = ? AND issue_key = ? AND valid_from = ?",
+            ((cut, *key) for cut, key in zip(matched[~removed]["cut_key"].tolist(), keys(matched[~removed]))),
+        )
+        return len(matched)
+
+    def warnings(self, station, start, end):
+        """
+        Warnings of a station valid at some time in [start, end).
+
+        Args:
+            station (str): ICAO code.
+            start, end (int): Epoch-minute keys.
+
+        Returns:
+            pd.DataFrame: The AD_warn_output.csv layout, ordered by issue time.
+        """
+        with self._connection() as connection:
+            rows = pd.read_sql_query(
+                "SELECT * FROM warnings WHERE station = ? AND valid_from >= ? AND valid_from < ? AND valid_to > ? "
+                "ORDER BY issue_key, valid_from",
+                connection, params=(station, int(start) - MAX_VALIDITY, int(end), int(start)),
+            )
+        return _table(rows)
+
+    def stations(self):
+        """
+        Archived stations with their warning count and first and last validity times.
+
+        Returns:
+            list: Dicts "station", "warnings", "first" and "last" (YYYY-MM-DD HH:MM).
+        """
+        with self._connection() as connection:
+            rows = connection.execute(
+                "SELECT station, COUNT(*), MIN(valid_from), MAX(valid_to) FROM warnings GROUP BY station ORDER BY station"
+            ).fetchall()
+        firsts = format_keys([row[2] for row in rows], FULL_TIME_FORMAT)
+        lasts = format_keys([row[3] for row in rows], FULL_TIME_FORMAT)
+        return [
+            {"station": station, "warnings": count, "first": first, "last": last}
+            for (station, count, _, _), first, last in zip(rows, firsts, lasts)
+        ]
+
+
+_archive = WarningArchive(WARNING_ARCHIVE_PATH)
+
+
+def ingest_files(file_paths, workers=None):
+    """Add bulletin files to the warning archive (see WarningArchive.ingest)."""
+    return _archive.ingest(file_paths, workers=workers)
+
+
+def query_warnings(station, start, end):
+    """Archived warnings of a station valid in [start, end) (see WarningArchive.warnings)."""
+    return _archive.warnings(station, start, end)
+
+
+def archived_stations():
+    """Stations in the warning archive (see WarningArchive.stations)."""
+    return _archive.stations()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Add aerodrome warning bulletins to the warning archive.")
+    parser.add_argument("files", nargs="+", help="Bulletin text files")
+    parser.add_argument("--workers", type=int, default=None, help="Parsing processes (default: one per CPU)")
+    args = parser.parse_args()
+    print(ingest_files(args.files, workers=args.workers))
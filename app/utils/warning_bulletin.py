@@ -0,0 +1,139 @@
+"""
+Streaming tokenizer for aerodrome warning bulletins.
+
+A bulletin file is a run of headings ("LIGHT AIRCRAFT WARNING FOR VABB - 20250701 01:00"),
+rule lines, day markers ("01") and warnings. A warning starts at its AD WRNG line
+("VABB 010030Z AD WRNG 01 VALID 010100/010500") and its text may run over several
+lines up to the closing "=". A warning that cancels an earlier one carries
+"CNL AD WRNG 03 010900/011300".
+
+`iter_warnings` walks the lines once, front to back, with module-level compiled
+patterns, and yields one WarningRecord per warning, so its cost is linear in the size of
+the file and `iter_warning_file` can stream a year of bulletins without loading it.
+"""
+
+import re
+from collections import namedtuple
+
+from app.utils.timekeys import VALID_GROUP_RE
+from app.utils.wind import parse_warning_wind
+
+WARNING_LINE_RE = re.compile(r"^(?P<station>[A-Z]{4})\s+(?P<issued>\d{6}Z?)\s+AD\s+WRNG\b\s*(?P<number>\d+)?")
+CANCEL_RE = re.compile(r"\bCNL\s+AD\s+WRNG\s+(\d+)(?:\s+(\d{6})/(\d{6}))?")
+HEADING_RE = re.compile(r"\bWARNING\b")
+# Bulletin heading time, e.g. "... FOR VABB - 20250701 01:00"
+BULLETIN_TIME_RE = re.compile(r"\b(\d{8})\s+(\d{2}):(\d{2})\b")
+RULE_RE = re.compile(r"^[-=_\s]+$")
+DAY_MARKER_RE = re.compile(r"^\d{1,2}$")
+
+# Thunderstorm groups in plain language, tried in order; the intensity gives the prefix
+SIG_WX_RES = (
+    (re.compile(r"(?:\b(HVY|FBL|MOD)\s+)?\bTSRA\b"), "TSRA"),
+    (re.compile(r"(?:\b(HVY|FBL|MOD)\s+)?\bTS\b"), "TS"),
+)
+INTENSITY_PREFIX = {"HVY": "+", "FBL": "-"}
+
+WarningRecord = namedtuple("WarningRecord", [
+    "station",     # ICAO code
+    "issued",      # issue group as written, e.g. "010030Z"
+    "number",      # warning number (int), or None
+    "valid_from",  # DDHHMM start, "" if the warning has no VALID group
+    "valid_to",    # DDHHMM end, ""
+    "wind_speed",  # "17KT" or ""
+    "gust",        # "27KT" or ""
+    "direction",   # direction as written ("WSW"), or ""
+    "wind_dir",    # direction in degrees, or ""
+    "sig_wx",      # "+TSRA", "TS", ... or ""
+    "fcst_obs",    # "FCST", "OBS" or ""
+    "bulletin",    # YYYYMMDDHHMM of the heading the warning was issued under, or ""
+    "cancels",     # (number, DDHHMM from or None, DDHHMM to or None) of a cancelled warning, or None
+])
+
+
+def significant_weather(text):
+    """Thunderstorm code of a warning text ("MOD TSRA WITH ..." -> "TSRA"), or ""."""
+    if "TS" not in text:
+        return ""
+    for pattern, code in SIG_WX_RES:
+        match = pattern.search(text)
+        if match:
+            return INTENSITY_PREFIX.get(match.group(1), "") + code
+    return ""
+
+
+def _record(match, text, bulletin):
+    """Build the WarningRecord of an AD WRNG line match and the warning text after it."""
+    valid = VALID_GROUP_RE.search(text)
+    body = text[valid.end():] if valid else text
+    cancel = CANCEL_RE.search(body) if "CNL" in body else None
+    wind_speed, gust, direction, wind_dir = parse_warning_wind(body)
+    number = match.group("number")
+    return WarningRecord(
+        station=match.group("station"),
+        issued=match.group("issued"),
+        number=int(number) if number else None,
+        valid_from=valid.group(1) if valid else "",
+        valid_to=valid.group(2) if valid else "",
+        wind_speed=wind_speed,
+        gust=gust,
+        direction=direction,
+        wind_dir=wind_dir,
+        sig_wx=significant_weather(body),
+        fcst_obs="FCST" if "FCST" in body else "OBS" if "OBS" in body else "",
+        bulletin=bulletin,
+        cancels=(int(cancel.group(1)), cancel.group(2), cancel.group(3)) if cancel else None,
+    )
+
+
+def _ends_text(line):
+    """Whether a line cannot continue a warning text (a heading, rule or day marker)."""
+    if "WARNING" in line and HEADING_RE.search(line):
+        return True
+    return bool(RULE_RE.match(line) or DAY_MARKER_RE.match(line))
+
+
+def iter_warnings(lines):
+    """
+    Tokenize bulletin lines into warnings in one forward pass.
+
+    A warning's text is its AD WRNG line plus the lines after it, up to the line ending
+    in "=" or the next AD WRNG line, heading, rule or day marker, whichever comes first.
+
+    Args:
+        lines (iterable of str): Bulletin lines (a file object works).
+
+    Yields:
+        WarningRecord: One per AD WRNG line, in file order.
+    """
+    bulletin = ""
+    current = None  # (AD WRNG match, text parts, bulletin)
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        match = WARNING_LINE_RE.match(line) if "WRNG" in line else None
+        if match is None and current is not None and not _ends_text(line):
+            current[1].append(line)
+        else:
+            if current is not None:
+                yield _record(current[0], " ".join(current[1]), current[2])
+                current = None
+            if match is not None:
+                current = (match, [line[match.end():]], bulletin)
+            elif "WARNING" in line and HEADING_RE.search(line):
+                heading_time = BULLETIN_TIME_RE.search(line)
+                if heading_time:
+                    bulletin = "".join(heading_time.groups())
+            if current is None:
+                continue
+        if line.endswith("="):
+            yield _record(current[0], " ".join(current[1]), current[2])
+            current = None
+    if current is not None:
+        yield _record(current[0], " ".join(current[1]), current[2])
+
+
+def iter_warning_file(file_path):
+    """Stream the warnings of a bulletin file (see iter_warnings)."""
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        yield from iter_warnings(f)
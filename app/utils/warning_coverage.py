@@ -0,0 +1,174 @@
+"""
+Missed-event detection and contingency scores for aerodrome warnings.
+
+The hit rates in generate_warning_report only look at what happened inside each
+warning's window. This module looks the other way too: which gust and thunderstorm
+events in the METARs (see app.utils.metar_events) had no warning at all, and how the
+two sides combine into POD, FAR and CSI.
+
+All validity windows of one warning type go into a `WarningIntervals` index (starts
+sorted, with a running maximum of the ends), so "does any window meet [a, b]" is one
+binary search, and the METARs of a month or a season are tested in a single vectorised
+`searchsorted`. Times are epoch-minute keys (see app.utils.timekeys).
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from app.utils.metar_events import GUST_THRESHOLD, detect_events, event_label, event_records
+from app.utils.timekeys import format_keys, stamp_keys
+
+GUST_WARNING_RE = re.compile(r"^\d{2,3}KT")
+TS_WARNING_RE = re.compile(r"TS", re.IGNORECASE)
+
+ELEMENTS = ("gust", "thunderstorm")
+
+
+class WarningIntervals:
+    """
+    Index over closed time windows [start, end] for overlap queries in O(log n).
+
+    Args:
+        starts, ends (array-like): Window bounds as epoch-minute keys; windows with a
+            missing (-1) or reversed bound are left out.
+    """
+
+    def __init__(self, starts, ends):
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        usable = (starts >= 0) & (ends >= starts)
+        order = np.argsort(starts[usable], kind="stable")
+        self.starts = starts[usable][order]
+        self.ends = ends[usable][order]
+        # reach[i]: the latest end among the first i + 1 windows
+        self._reach = np.maximum.accumulate(self.ends) if len(self.ends) else self.ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlaps(self, start, end):
+        """Bool array: whether each [start, end] meets at least one window."""
+        start = np.asarray(start, dtype=np.int64)
+        end = np.asarray(end, dtype=np.int64)
+        if not len(self):
+            return np.zeros(start.shape, dtype=bool)
+        last = np.searchsorted(self.starts, end, side="right") - 1
+        return (last >= 0) & (self._reach[np.maximum(last, 0)] >= start)
+
+    def covers(self, times):
+        """Bool array: whether each time falls inside a window."""
+        return self.overlaps(times, times)
+
+
+def validity_window_keys(warnings_df):
+    """
+    Validity window of every warning row as key arrays.
+
+    Returns:
+        tuple: (starts, ends) int64 arrays, -1 where the window could not be read.
+    """
+    if "Valid from (UTC)" not in warnings_df:
+        missing = np.full(len(warnings_df), -1, dtype=np.int64)
+        return missing, missing.copy()
+
+    def keys(column):
+        values = warnings_df[column].fillna("").astype(str).tolist()
+        return stamp_keys([re.sub(r"\D", "", value) for value in values])
+
+    return keys("Valid from (UTC)"), keys("Valid to (UTC)")
+
+
+def warning_windows(warnings_df, element):
+    """
+    Validity windows of one warning type as key arrays.
+
+    Args:
+        warnings_df (pd.DataFrame): The parse_warning_file table (or AD_warn_output.csv).
+        element (str): "gust" (a Gust value) or "thunderstorm" (TS in Significant Wx).
+
+    Returns:
+        tuple: (starts, ends) int64 arrays, -1 where the window could not be read.
+    """
+    column, pattern = ("Gust", GUST_WARNING_RE) if element == "gust" else ("Significant Wx", TS_WARNING_RE)
+    values = warnings_df[column].fillna("").astype(str) if column in warnings_df else pd.Series([], dtype=str)
+    chosen = np.array([bool(pattern.search(value)) for value in values], dtype=bool)
+    if not chosen.any() or "Valid from (UTC)" not in warnings_df:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    starts, ends = validity_window_keys(warnings_df)
+    return starts[chosen], ends[chosen]
+
+
+def _duration(minutes):
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m"
+
+
+def verify_warning_coverage(warnings_df, features, gust_threshold=GUST_THRESHOLD):
+    """
+    Missed events and contingency scores per element.
+
+    Hits and misses are counted on METAR events (see app.utils.metar_events; an event
+    is a hit when any warning of its type is valid while it is observed); false alarms
+    are warnings during which no event was observed. Gust warnings are checked against
+    gust events, thunderstorm warnings against TS or CB events.
+
+    Args:
+        warnings_df (pd.DataFrame): Warning table with "Valid from/to (UTC)" columns.
+        features (MetarFeatures): From build_metar_feature_arrays.
+        gust_threshold (int): Smallest gust (KT) that counts as a gust event.
+
+    Returns:
+        dict: {element: {"hits", "misses", "false_alarms", "warnings", "events", "pod",
+        "far", "csi", "missed": [Event, ...]}} for "gust" and "thunderstorm". Scores
+        are None when undefined.
+    """
+    results = {}
+    for element in ELEMENTS:
+        starts, ends = warning_windows(warnings_df, element)
+        windows = WarningIntervals(starts, ends)
+        events = detect_events(features, element, gust_threshold=gust_threshold)
+
+        warned = windows.overlaps(events.start, events.last_key)
+        observed = WarningIntervals(events.start, events.last_key).overlaps(windows.starts, windows.ends)
+        hits = int(warned.sum())
+        misses = int(len(warned) - hits)
+        false_alarms = int(len(observed) - observed.sum())
+        results[element] = {
+            "hits": hits,
+            "misses": misses,
+            "false_alarms": false_alarms,
+            "warnings": len(windows),
+            "events": len(events),
+            "pod": round(hits / (hits + misses), 3) if hits + misses else None,
+            "far": round(false_alarms / len(windows), 3) if len(windows) else None,
+            "csi": round(hits / (hits + misses + false_alarms), 3) if hits + misses + false_alarms else None,
+            "missed": events.select(~warned),
+        }
+    return results
+
+
+def describe_missed(events):
+    """
+    Table text for unwarned events, one per line: "G35KT/250 03/1200-03/1330 (1h30m)".
+
+    Returns "-" when there are none.
+    """
+    if not events:
+        return "-"
+    starts = format_keys([e.start for e in events], "%d/%H%M")
+    ends = format_keys([e.end for e in events], "%d/%H%M")
+    return "\n".join(
+        f"{event_label(e)} {start}-{end} ({_duration(e.end - e.start)})"
+        for e, start, end in zip(events, starts, ends)
+    )
+
+
+def coverage_summary(coverage):
+    """JSON-ready form of verify_warning_coverage output."""
+    summary = {}
+    for element, scores in coverage.items():
+        summary[element] = {name: value for name, value in scores.items() if name != "missed"}
+        summary[element]["missed"] = event_records(scores["missed"])
+    return summary
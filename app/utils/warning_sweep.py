@@ -0,0 +1,205 @@
+"""
+Score many verification settings for aerodrome warnings in one pass.
+
+generate_warning_report scores gust and thunderstorm warnings with fixed choices: a
+METAR gust must be within DIRECTION_TOLERANCE of the warned direction, any reported gust
+counts, and only the METARs of the validity window are looked at. `sweep_warning_settings`
+pairs every FCST warning with the METARs of its window widened by the largest padding
+asked for, keeps per pair the direction difference, the gust and how many minutes the
+report lies outside the window, and broadcasts those arrays against a grid of settings,
+so the accuracy of every combination comes out of one vectorised pass.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from app.utils.extract_metar_features import fcst_rows, validity_groups, warning_metar_arrays, warning_metar_rows
+from app.utils.generate_warning_report import DIRECTION_TOLERANCE, GUST_VALUE_RE, TSRA_REGEX
+from app.utils.metar_events import GUST_THRESHOLD
+from app.utils.metrics import instrumented
+from app.utils.timekeys import key_fields
+from app.utils.warning_coverage import validity_window_keys
+
+DEFAULT_SETTINGS = {
+    "direction_tolerance": DIRECTION_TOLERANCE,  # degrees
+    "gust_threshold": GUST_THRESHOLD,            # KT
+    "window_padding": 0,                         # minutes added before and after the window
+}
+
+ELEMENTS = ("Gust", "Thunderstorm", "Overall")
+
+# Upper bound on settings x METAR pairs evaluated at once, to cap memory on long archives
+CHUNK_CELLS = 20_000_000
+
+
+def sweep_grid(**values):
+    """
+    Build every combination of the given settings.
+
+    Example:
+        sweep_grid(direction_tolerance=[20, 30, 45], window_padding=[0, 30])
+        # -> 6 settings; the gust threshold keeps its default
+
+    Returns:
+        list: Dicts with the DEFAULT_SETTINGS keys.
+    """
+    unknown = set(values) - set(DEFAULT_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown settings: {sorted(unknown)}")
+    axes = {name: list(values.get(name, [default])) for name, default in DEFAULT_SETTINGS.items()}
+    return [dict(zip(axes, combination)) for combination in itertools.product(*axes.values())]
+
+
+def _ddhhmm(keys):
+    """DDHHMM ints of epoch-minute keys."""
+    _, _, day, hour, minute = key_fields(keys)
+    return day * 10000 + hour * 100 + minute
+
+
+def _padded_groups(groups, keys, minutes):
+    """Validity groups moved by `minutes`; groups whose key could not be read stay put."""
+    if not minutes:
+        return groups
+    return np.where(keys >= 0, _ddhhmm(np.maximum(keys + minutes, 0)), groups)
+
+
+def warning_sweep_pairs(ad_warn_df, profile, max_padding=0):
+    """
+    Every FCST warning with each METAR of its window padded by `max_padding` minutes.
+
+    Args:
+        ad_warn_df (pd.DataFrame): The AD_warn_output.csv table.
+        profile (FileProfile): The METAR file profile.
+        max_padding (int): Largest window padding that will be scored.
+
+    Returns:
+        dict: Pair arrays grouped by warning row: "row", "gust" (KT, NaN when none or
+        VRB), "difference" (degrees between the METAR and the warned direction, NaN when
+        either is missing), "cb" (bool, a CB cloud group) and "outside" (minutes the
+        report lies outside the window; 0 for the reports generate_warning_report uses).
+    """
+    metars = warning_metar_arrays(profile)
+    fcst, _ = fcst_rows(ad_warn_df)
+    valid_from = validity_groups(ad_warn_df["Validity from"].to_numpy()[fcst])
+    valid_to = validity_groups(ad_warn_df["Validity To"].to_numpy()[fcst])
+    start_keys, end_keys = (keys[fcst] for keys in validity_window_keys(ad_warn_df))
+
+    warning, metar = warning_metar_rows(valid_from, valid_to, metars["times"])
+    if max_padding:
+        inside = warning * len(metars["times"]) + metar
+        warning, metar = warning_metar_rows(
+            _padded_groups(valid_from, start_keys, -max_padding),
+            _padded_groups(valid_to, end_keys, max_padding),
+            metars["times"],
+        )
+        report_keys = np.asarray(profile.keys)[metar]
+        known = (report_keys >= 0) & (start_keys[warning] >= 0) & (end_keys[warning] >= 0)
+        outside = np.maximum(np.maximum(start_keys[warning] - report_keys, report_keys - end_keys[warning]), 0)
+        outside = np.where(known, outside, np.iinfo(np.int64).max)
+        outside[np.isin(warning * len(metars["times"]) + metar, inside)] = 0
+    else:
+        outside = np.zeros(len(warning), dtype=np.int64)
+
+    fcst_dir = pd.to_numeric(ad_warn_df["Wind dir (deg)"], errors="coerce").to_numpy(np.float64)[fcst]
+    with np.errstate(invalid="ignore"):
+        difference = np.abs(metars["wind_dir"][metar] - fcst_dir[warning]) % 360
+        difference = np.minimum(difference, 360 - difference)
+    cb = np.array([any("CB" in group for group in clouds) for clouds in metars["clouds"]] or [False], dtype=bool)
+    return {
+        "row": fcst[warning],
+        "gust": metars["gust"][metar],
+        "difference": difference,
+        "cb": cb[metar],
+        "outside": outside,
+    }
+
+
+def _rows_hit(flags, row, rows, count):
+    """(settings, rows) flags of the pairs reduced to whether any pair of each of `rows` is set."""
+    hit = np.zeros((flags.shape[0], count), dtype=bool)
+    if flags.shape[1]:
+        starts = np.flatnonzero(np.r_[True, row[1:] != row[:-1]])
+        hit[:, row[starts]] = np.logical_or.reduceat(flags, starts, axis=1)
+    return hit[:, rows]
+
+
+@instrumented("warning_sweep")
+def sweep_warning_settings(ad_warn_df, profile, settings):
+    """
+    Accuracy of gust and thunderstorm warnings under every verification setting.
+
+    A FCST gust warning is correct when a METAR of its (padded) window reports a gust of
+    at least `gust_threshold` KT from within `direction_tolerance` degrees of the warned
+    direction; a thunderstorm warning when one reports a CB cloud. OBS warnings count as
+    correct, as in generate_warning_report, whose result is the default setting.
+
+    Args:
+        ad_warn_df (pd.DataFrame): The AD_warn_output.csv table.
+        profile (FileProfile): The METAR file profile.
+        settings (list): Dicts with DEFAULT_SETTINGS keys; missing keys use the defaults
+            (see sweep_grid).
+
+    Returns:
+        dict: "settings", "elements" (ELEMENTS), "totals" (warnings per element), "hits"
+        (int array of shape settings x elements) and "accuracy" (percentages, same shape).
+    """
+    settings = [{**DEFAULT_SETTINGS, **setting} for setting in settings]
+    axes = {
+        name: np.array([float(setting[name]) for setting in settings])[:, np.newaxis]
+        for name in DEFAULT_SETTINGS
+    }
+    pairs = warning_sweep_pairs(ad_warn_df, profile, int(max(axes["window_padding"].max(initial=0), 0)))
+
+    _, fcst_obs = fcst_rows(ad_warn_df)
+    observed = np.array([value == "OBS" for value in fcst_obs], dtype=bool)
+    forecast = np.array([value == "FCST" for value in fcst_obs], dtype=bool)
+    gust_rows = np.array([bool(GUST_VALUE_RE.match(value)) for value in ad_warn_df["Gust"].astype(str)], dtype=bool)
+    ts_rows = np.array([bool(TSRA_REGEX.search(value)) for value in ad_warn_df["Significant Wx"].astype(str)], dtype=bool)
+    # Rows that are neither FCST nor OBS are never correct
+    gust_scored, ts_scored = np.flatnonzero(gust_rows & forecast), np.flatnonzero(ts_rows & forecast)
+
+    totals = np.array([gust_rows.sum(), ts_rows.sum(), gust_rows.sum() + ts_rows.sum()], dtype=np.int64)
+    hits = np.zeros((len(settings), len(ELEMENTS)), dtype=np.int64)
+    hits[:, 0] = np.count_nonzero(gust_rows & observed)
+    hits[:, 1] = np.count_nonzero(ts_rows & observed)
+
+    row, count = pairs["row"], len(ad_warn_df)
+    with np.errstate(invalid="ignore"):
+        gusty = ~np.isnan(pairs["gust"])
+        step = max(1, CHUNK_CELLS // max(len(row), 1))
+        for start in range(0, len(settings), step):
+            block = slice(start, start + step)
+            near = pairs["outside"] <= axes["window_padding"][block]
+            gust_flags = (near & gusty & (pairs["gust"] >= axes["gust_threshold"][block])
+                          & (pairs["difference"] <= axes["direction_tolerance"][block]))
+            hits[block, 0] += _rows_hit(gust_flags, row, gust_scored, count).sum(axis=1)
+            hits[block, 1] += _rows_hit(near & pairs["cb"], row, ts_scored, count).sum(axis=1)
+    hits[:, 2] = hits[:, 0] + hits[:, 1]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        accuracy = np.round(100 * hits / totals[np.newaxis, :], 1)
+    return {
+        "settings": settings,
+        "elements": list(ELEMENTS),
+        "totals": totals,
+        "hits": hits,
+        "accuracy": accuracy,
+    }
+
+
+def warning_sweep_frame(sweep):
+    """
+    Flatten a sweep_warning_settings result into one row per setting and element.
+
+    Columns: the three setting names, ELEMENT, HITS, TOTAL and ACCURACY.
+    """
+    sets, elements = len(sweep["settings"]), len(sweep["elements"])
+    set_index, element_index = np.indices((sets, elements)).reshape(2, -1)
+    frame = pd.DataFrame(sweep["settings"]).iloc[set_index].reset_index(drop=True)
+    frame["ELEMENT"] = np.array(sweep["elements"], dtype=object)[element_index]
+    frame["HITS"] = sweep["hits"].reshape(-1)
+    frame["TOTAL"] = sweep["totals"][element_index]
+    frame["ACCURACY"] = sweep["accuracy"].reshape(-1)
+    return frame
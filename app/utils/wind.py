@@ -0,0 +1,141 @@
+"""
+Shared parser for surface wind groups.
+
+One named-group pattern covers the forms found in METARs, TAKEOFF forecasts and
+aerodrome warnings: `dddffKT`, `ddd/ffKT`, `ddd/ff`, gusts (`dddffGggKT`), variable
+winds (`VRBffKT`, `VRB/ff`, bare `VRB`) and calms (`00000KT`, `CALM`). It is compiled
+once in two anchorings: `WIND_TOKEN_RE` for a column value that starts with the group,
+and `WIND_IN_TEXT_RE` for a group anywhere in a report.
+
+`parse_wind_group` handles one string, `extract_wind_groups` a whole Series through
+`Series.str.extract`, and `parse_warning_wind` the plain-language wind of an aerodrome
+warning ("SFC WSPD 17KT MAX25 FROM WSW").
+"""
+
+import re
+from collections import namedtuple
+
+import pandas as pd
+
+WIND_GROUP = (
+    r"(?:(?P<calm>CALM)"
+    r"|(?P<dir>\d{3}|VRB)/?(?P<speed>\d{2,3})?(?:G(?P<gust>\d{2,3}))?(?P<unit>KT)?)"
+)
+
+WIND_TOKEN_RE = re.compile(rf"^{WIND_GROUP}")
+WIND_IN_TEXT_RE = re.compile(rf"(?<!\S){WIND_GROUP}(?![^\s=])")
+
+# Compass points used in aerodrome warnings, in degrees true
+COMPASS_POINTS = {
+    "N": 0, "NNE": 20, "NE": 50, "ENE": 70,
+    "E": 90, "ESE": 110, "SE": 140, "SSE": 160,
+    "S": 180, "SSW": 200, "SW": 230, "WSW": 250,
+    "W": 270, "WNW": 290, "NW": 320, "NNW": 340,
+    "WEST": 270, "EAST": 90, "SOUTH": 180, "NORTH": 0,
+}
+
+WARNING_SPEED_RE = re.compile(r"SFC WSPD (\d+)KT")
+WARNING_GUST_RE = re.compile(r"MAX(\d+)")
+WARNING_FROM_RE = re.compile(r"FROM\s+([A-Z]+)")
+
+Wind = namedtuple("Wind", ["direction", "speed", "gust", "vrb"])
+
+
+def _wind_from_match(match):
+    """Build a Wind from a WIND_GROUP match, or None for a direction without a speed."""
+    if match.group("calm"):
+        return Wind(0, 0, None, False)
+    direction, speed, gust = match.group("dir", "speed", "gust")
+    vrb = direction == "VRB"
+    if speed is None and not vrb:
+        return None
+    return Wind(
+        None if vrb else int(direction),
+        int(speed) if speed is not None else None,
+        int(gust) if gust is not None else None,
+        vrb,
+    )
+
+
+def parse_wind_group(text):
+    """
+    Parse a wind group at the start of `text`.
+
+    Returns:
+        Wind: (direction, speed, gust, vrb); direction is None for VRB. None if
+        `text` does not start with a wind group.
+    """
+    match = WIND_TOKEN_RE.match(text)
+    return _wind_from_match(match) if match else None
+
+
+def find_wind_group(text):
+    """
+    Find the first `...KT` wind group in a report (e.g. a METAR line).
+
+    Returns:
+        Wind or None
+    """
+    for match in WIND_IN_TEXT_RE.finditer(text):
+        if match.group("unit") and match.group("speed"):
+            return _wind_from_match(match)
+    return None
+
+
+def extract_wind_groups(series):
+    """
+    Parse a column of wind groups in one vectorised pass.
+
+    Args:
+        series (pd.Series): Strings starting with a wind group (e.g. "09010KT", "VRB03KT").
+
+    Returns:
+        pd.DataFrame: WIND_DIR, WIND_SPEED and WIND_GUST (Int16, <NA> where absent) and
+        WIND_VRB (bool), aligned with `series`. Unparseable values give <NA> throughout.
+    """
+    groups = series.astype("string").str.extract(WIND_TOKEN_RE)
+    calm = groups["calm"].notna().to_numpy()
+    vrb = (groups["dir"] == "VRB").fillna(False).to_numpy(dtype=bool)
+    direction = pd.to_numeric(groups["dir"].where(~vrb), errors="coerce").astype("Int16")
+    speed = pd.to_numeric(groups["speed"], errors="coerce").astype("Int16")
+    # A direction without a speed is not a wind group
+    direction = direction.where(speed.notna())
+    direction[calm] = 0
+    speed[calm] = 0
+    return pd.DataFrame({
+        "WIND_DIR": direction,
+        "WIND_VRB": vrb,
+        "WIND_SPEED": speed,
+        "WIND_GUST": pd.to_numeric(groups["gust"], errors="coerce").astype("Int16"),
+    }, index=series.index)
+
+
+def parse_warning_wind(line):
+    """
+    Wind of an aerodrome warning line.
+
+    Reads the plain-language form ("SFC WSPD 17KT MAX25 FROM WSW"), falling back to a
+    coded group ("SFC WIND 25020G35KT") when there is no SFC WSPD.
+
+    Returns:
+        tuple: (speed, gust, direction text, direction in degrees), speeds as "17KT"
+        strings and "" where absent, as in the AD warning CSV.
+    """
+    speed = WARNING_SPEED_RE.search(line)
+    gust = WARNING_GUST_RE.search(line)
+    direction = WARNING_FROM_RE.search(line)
+    direction = direction.group(1) if direction else ""
+    if speed:
+        return (
+            f"{speed.group(1)}KT",
+            f"{gust.group(1)}KT" if gust else "",
+            direction,
+            COMPASS_POINTS.get(direction, ""),
+        )
+
+    coded = find_wind_group(line)
+    if coded:
+        gust_text = f"{coded.gust}KT" if coded.gust is not None else f"{gust.group(1)}KT" if gust else ""
+        degrees = coded.direction if coded.direction is not None else COMPASS_POINTS.get(direction, "")
+        return f"{coded.speed}KT", gust_text, direction, degrees
+    return "", f"{gust.group(1)}KT" if gust else "", direction, COMPASS_POINTS.get(direction, "")
@@ -0,0 +1,225 @@
+"""
+Synthetic input generators for the benchmark suite.
+
+Every generator is deterministic for a given seed and writes files in the same formats
+the app reads: OGIMET METAR text exports, TAKEOFF forecast text files, aerodrome warning
+bulletins, University of Wyoming sounding CSVs and local forecast PDFs.
+
+`months` is the size knob: 1 is a normal month at one station, 10 and 100 continue into
+the following months with fresh random weather (day numbers repeat, as they would in a
+multi-month file).
+"""
+
+import calendar
+import os
+import random
+from datetime import datetime, timedelta
+
+COMPASS_POINTS = {
+    "N": 0, "NNE": 20, "NE": 50, "ENE": 70, "E": 90, "ESE": 110, "SE": 140, "SSE": 160,
+    "S": 180, "SSW": 200, "SW": 230, "WSW": 250, "W": 270, "WNW": 290, "NW": 320, "NNW": 340,
+}
+
+UWYO_COLUMNS = [
+    "time", "longitude", "latitude", "pressure_hPa", "geopotential height_m", "temperature_C",
+    "dew point temperature_C", "ice point temperature_C", "relative humidity_%",
+    "relative humidity wrt ice_%", "mixing ratio_g/kg", "wind direction_degree", "wind speed_m/s",
+]
+
+# Forecast levels used by the local forecast PDFs (m)
+FORECAST_LEVELS = [3000, 2100, 1500, 900, 600, 300]
+
+
+def month_sequence(year, month, months):
+    """Yield (year, month) for `months` consecutive months starting at year/month."""
+    for offset in range(months):
+        y, m = divmod(month - 1 + offset, 12)
+        yield year + y, m + 1
+
+
+def _metar_body(rng, icao, obs_time):
+    """Return one METAR report (without the OGIMET timestamp prefix)."""
+    wind_dir = rng.randrange(0, 360, 10)
+    wind_speed = rng.randint(2, 22)
+    if wind_speed < 4 and rng.random() < 0.5:
+        wind = f"VRB{wind_speed:02d}KT"
+    elif rng.random() < 0.15:
+        wind = f"{wind_dir:03d}{wind_speed:02d}G{wind_speed + rng.randint(10, 18):02d}KT"
+    else:
+        wind = f"{wind_dir:03d}{wind_speed:02d}KT"
+
+    weather, clouds = [], ["SCT018"]
+    roll = rng.random()
+    if roll < 0.04:
+        weather.append(rng.choice(["TSRA", "-TSRA", "+TSRA", "TS"]))
+        clouds.append(f"FEW{rng.randint(20, 30):03d}CB")
+    elif roll < 0.12:
+        weather.append(rng.choice(["RA", "-RA", "SHRA"]))
+        clouds.append("FEW025TCU")
+    elif roll < 0.3:
+        weather.append(rng.choice(["BR", "HZ"]))
+    clouds.append(f"BKN{rng.choice([80, 90, 100]):03d}")
+
+    temp = rng.randint(24, 33)
+    dew = temp - rng.randint(1, 6)
+    qnh = rng.randint(998, 1012)
+    parts = [
+        "METAR", icao, obs_time.strftime("%d%H%MZ"), wind, f"{rng.choice([2500, 3000, 5000, 6000])}",
+        *weather, *clouds, f"{temp:02d}/{dew:02d}", f"Q{qnh}", "NOSIG=",
+    ]
+    return " ".join(parts)
+
+
+def generate_metar_file(path, icao="VABB", year=2025, month=7, months=1, interval_minutes=30, seed=0, raw=False):
+    """
+    Write an OGIMET-format METAR file (`YYYYMMDDHHMM METAR ICAO DDHHMMZ ...=` per line).
+
+    With `raw=True` the timestamp prefix and `=` terminator are left out, which is the
+    form process_metar hands to decode_metar_to_csv.
+
+    Returns:
+        int: Number of reports written.
+    """
+    rng = random.Random(seed)
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for y, m in month_sequence(year, month, months):
+            obs_time = datetime(y, m, 1)
+            end = obs_time + timedelta(days=calendar.monthrange(y, m)[1])
+            while obs_time < end:
+                body = _metar_body(rng, icao, obs_time)
+                if raw:
+                    f.write(body.rstrip("=") + "\n")
+                else:
+                    f.write(f"{obs_time:%Y%m%d%H%M} {body}\n")
+                obs_time += timedelta(minutes=interval_minutes)
+                count += 1
+    return count
+
+
+def generate_forecast_file(directory, year=2025, month=7, months=1, seed=0):
+    """
+    Write a monthly TAKEOFF forecast file (`TAKEOFF_Forecast_MMYYYY.txt`) with hourly rows.
+
+    Returns:
+        str: Path of the written file.
+    """
+    rng = random.Random(seed)
+    path = os.path.join(directory, f"TAKEOFF_Forecast_{month:02d}{year}.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("TIME WIND TEMP QFE QNH\n")
+        for y, m in month_sequence(year, month, months):
+            for day in range(1, calendar.monthrange(y, m)[1] + 1):
+                f.write(f"{day}\n")
+                for hour in range(24):
+                    speed = rng.randint(2, 20)
+                    direction = rng.randrange(0, 360, 10)
+                    if speed < 4:
+                        wind = f"VRB{speed:02d}KT"
+                    elif rng.random() < 0.3:
+                        wind = f"{direction:03d}/{speed:02d}KT"
+                    else:
+                        wind = f"{direction:03d}{speed:02d}KT"
+                    qfe = rng.randint(998, 1008)
+                    f.write(f"{hour:02d}00Z {wind} {rng.randint(24, 33)} {qfe} {qfe + rng.randint(0, 4)}\n")
+    return path
+
+
+def generate_warning_bulletin(path, icao="VABB", year=2025, month=7, months=1, seed=0):
+    """
+    Write an aerodrome warning bulletin: per-day blocks of 4-hourly warnings, a mix of
+    surface wind/gust and thunderstorm warnings.
+
+    Returns:
+        int: Number of warnings written.
+    """
+    rng = random.Random(seed)
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for y, m in month_sequence(year, month, months):
+            days = calendar.monthrange(y, m)[1]
+            for day in range(1, days + 1):
+                f.write(f"{day:02d}\n")
+                for number, start_hour in enumerate(range(1, 24, 4), start=1):
+                    start = datetime(y, m, day, start_hour)
+                    end = start + timedelta(hours=4)
+                    issue = start - timedelta(minutes=30)
+                    f.write(f"LIGHT AIRCRAFT WARNING FOR {icao} - {start:%Y%m%d %H:%M}\n")
+                    f.write("--------------------------------------------\n")
+                    f.write(
+                        f"{icao} {issue:%d%H%M}Z AD WRNG {number:02d} "
+                        f"VALID {start:%d%H%M}/{end:%d%H%M}\n"
+                    )
+                    direction = rng.choice(list(COMPASS_POINTS))
+                    wind = f"SFC WSPD 17KT MAX{rng.randint(25, 35)} FROM {direction} FCST NC="
+                    if rng.random() < 0.2:
+                        wind = f"{rng.choice(['FBL', 'MOD', 'HVY'])} TSRA WITH {wind}"
+                    f.write(wind + "\n")
+                    count += 1
+                f.write("\n")
+    return count
+
+
+def generate_sounding_csv(path, seed=0, levels=120):
+    """
+    Write one uwyo TEXT:CSV sounding with `levels` levels from the surface to ~16 km.
+
+    Returns:
+        str: The path written.
+    """
+    rng = random.Random(seed)
+    surface_temp = rng.uniform(26, 31)
+    rows = [",".join(UWYO_COLUMNS)]
+    for level in range(levels):
+        height = 10 + level * (16000 / levels) + rng.uniform(-20, 20)
+        pressure = 1008 * (1 - 2.25577e-5 * height) ** 5.25588
+        temp = surface_temp - 6.5 * height / 1000 + rng.uniform(-0.5, 0.5)
+        dew = temp - rng.uniform(1, 12)
+        rows.append(",".join(str(v) for v in [
+            "2025-07-01 00:00:00", 72.85, 19.12, round(pressure, 1), round(height),
+            round(temp, 1), round(dew, 1), "", rng.randint(20, 95), "", round(rng.uniform(1, 20), 2),
+            rng.randrange(0, 360, 5), round(rng.uniform(1, 25), 1),
+        ]))
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(rows) + "\n")
+    return path
+
+
+def sounding_forecast_rows(seed=0):
+    """Forecast levels for one sounding, as parse_forecast_pdf returns them."""
+    rng = random.Random(seed)
+    return [
+        (altitude, f"{rng.randrange(0, 360, 10):03d}", f"{rng.randint(5, 30):02d}",
+         f"{round(28 - 6.5 * altitude / 1000 + rng.uniform(-2, 2)):+03d}")
+        for altitude in FORECAST_LEVELS
+    ]
+
+
+def generate_forecast_pdf(path, icao="VABB", start=None, hours=6, seed=0):
+    """
+    Write a one-page local forecast PDF in the layout parse_forecast_pdf expects.
+
+    Requires reportlab.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    start = start or datetime(2025, 7, 1)
+    end = start + timedelta(hours=hours)
+    rng = random.Random(seed)
+    lines = [
+        f"LOCAL FORECAST FOR {icao} AND ITS NEIGHBOURHOOD",
+        f"VALID FROM {start:%Y/%m/%d %H:%M} UTC TO {end:%Y/%m/%d %H:%M} UTC",
+        "UPPER WINDS",
+        *(f"{alt}M {direction}/{speed} {temp}" for alt, direction, speed, temp in sounding_forecast_rows(seed)),
+        "WEATHER",
+        rng.choice(["FBL RA", "MOD TSRA", "HZ", "BR"]) + " BECMG " + f"{start:%d%H}/{end:%d%H}" + " NSW",
+        "=",
+    ]
+    pdf = canvas.Canvas(path, pagesize=A4)
+    y = 800
+    for line in lines:
+        pdf.drawString(50, y, line)
+        y -= 18
+    pdf.save()
+    return path
@@ -0,0 +1,360 @@
+"""
+Benchmark the verification pipeline on synthetic inputs.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks                       # 1x, 10x, 100x a month
+    python -m benchmarks.run_benchmarks --scales 1 10 --repeat 5
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/baseline.json
+
+Each case is timed `--repeat` times and the best run is kept. A case whose time at the
+previous scale, extrapolated linearly, would exceed `--max-seconds` is recorded as skipped
+rather than run (several stages are quadratic in the input). Results are written as JSON
+to benchmarks/results/ (or --output) together with the interpreter and library versions,
+so a later run can be compared against them offline with --compare.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import generators
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+# Soundings in a normal month (00Z and 12Z)
+SOUNDINGS_PER_MONTH = 60
+# First month of the generated data
+START_YEAR, START_MONTH = 2025, 7
+
+
+def _time(func, repeat):
+    """Return (best seconds, all runs, last result) for `func()`, with stdout silenced."""
+    runs, result = [], None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            runs.append(time.perf_counter() - start)
+    return min(runs), runs, result
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _offset_days(df, days_per_month=31):
+    """Give each repeated month its own DAY range so DAY+TIME keys stay unique."""
+    df = df.copy()
+    day = df["DAY"].astype("int64")
+    month_index = (day.diff() < 0).cumsum()
+    df["DAY"] = day + month_index * days_per_month
+    return df
+
+
+def _string_key_merge(df1, df2):
+    """The DAY+TIME string-key join compare_weather_data used before epoch-minute keys."""
+    df1, df2 = df1.copy(), df2.copy()
+    df1["DATETIME"] = df1["DAY"].astype(str).str.zfill(2) + " " + df1["TIME"].astype(str)
+    df2["DATETIME"] = df2["DAY"].astype(str).str.zfill(2) + " " + df2["TIME"].astype(str)
+    return pd.merge(
+        df1.drop_duplicates(subset="DATETIME", keep="first"),
+        df2.drop_duplicates(subset="DATETIME", keep="first"),
+        on="DATETIME", suffixes=("_actual", "_forecast"), how="inner",
+    )
+
+
+def _upper_air_rows(frames):
+    """Build the xlsx writer input the same way process_upper_air does."""
+    rows = []
+    for result in frames:
+        for _, row in result.iterrows():
+            rows.append({
+                "date": "01/07/2025",
+                "validity": "00-06",
+                "fl": f"FL {int(row['Altitude (m)']) // 30:03d} ({int(row['Altitude (m)'])} M)",
+                "weather_forecast": "FBL RA",
+                "weather_matched": [],
+                "forecast_wind_dir": row["Wind Direction"],
+                "forecast_speed": row["Wind Speed (kt)"],
+                "forecast_temp": row["Temperature (°C)"],
+                "actual_wind_dir": row["actual_wind_direction"],
+                "actual_speed": round(row["actual_wind_speed_m/s"] * 1.94384, 2),
+                "actual_temp": row["interp_temperature_C"],
+                "wind_dir_acc": "CORRECT",
+                "speed_acc": "INCORRECT",
+                "temp_acc": "CORRECT",
+                "weather_acc": "CORRECT",
+            })
+    return rows
+
+
+def run_scale(scale, workdir, repeat, previous=None, max_seconds=None):
+    """
+    Generate inputs for `scale` months and time every stage on them.
+
+    Args:
+        scale (int): Months of data.
+        workdir (str): Directory for the generated inputs and outputs.
+        repeat (int): Runs per case.
+        previous (dict): {name: (scale, seconds)} from smaller scales, used for the time budget.
+        max_seconds (float): Skip cases expected to take longer than this per run.
+    """
+    previous = previous if previous is not None else {}
+    from app.utils.metar import (
+        decode_metar_to_csv, extract_data_from_file_with_day_and_wind, compare_weather_data, match_observations,
+    )
+    from app.utils.AD_warn import parse_warning_file
+    from app.utils.extract_metar_features import extract_metar_features
+    from app.utils.generate_warning_report import (
+        generate_warning_report, generate_excel_warning_report, generate_aerodrome_warnings_table,
+    )
+    from app.utils.upper_data_fetch import interpolate_temperature_only, generate_upper_air_verification_xlsx
+
+    os.makedirs(workdir, exist_ok=True)
+    results = []
+
+    def record(name, func, rows_in=None):
+        if name in previous and max_seconds:
+            last_scale, last_seconds = previous[name]
+            expected = last_seconds * scale / last_scale
+            if expected > max_seconds:
+                results.append({"name": name, "scale": scale, "rows_in": rows_in, "skipped": f"expected {expected:.0f}s"})
+                print(f"  {name:<40}    skipped (expected {expected:.0f} s)")
+                previous.pop(name)
+                return None
+        seconds, runs, result = _time(func, repeat)
+        previous[name] = (scale, seconds)
+        results.append({
+            "name": name,
+            "scale": scale,
+            "rows_in": rows_in,
+            "seconds": round(seconds, 6),
+            "runs": [round(r, 6) for r in runs],
+        })
+        print(f"  {name:<40} {seconds * 1000:10.1f} ms")
+        return result
+
+    # --- METAR/TAKEOFF verification ---
+    metar_path = os.path.join(workdir, "metar.txt")
+    metar_count = generators.generate_metar_file(
+        metar_path, year=START_YEAR, month=START_MONTH, months=scale, seed=scale, raw=True
+    )
+    forecast_path = generators.generate_forecast_file(
+        workdir, year=START_YEAR, month=START_MONTH, months=scale, seed=scale
+    )
+    decoded_path = os.path.join(workdir, "decoded.csv")
+
+    metar_df = record(
+        "decode_metar_to_csv",
+        lambda: decode_metar_to_csv(metar_path, decoded_path, month=START_MONTH, year=START_YEAR),
+        metar_count,
+    )
+    forecast_df = record(
+        "extract_data_from_file_with_day_and_wind",
+        lambda: extract_data_from_file_with_day_and_wind(forecast_path),
+        24 * 31 * scale,
+    )
+    record("compare_weather_data", lambda: compare_weather_data(metar_df, forecast_df), len(forecast_df))
+    # The string keys only stay unique across months with offset day numbers
+    offset_metar, offset_forecast = _offset_days(metar_df), _offset_days(forecast_df)
+    record("string_key_merge", lambda: _string_key_merge(offset_metar, offset_forecast), len(forecast_df))
+    record("match_observations", lambda: match_observations(metar_df, forecast_df), len(forecast_df))
+
+    # --- Aerodrome warnings ---
+    # Bulletins and their METARs are keyed by DDHHMM, so the warning pipeline runs one
+    # station-month at a time; larger scales process that many months in turn.
+    months = []
+    for index, (year, month) in enumerate(generators.month_sequence(START_YEAR, START_MONTH, scale)):
+        warn_dir = os.path.join(workdir, "ad_warn", f"{year}{month:02d}")
+        os.makedirs(warn_dir, exist_ok=True)
+        paths = {name: os.path.join(warn_dir, name) for name in (
+            "AD_warning.txt", "metar.txt", "AD_warn_output.csv",
+            "metar_extracted_features.txt", "final_warning_report.csv",
+        )}
+        paths["count"] = generators.generate_warning_bulletin(
+            paths["AD_warning.txt"], year=year, month=month, seed=index
+        )
+        generators.generate_metar_file(paths["metar.txt"], year=year, month=month, seed=index + 1)
+        months.append(paths)
+    warning_count = sum(paths["count"] for paths in months)
+
+    def for_each_month(func):
+        return lambda: [func(paths) for paths in months]
+
+    def warning_cases():
+        # Each stage reads the previous stage's output, so stop at the first skipped one
+        record(
+            "parse_warning_file",
+            for_each_month(lambda p: parse_warning_file(p["AD_warning.txt"], "VABB")),
+            warning_count,
+        )
+        record(
+            "extract_metar_features",
+            for_each_month(lambda p: extract_metar_features(
+                p["AD_warn_output.csv"], p["metar.txt"], p["metar_extracted_features.txt"]
+            )),
+            warning_count,
+        )
+        if "skipped" in results[-1]:
+            return
+        record(
+            "generate_warning_report",
+            for_each_month(lambda p: generate_warning_report(p["AD_warn_output.csv"], p["metar_extracted_features.txt"])),
+            warning_count,
+        )
+        if "skipped" in results[-1]:
+            return
+        record(
+            "generate_excel_warning_report",
+            for_each_month(lambda p: generate_excel_warning_report(
+                p["AD_warn_output.csv"], p["metar_extracted_features.txt"]
+            )),
+            warning_count,
+        )
+        # adwrn_verify puts a station heading line on top of the report before the table is built
+        for paths in months:
+            with open(paths["final_warning_report.csv"], encoding="utf-8") as f:
+                report_body = f.read()
+            with open(paths["final_warning_report.csv"], "w", encoding="utf-8") as f:
+                f.write("VABB - July 2025\n" + report_body)
+        record(
+            "generate_aerodrome_warnings_table",
+            for_each_month(lambda p: generate_aerodrome_warnings_table(
+                p["AD_warn_output.csv"], p["metar_extracted_features.txt"]
+            )),
+            warning_count,
+        )
+
+    warning_cases()
+
+    # --- Upper air ---
+    soundings = []
+    for index in range(SOUNDINGS_PER_MONTH * scale):
+        sounding_path = generators.generate_sounding_csv(
+            os.path.join(workdir, "sounding.csv"), seed=index
+        )
+        actual_df = pd.read_csv(sounding_path, skipinitialspace=True)
+        forecast = pd.DataFrame(
+            generators.sounding_forecast_rows(seed=index),
+            columns=["Altitude (m)", "Wind Direction", "Wind Speed (kt)", "Temperature (°C)"],
+        )
+        for col in ["Altitude (m)", "Wind Speed (kt)", "Temperature (°C)"]:
+            forecast[col] = pd.to_numeric(forecast[col], errors="coerce")
+        soundings.append((actual_df, forecast))
+
+    interpolated = record(
+        "interpolate_temperature_only",
+        lambda: [interpolate_temperature_only(actual, forecast) for actual, forecast in soundings],
+        len(soundings),
+    )
+    if interpolated is not None:
+        data_rows = _upper_air_rows(interpolated)
+        record(
+            "generate_upper_air_verification_xlsx",
+            lambda: generate_upper_air_verification_xlsx(
+                data_rows, {"icao": "VABB", "month_year": "July 2025"},
+                os.path.join(workdir, "upper_air_verification.xlsx"),
+            ),
+            len(data_rows),
+        )
+
+    # --- Forecast PDFs ---
+    try:
+        from app.routes.api import parse_forecast_pdf
+        pdf_paths = [
+            generators.generate_forecast_pdf(os.path.join(workdir, f"forecast_{index}.pdf"), seed=index)
+            for index in range(SOUNDINGS_PER_MONTH * scale)
+        ]
+    except ImportError as e:
+        print(f"  skipping parse_forecast_pdf: {e}")
+    else:
+        record("parse_forecast_pdf", lambda: [parse_forecast_pdf(path) for path in pdf_paths], len(pdf_paths))
+
+    return results
+
+
+def compare_results(current, baseline, threshold):
+    """
+    Print the relative change of every case present in both runs.
+
+    Returns:
+        list: (name, scale, ratio) of cases slower than `threshold` x the baseline.
+    """
+    previous = {(r["name"], r["scale"]): r["seconds"] for r in baseline["results"] if "seconds" in r}
+    regressions = []
+    for result in current["results"]:
+        key = (result["name"], result["scale"])
+        if "seconds" not in result:
+            continue
+        if key not in previous or not previous[key]:
+            continue
+        ratio = result["seconds"] / previous[key]
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"  {result['name']:<40} x{result['scale']:<4} {ratio:6.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append((result["name"], result["scale"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100], help="Months of data per case")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best is kept")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio reported as a regression")
+    parser.add_argument("--max-seconds", type=float, default=300, help="Per-run time budget for a case (0: no limit)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "repeat": args.repeat,
+        "results": [],
+    }
+    previous = {}
+    with tempfile.TemporaryDirectory(prefix="metar_bench_") as tmp:
+        for scale in sorted(args.scales):
+            print(f"Scale {scale}x ({scale} month{'s' if scale != 1 else ''})")
+            report["results"].extend(
+                run_scale(scale, os.path.join(tmp, f"x{scale}"), args.repeat, previous, args.max_seconds)
+            )
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.compare}:")
+        if compare_results(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())